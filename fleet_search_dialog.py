@@ -0,0 +1,372 @@
+# fleet_search_dialog.py
+"""
+Busca de um termo (chave de NF, id de transação...) nos logs de todos os serviços cadastrados.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+
+from PyQt5 import QtWidgets, QtCore
+
+from app_logger import app_logger
+from log_search import init_search_worker, scan_log_files, search_file_task
+from log_viewer import LogViewerDialog
+
+# Teto de resultados da busca: ao atingir, os arquivos ainda não varridos são descartados
+MAX_FLEET_RESULTS = 2000
+# A partir deste volume total a varredura roda em processos (vários núcleos); abaixo,
+# threads bastam e evitam o custo de iniciar os processos
+PROCESS_POOL_MIN_BYTES = 256 * 1024 * 1024
+MAX_FLEET_WORKERS = max(1, min(8, os.cpu_count() or 1))
+
+
+class FleetListingJobSignals(QtCore.QObject):
+    files_found = QtCore.pyqtSignal(int, str, object) # Geração, serviço, lista de (nome, caminho, tamanho)
+    finished = QtCore.pyqtSignal(int) # Geração
+
+
+class FleetListingJob(QtCore.QRunnable):
+    """
+    Lista os arquivos de log das pastas dos serviços (com as subpastas, como o
+    visualizador), emitindo os arquivos de cada pasta assim que ela é listada. O
+    cancelamento é conferido entre as pastas e entre as entradas de cada uma.
+    """
+
+    def __init__(self, generation, log_dirs, cancel_event):
+        super().__init__()
+        self.generation = generation
+        self.log_dirs = log_dirs
+        self.cancel_event = cancel_event
+        self.signals = FleetListingJobSignals()
+        self.setAutoDelete(True)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            for service, log_path in self.log_dirs:
+                if self.cancel_event.is_set():
+                    return
+                self._list_service(service, log_path)
+        finally:
+            self.signals.finished.emit(self.generation)
+
+    def _list_service(self, service, log_path):
+        if not log_path or not os.path.isdir(log_path):
+            app_logger.warning(f"Busca geral: pasta de logs inválida para '{service}': {log_path}")
+            return
+        batch = []
+
+        def flush(_directory=None):
+            nonlocal batch
+            if batch and not self.cancel_event.is_set():
+                self.signals.files_found.emit(self.generation, service, batch)
+            batch = []
+
+        try:
+            # Cada pasta nova entrega os arquivos da anterior
+            for name, path, _, size in scan_log_files(log_path, self.cancel_event, recursive=True,
+                                                      on_directory=flush):
+                batch.append((name, path, size))
+        except OSError as e:
+            app_logger.warning(f"Busca geral: erro ao listar '{log_path}' ({service}): {e}")
+        finally:
+            flush()
+
+
+class FleetSearch(QtCore.QObject):
+    """
+    Distribui a busca pelos arquivos de log de vários serviços num Executor: um
+    ProcessPoolExecutor para volumes grandes, um ThreadPoolExecutor para os pequenos.
+
+    As pastas são listadas em segundo plano (FleetListingJob) e cada arquivo vira uma
+    tarefa (search_file_task) assim que é encontrado. Só a escolha do Executor espera
+    a listagem: os arquivos ficam numa fila até o volume listado passar de
+    PROCESS_POOL_MIN_BYTES ou a listagem terminar. Os resultados chegam por arquivo, na
+    ordem em que as tarefas terminam; os callbacks do Executor rodam em outra thread e
+    só emitem sinais, entregues na thread da UI.
+    """
+    hits_found = QtCore.pyqtSignal(str, str, object) # Serviço, arquivo, lista de (linha base 0, trecho)
+    progress = QtCore.pyqtSignal(int, int, int, float) # Arquivos concluídos, total, resultados, MB/s
+    finished = QtCore.pyqtSignal(bool, bool) # Cancelada, limite de resultados atingido
+    _task_done = QtCore.pyqtSignal(int, str, object) # Geração, serviço, resultado de search_file_task
+
+    def __init__(self, parent=None, max_results=MAX_FLEET_RESULTS):
+        super().__init__(parent)
+        self.max_results = max_results
+        self._task_done.connect(self._on_task_done)
+        self._listing_pool = QtCore.QThreadPool(self)
+        self._listing_pool.setMaxThreadCount(1)
+        self._generation = 0
+        self._executor = None
+        self._cancel_event = None
+        self._listing_cancel_event = threading.Event()
+        self._listing = False
+        self._queued = [] # (serviço, caminho, tamanho) à espera da escolha do Executor
+        self._queued_bytes = 0
+        self._file_names = {} # Caminho -> nome relativo à pasta de logs do serviço
+        self._service_count = 0
+        self._running = False
+        self._files_total = 0
+        self._files_done = 0
+        self._result_count = 0
+        self._bytes_read = 0
+        self._started_at = 0.0
+        self._term = ""
+        self._case_sensitive = False
+        self.uses_processes = False
+
+    def is_running(self):
+        return self._running
+
+    def file_name(self, path):
+        """Nome do arquivo relativo à pasta de logs do serviço (ex.: 2025-07-14/Batman.log)."""
+        return self._file_names.get(path, os.path.basename(path))
+
+    def start(self, log_dirs, term, case_sensitive=False):
+        """`log_dirs`: lista de (serviço, pasta de logs)."""
+        self.cancel()
+        self._generation += 1
+        self._term = term
+        self._case_sensitive = case_sensitive
+        self._executor = None
+        self._cancel_event = None
+        self._queued = []
+        self._queued_bytes = 0
+        self._file_names = {}
+        self._service_count = len(log_dirs)
+        self._files_total = 0
+        self._files_done = 0
+        self._result_count = 0
+        self._bytes_read = 0
+        self._started_at = time.monotonic()
+        self.uses_processes = False
+        self._running = True
+        self._listing = True
+        self._listing_cancel_event = threading.Event()
+        job = FleetListingJob(self._generation, list(log_dirs), self._listing_cancel_event)
+        job.signals.files_found.connect(self._on_files_found)
+        job.signals.finished.connect(self._on_listing_finished)
+        self._listing_pool.start(job)
+
+    def _on_files_found(self, generation, service, entries):
+        if generation != self._generation:
+            return
+        self._files_total += len(entries)
+        for name, path, size in entries:
+            self._file_names[path] = name
+            if self._executor is not None:
+                self._submit(service, path)
+            else:
+                self._queued.append((service, path, size))
+                self._queued_bytes += size
+        if self._executor is None and self._queued_bytes >= PROCESS_POOL_MIN_BYTES:
+            self._start_executor()
+        self.progress.emit(self._files_done, self._files_total, self._result_count, self.mb_per_second())
+
+    def _on_listing_finished(self, generation):
+        if generation != self._generation:
+            return
+        self._listing = False
+        if self._executor is None:
+            self._start_executor()
+        app_logger.info(f"Busca em {self._files_total} arquivos de {self._service_count} serviços "
+                        f"({'processos' if self.uses_processes else 'threads'}): '{self._term}'")
+        self._finish_if_done()
+
+    def _start_executor(self):
+        """Cria o Executor conforme o volume listado até aqui e envia os arquivos da fila."""
+        self.uses_processes = self._queued_bytes >= PROCESS_POOL_MIN_BYTES
+        if self.uses_processes:
+            self._cancel_event = multiprocessing.Event()
+            executor_class = concurrent.futures.ProcessPoolExecutor
+        else:
+            self._cancel_event = threading.Event()
+            executor_class = concurrent.futures.ThreadPoolExecutor
+        self._executor = executor_class(max_workers=MAX_FLEET_WORKERS, initializer=init_search_worker,
+                                        initargs=(self._cancel_event,))
+        # Maiores primeiro: os arquivos pequenos preenchem os workers livres no final
+        queued, self._queued, self._queued_bytes = self._queued, [], 0
+        for service, path, _ in sorted(queued, key=lambda task: task[2], reverse=True):
+            self._submit(service, path)
+
+    def _submit(self, service, path):
+        generation = self._generation
+        future = self._executor.submit(search_file_task, path, self._term, self._case_sensitive, self.max_results)
+        future.add_done_callback(lambda f, s=service, p=path: self._emit_task_done(generation, s, p, f))
+
+    def _emit_task_done(self, generation, service, path, future):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e: # Ex.: processo worker encerrado
+            result = (path, [], 0, str(e) or type(e).__name__)
+        self._task_done.emit(generation, service, result)
+
+    def cancel(self):
+        """
+        Interrompe a busca: a listagem para na próxima entrada, as tarefas na fila são
+        descartadas e as em andamento param no próximo bloco.
+        """
+        if self._running:
+            self._stop()
+            self.finished.emit(True, False)
+
+    def _stop(self):
+        self._running = False
+        self._listing = False
+        self._generation += 1
+        self._listing_cancel_event.set()
+        self._queued = []
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def mb_per_second(self):
+        elapsed = time.monotonic() - self._started_at
+        return self._bytes_read / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+
+    def _on_task_done(self, generation, service, result):
+        if generation != self._generation:
+            return
+        path, hits, bytes_read, error = result
+        if error:
+            app_logger.warning(f"Erro ao procurar em '{path}' ({service}): {error}")
+        self._files_done += 1
+        self._bytes_read += bytes_read
+        hits = hits[:self.max_results - self._result_count]
+        self._result_count += len(hits)
+        if hits:
+            self.hits_found.emit(service, path, hits)
+        self.progress.emit(self._files_done, self._files_total, self._result_count, self.mb_per_second())
+        if self._result_count >= self.max_results:
+            self._stop()
+            self.finished.emit(False, True)
+        else:
+            self._finish_if_done()
+
+    def _finish_if_done(self):
+        if self._running and not self._listing and self._files_done == self._files_total:
+            self._running = False
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self.finished.emit(False, False)
+
+    def shutdown(self):
+        """Cancela a busca e espera a listagem em andamento terminar (ao fechar o diálogo)."""
+        self.cancel()
+        self._listing_pool.waitForDone()
+
+
+class FleetSearchDialog(QtWidgets.QDialog):
+    """Busca nos logs de todos os serviços cadastrados, com os resultados agrupados por serviço."""
+
+    def __init__(self, servicos, parent=None):
+        super().__init__(parent)
+        self.servicos = servicos
+        self.setWindowTitle("Buscar nos Logs de Todos os Serviços")
+        self.setWindowFlags(self.windowFlags() | QtCore.Qt.WindowMaximizeButtonHint)
+        self.setGeometry(150, 150, 1000, 600)
+        self._service_items = {}
+        self._log_viewers = {}
+
+        self.search = FleetSearch(self)
+        self.search.hits_found.connect(self._on_hits_found)
+        self.search.progress.connect(self._on_progress)
+        self.search.finished.connect(self._on_finished)
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        search_layout = QtWidgets.QHBoxLayout()
+        self.term_input = QtWidgets.QLineEdit()
+        self.term_input.setPlaceholderText("Termo a procurar (ex.: chave da NF-e, id da transação)...")
+        self.term_input.returnPressed.connect(self._start_search)
+        search_layout.addWidget(self.term_input)
+        self.case_sensitive_checkbox = QtWidgets.QCheckBox("Aa")
+        self.case_sensitive_checkbox.setToolTip("Sensível a Maiúsculas/Minúsculas")
+        search_layout.addWidget(self.case_sensitive_checkbox)
+        self.search_button = QtWidgets.QPushButton("Buscar")
+        self.search_button.clicked.connect(self._start_search)
+        search_layout.addWidget(self.search_button)
+        self.cancel_button = QtWidgets.QPushButton("Cancelar")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.search.cancel)
+        search_layout.addWidget(self.cancel_button)
+        layout.addLayout(search_layout)
+
+        self.results_tree = QtWidgets.QTreeWidget()
+        self.results_tree.setHeaderLabels(["Serviço / Arquivo", "Linha", "Trecho"])
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.itemDoubleClicked.connect(self._open_hit)
+        layout.addWidget(self.results_tree)
+
+        self.status_label = QtWidgets.QLabel("Duplo clique em um resultado abre o visualizador de logs na linha.")
+        layout.addWidget(self.status_label)
+
+    def _log_dirs(self):
+        return [(servico["nome"], servico.get("logs")) for servico in self.servicos]
+
+    def _start_search(self):
+        term = self.term_input.text()
+        if not term:
+            self.status_label.setText("Digite um termo para procurar.")
+            return
+        self.results_tree.clear()
+        self._service_items = {}
+        self.cancel_button.setEnabled(True)
+        self.status_label.setText(f"Procurando '{term}'...")
+        self.search.start(self._log_dirs(), term, self.case_sensitive_checkbox.isChecked())
+
+    def _on_hits_found(self, service, path, hits):
+        service_item = self._service_items.get(service)
+        if service_item is None:
+            service_item = QtWidgets.QTreeWidgetItem([service, "", ""])
+            self.results_tree.addTopLevelItem(service_item)
+            service_item.setExpanded(True)
+            self._service_items[service] = service_item
+        file_name = self.search.file_name(path)
+        items = []
+        for line_number, snippet in hits:
+            item = QtWidgets.QTreeWidgetItem([file_name, str(line_number + 1), snippet])
+            item.setData(0, QtCore.Qt.UserRole, (service, path, line_number))
+            items.append(item)
+        service_item.addChildren(items)
+        service_item.setText(1, str(service_item.childCount()))
+
+    def _on_progress(self, files_done, files_total, result_count, mb_per_second):
+        mode = "processos" if self.search.uses_processes else "threads"
+        self.status_label.setText(f"{files_done}/{files_total} arquivos · {result_count} resultados · "
+                                  f"{mb_per_second:.1f} MB/s ({mode})")
+
+    def _on_finished(self, cancelled, limit_reached):
+        self.cancel_button.setEnabled(False)
+        text = self.status_label.text()
+        if limit_reached:
+            text += f" · limite de {self.search.max_results} resultados atingido"
+        elif cancelled:
+            text += " · cancelada"
+        self.status_label.setText(text)
+
+    def _open_hit(self, item):
+        hit = item.data(0, QtCore.Qt.UserRole)
+        if not hit:
+            return # Linha do serviço
+        service, path, line_number = hit
+        viewer = self._log_viewers.get(service)
+        if viewer is None or not viewer.isVisible():
+            viewer = LogViewerDialog(os.path.dirname(path), self)
+            self._log_viewers[service] = viewer
+        viewer.open_file_at_line(path, line_number)
+        viewer.show()
+        viewer.raise_()
+
+    def closeEvent(self, event):
+        self.search.shutdown()
+        for viewer in self._log_viewers.values():
+            viewer.close() # Encerra as threads de leitura dos visualizadores abertos por aqui
+        super().closeEvent(event)
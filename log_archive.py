@@ -0,0 +1,290 @@
+# log_archive.py
+"""
+Leitura de logs compactados (.gz/.zip) sem extraí-los, com acesso aleatório por checkpoints.
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+import copy
+import os
+import struct
+import threading
+from types import SimpleNamespace
+import zipfile
+import zlib
+
+ARCHIVE_EXTENSIONS = ('.gz', '.zip')
+# Um checkpoint do descompressor a cada N bytes descomprimidos: chegar a qualquer posição
+# custa no máximo descomprimir N bytes a partir do checkpoint anterior
+CHECKPOINT_INTERVAL = 4 * 1024 * 1024
+# Bytes compactados lidos por vez e teto de bytes produzidos por chamada ao descompressor
+INFLATE_INPUT_BYTES = 256 * 1024
+INFLATE_OUTPUT_BYTES = 1024 * 1024
+# Arquivos compactados cujos checkpoints ficam em memória (os usados há mais tempo saem)
+MAX_SHARED_INDEXES = 16
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Erros de leitura de um log, inclusive de um .gz/.zip corrompido ou truncado
+LOG_READ_ERRORS = (OSError, EOFError, ValueError, zlib.error, zipfile.BadZipFile)
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def open_log_file(path):
+    """Abre um log para leitura binária: arquivos comuns com open(), compactados com CompressedLogFile."""
+    return CompressedLogFile(path) if is_archive(path) else open(path, 'rb')
+
+
+class _StoredMember:
+    """'Descompressor' de um membro ZIP sem compressão, com a mesma interface de zlib.decompressobj."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.eof = size == 0
+        self.unused_data = b""
+        self.unconsumed_tail = b""
+
+    def decompress(self, data, max_length=0):
+        take = min(len(data), self.remaining)
+        if max_length:
+            take = min(take, max_length)
+        self.remaining -= take
+        self.eof = self.remaining == 0
+        self.unused_data = data[take:] if self.eof else b""
+        self.unconsumed_tail = b"" if self.eof else data[take:]
+        return data[:take]
+
+    def copy(self):
+        return copy.copy(self)
+
+
+class _CheckpointIndex:
+    """
+    Checkpoints de um arquivo compactado, compartilhados por todos os handles abertos nele:
+    (offset descomprimido, offset compactado, cópia do descompressor naquele ponto).
+    """
+
+    def __init__(self, first_state):
+        self.lock = threading.Lock()
+        self.offsets = array('Q', [0])
+        self.states = [first_state]
+        self.furthest = 0 # Maior offset descomprimido já alcançado
+        self.size = None # Tamanho descomprimido, quando conhecido com certeza
+
+    def add(self, offset, compressed_offset, decompressor):
+        with self.lock:
+            if offset >= self.offsets[-1] + CHECKPOINT_INTERVAL:
+                self.offsets.append(offset)
+                self.states.append((compressed_offset, decompressor.copy()))
+
+    def before(self, offset):
+        with self.lock:
+            i = bisect_right(self.offsets, offset) - 1
+            return self.offsets[i], self.states[i]
+
+
+_shared_indexes = OrderedDict()
+_shared_indexes_lock = threading.Lock()
+
+
+def _shared_index(key, first_state):
+    with _shared_indexes_lock:
+        index = _shared_indexes.pop(key, None)
+        if index is None:
+            index = _CheckpointIndex(first_state)
+        _shared_indexes[key] = index
+        while len(_shared_indexes) > MAX_SHARED_INDEXES:
+            _shared_indexes.popitem(last=False)
+        return index
+
+
+class CompressedLogFile:
+    """
+    Arquivo binário somente leitura (read/seek/tell/readline/stat) sobre o conteúdo
+    descomprimido de um .gz (inclusive com vários membros) ou do maior membro de um .zip.
+
+    A descompressão é feita em fluxo, em trechos de até INFLATE_OUTPUT_BYTES. Ao avançar,
+    uma cópia do estado do descompressor (decompressobj.copy()) é guardada a cada
+    CHECKPOINT_INTERVAL bytes; depois da primeira passada, um seek recomeça do checkpoint
+    anterior em vez do início do arquivo. Os checkpoints ficam em memória, compartilhados
+    entre os handles do mesmo arquivo (visualizador, índice de linhas, buscas).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._raw = open(path, 'rb')
+        try:
+            stat = os.fstat(self._raw.fileno())
+            if path.lower().endswith('.zip'):
+                first_state, self._size_hint, exact = self._open_zip_member()
+            else:
+                first_state, self._size_hint, exact = self._open_gzip(stat.st_size)
+        except Exception:
+            self._raw.close()
+            raise
+        self._multi_member = not path.lower().endswith('.zip')
+        self._index = _shared_index((os.path.abspath(path), stat.st_size, stat.st_mtime), first_state)
+        if exact:
+            self._index.size = self._size_hint
+        self._position = 0
+        self._restore(0, first_state)
+
+    def _open_gzip(self, compressed_size):
+        if compressed_size >= 4:
+            # ISIZE: tamanho descomprimido do último membro (módulo 2^32); só uma estimativa,
+            # errada em .gz com vários membros ou acima de 4 GB. Um valor menor que o próprio
+            # arquivo compactado denuncia isso: a estimativa passa a ser o tamanho compactado
+            self._raw.seek(compressed_size - 4)
+            size_hint = max(struct.unpack("<I", self._raw.read(4))[0], compressed_size)
+        else:
+            size_hint = 0
+        return (0, zlib.decompressobj(wbits=31)), size_hint, False
+
+    def _open_zip_member(self):
+        with zipfile.ZipFile(self._raw) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+        if not members:
+            raise ValueError("arquivo ZIP sem arquivos")
+        info = max(members, key=lambda member: member.file_size)
+        if info.flag_bits & 0x1:
+            raise ValueError(f"'{info.filename}' está protegido por senha")
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(wbits=-15)
+        elif info.compress_type == zipfile.ZIP_STORED:
+            decompressor = _StoredMember(info.compress_size)
+        else:
+            raise ValueError(f"compressão não suportada em '{info.filename}' (método {info.compress_type})")
+        # Os dados começam depois do cabeçalho local (30 bytes + nome + campo extra)
+        self._raw.seek(info.header_offset)
+        header = self._raw.read(30)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        data_offset = info.header_offset + 30 + name_length + extra_length
+        return (data_offset, decompressor), info.file_size, True
+
+    def _restore(self, offset, state):
+        compressed_offset, decompressor = state
+        self._decompressor = decompressor.copy()
+        self._raw_offset = compressed_offset
+        self._input = b""
+        self._out_start = offset
+        self._out = b""
+
+    def _inflate(self):
+        """Descomprime o próximo trecho a partir do cursor; retorna False no fim do conteúdo."""
+        out_end = self._out_start + len(self._out)
+        if not self._input:
+            self._raw.seek(self._raw_offset)
+            self._input = self._raw.read(INFLATE_INPUT_BYTES)
+            self._raw_offset += len(self._input)
+        decompressor = self._decompressor
+        if decompressor.eof:
+            # Fim de um membro: um .gz pode ter outro em seguida
+            if not (self._multi_member and self._input.startswith(GZIP_MAGIC)):
+                self._index.size = out_end
+                return False
+            decompressor = self._decompressor = zlib.decompressobj(wbits=31)
+        elif not self._input:
+            self._index.size = out_end # Arquivo compactado truncado: termina onde os dados acabam
+            return False
+        out = decompressor.decompress(self._input, INFLATE_OUTPUT_BYTES)
+        self._input = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+        self._out_start, self._out = out_end, out
+        out_end += len(out)
+        if out_end > self._index.furthest:
+            self._index.furthest = out_end
+        self._index.add(out_end, self._raw_offset - len(self._input), decompressor)
+        return True
+
+    def _fill(self):
+        """Garante que o trecho descomprimido em memória contém a posição atual; False no fim."""
+        position = self._position
+        out_end = self._out_start + len(self._out)
+        if self._out_start <= position < out_end:
+            return True
+        checkpoint_offset, state = self._index.before(position)
+        if position < self._out_start or checkpoint_offset > out_end:
+            self._restore(checkpoint_offset, state)
+        while self._out_start + len(self._out) <= position:
+            if not self._inflate():
+                return False
+        return True
+
+    def stat(self):
+        """
+        Tamanho descomprimido (estimado até a primeira passada completa; `st_size_exact`
+        diz se já é o exato), tamanho compactado (`st_compressed_size`) e datas do arquivo.
+        """
+        raw = os.fstat(self._raw.fileno())
+        size = self._index.size
+        if size is None:
+            # Ainda sem o fim: a estimativa nunca fica abaixo do que já foi lido
+            size = max(self._size_hint, self._index.furthest + 1)
+        return SimpleNamespace(st_size=size, st_size_exact=self._index.size is not None,
+                               st_compressed_size=raw.st_size, st_mtime=raw.st_mtime, st_ctime=raw.st_ctime,
+                               st_dev=raw.st_dev, st_ino=raw.st_ino)
+
+    def assume_size(self, size):
+        """
+        Adota o tamanho descomprimido medido numa passada completa anterior (ex.: gravado
+        no cache de índices para este mesmo arquivo compactado), sem descomprimir de novo.
+        """
+        if self._index.size is None and size >= self._index.furthest:
+            self._index.size = size
+
+    def exact_size(self):
+        """Tamanho descomprimido exato; antes da primeira passada completa, descomprime até o fim."""
+        position = self._position
+        while self._index.size is None:
+            self._position = self._index.furthest
+            self._fill()
+        self._position = position
+        return self._index.size
+
+    def fileno(self):
+        return self._raw.fileno()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.stat().st_size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        parts = []
+        while size and self._fill():
+            offset = self._position - self._out_start
+            chunk = self._out[offset:] if size < 0 else self._out[offset:offset + size]
+            parts.append(chunk)
+            self._position += len(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(parts)
+
+    def readline(self):
+        parts = []
+        while self._fill():
+            offset = self._position - self._out_start
+            end = self._out.find(b"\n", offset)
+            chunk = self._out[offset:] if end < 0 else self._out[offset:end + 1]
+            parts.append(chunk)
+            self._position += len(chunk)
+            if end >= 0:
+                break
+        return b"".join(parts)
+
+    def close(self):
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,209 @@
+# log_directory.py
+"""
+Listagem dos arquivos de log de uma pasta (e das suas subpastas) em segundo plano, com
+cache por pasta e atualização incremental quando o conteúdo da pasta muda.
+"""
+
+from collections import OrderedDict
+import threading
+
+from PyQt5 import QtCore
+
+from log_search import scan_log_files
+
+# Entradas enviadas por vez para a UI durante a varredura
+SCAN_BATCH_SIZE = 500
+# Espera após um aviso do watcher antes de revarrer a pasta, em ms: os avisos que chegam
+# nesse meio-tempo (ex.: logs sendo escritos) são atendidos pela mesma varredura
+RESCAN_DELAY = 2000
+# Pastas cuja última listagem fica em memória (as usadas há mais tempo saem)
+MAX_CACHED_DIRECTORIES = 16
+# Subpastas acompanhadas pelo watcher (cada uma ocupa um handle/inotify watch)
+MAX_WATCHED_DIRECTORIES = 256
+
+# Pasta -> {caminho: (nome, caminho, data de modificação, tamanho)} da última varredura completa
+_listing_cache = OrderedDict()
+_listing_cache_lock = threading.Lock()
+
+
+def _cached_listing(directory):
+    with _listing_cache_lock:
+        entries = _listing_cache.get(directory)
+        if entries is not None:
+            _listing_cache.move_to_end(directory)
+        return dict(entries) if entries is not None else None
+
+
+def _store_listing(directory, entries):
+    with _listing_cache_lock:
+        _listing_cache[directory] = dict(entries)
+        _listing_cache.move_to_end(directory)
+        while len(_listing_cache) > MAX_CACHED_DIRECTORIES:
+            _listing_cache.popitem(last=False)
+
+
+class DirectoryScanJobSignals(QtCore.QObject):
+    batch = QtCore.pyqtSignal(int, object) # Geração, lista de (nome, caminho, data de modificação, tamanho)
+    finished = QtCore.pyqtSignal(int, str, object) # Geração, mensagem de erro ("" se ok), pastas listadas
+
+
+class DirectoryScanJob(QtCore.QRunnable):
+    """Varre a pasta e as subpastas com scan_log_files, emitindo as entradas em lotes de SCAN_BATCH_SIZE."""
+
+    def __init__(self, generation, directory, cancel_event):
+        super().__init__()
+        self.generation = generation
+        self.directory = directory
+        self.cancel_event = cancel_event
+        self.signals = DirectoryScanJobSignals()
+        self.setAutoDelete(True)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        batch = []
+        error = ""
+        directories = []
+        try:
+            for entry in scan_log_files(self.directory, self.cancel_event, recursive=True,
+                                        on_directory=directories.append):
+                batch.append(entry)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    self.signals.batch.emit(self.generation, batch)
+                    batch = []
+        except OSError as e:
+            error = str(e)
+        finally:
+            if batch:
+                self.signals.batch.emit(self.generation, batch)
+            self.signals.finished.emit(self.generation, error, directories)
+
+
+class DirectoryListing(QtCore.QObject):
+    """
+    Arquivos de log de uma pasta e das suas subpastas, mantidos atualizados para a UI.
+
+    `set_directory` entrega de imediato a última listagem da pasta em cache, se houver,
+    e revarre em segundo plano (DirectoryScanJob no QThreadPool global). As entradas
+    chegam em lotes; cada varredura é comparada com o que já foi entregue, então a UI só
+    recebe o que mudou: arquivos novos, alterados (data/tamanho) e removidos. Um
+    QFileSystemWatcher na pasta e nas subpastas (até MAX_WATCHED_DIRECTORIES) dispara uma
+    nova varredura quando alguma delas muda. O nome de cada entrada é o caminho relativo
+    à pasta (ex.: 2025-07-14/Batman.log).
+    """
+    files_added = QtCore.pyqtSignal(object) # Lista de (nome, caminho, data de modificação, tamanho)
+    files_changed = QtCore.pyqtSignal(object) # Idem, para arquivos já entregues cuja data/tamanho mudou
+    files_removed = QtCore.pyqtSignal(object) # Lista de caminhos
+    scan_finished = QtCore.pyqtSignal(str) # Mensagem de erro ("" se ok)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.directory = None
+        self._entries = {} # Caminho -> entrada já entregue à UI
+        self._seen = set() # Caminhos encontrados pela varredura em andamento
+        self._generation = 0
+        self._cancel_event = threading.Event()
+        self._scanning = False
+        self._rescan_pending = False # A pasta mudou durante a varredura em andamento
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._rescan_timer = QtCore.QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(RESCAN_DELAY)
+        self._rescan_timer.timeout.connect(self.refresh)
+
+    def is_scanning(self):
+        return self._scanning
+
+    def entries(self):
+        """Entradas já entregues, da mais recente para a mais antiga."""
+        return sorted(self._entries.values(), key=lambda entry: entry[2], reverse=True)
+
+    def set_directory(self, directory):
+        """Passa a listar `directory`: o que estiver em cache sai já, o resto em segundo plano."""
+        self.cancel()
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        if self._entries:
+            self.files_removed.emit(list(self._entries))
+        self.directory = directory
+        self._entries = _cached_listing(directory) or {}
+        if self._entries:
+            self.files_added.emit(self.entries())
+        self._watcher.addPath(directory)
+        self.refresh()
+
+    def refresh(self):
+        """Revarre a pasta atual; a UI recebe só as diferenças em relação ao já entregue."""
+        if self.directory is None:
+            return
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        self._seen = set()
+        self._scanning = True
+        job = DirectoryScanJob(self._generation, self.directory, self._cancel_event)
+        job.signals.batch.connect(self._on_batch)
+        job.signals.finished.connect(self._on_scan_finished)
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._rescan_timer.stop()
+        self._rescan_pending = False
+        if self._scanning:
+            self._scanning = False
+            self._generation += 1
+
+    def _on_directory_changed(self, path):
+        # O aviso não diz o que mudou: uma varredura calcula a diferença. Nem o timer nem
+        # a varredura em andamento são reiniciados a cada aviso, senão uma pasta com
+        # escrita contínua nunca terminaria de ser varrida
+        if self._scanning:
+            self._rescan_pending = True
+        elif not self._rescan_timer.isActive():
+            self._rescan_timer.start()
+
+    def _watch_directories(self, directories):
+        """Passa a acompanhar as pastas listadas (subpastas novas entram, removidas saem)."""
+        wanted = set(directories[:MAX_WATCHED_DIRECTORIES])
+        wanted.add(self.directory) # Também se recriada: o watcher a perde ao ser removida
+        watched = set(self._watcher.directories())
+        if watched - wanted:
+            self._watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self._watcher.addPaths(list(wanted - watched))
+
+    def _on_batch(self, generation, batch):
+        if generation != self._generation:
+            return
+        added, changed = [], []
+        for entry in batch:
+            path = entry[1]
+            self._seen.add(path)
+            known = self._entries.get(path)
+            if known is None:
+                added.append(entry)
+            elif known != entry:
+                changed.append(entry)
+            self._entries[path] = entry
+        if added:
+            self.files_added.emit(added)
+        if changed:
+            self.files_changed.emit(changed)
+
+    def _on_scan_finished(self, generation, error, directories):
+        if generation != self._generation:
+            return
+        self._scanning = False
+        if not error:
+            removed = [path for path in self._entries if path not in self._seen]
+            for path in removed:
+                del self._entries[path]
+            if removed:
+                self.files_removed.emit(removed)
+            _store_listing(self.directory, self._entries)
+            self._watch_directories(directories)
+        if self._rescan_pending:
+            self._rescan_pending = False
+            self._rescan_timer.start()
+        self.scan_finished.emit(error)
@@ -0,0 +1,66 @@
+# log_encoding.py
+"""
+Detecção da codificação dos arquivos de log e decodificação tolerante das linhas.
+"""
+
+import codecs
+
+from log_index import file_size_of
+
+# Bytes examinados no início (e no fim) do arquivo para escolher a codificação
+SNIFF_BYTES = 64 * 1024
+# Tratamento de erros usado em toda decodificação de linhas: bytes inválidos na codificação
+# do arquivo são lidos como cp1252 em vez de descartados (logs com trechos de origens mistas)
+DECODE_ERRORS = "log-cp1252-fallback"
+
+
+def _cp1252_fallback(error):
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    return error.object[error.start:error.end].decode('cp1252', errors='replace'), error.end
+
+
+codecs.register_error(DECODE_ERRORS, _cp1252_fallback)
+
+
+def _utf8_evidence(sample):
+    """
+    Caracteres não ASCII decodificados como UTF-8 válido na amostra (seja ela UTF-8
+    válido por inteiro ou não), ou None se ela for ASCII puro e não indicar nada.
+    Sequências multibyte válidas por acaso em texto cp1252 são raras.
+    """
+    if sample.isascii():
+        return None
+    text = sample.decode('utf-8', errors='replace')
+    return sum(1 for char in text if char > '\x7f' and char != '\ufffd')
+
+
+def sniff_encoding(file_obj, sample_tail=True):
+    """
+    Escolhe a codificação do arquivo (aberto em modo binário) por amostras do início e do fim:
+    'utf-8-sig' com BOM UTF-8, 'utf-8' se as amostras forem ASCII puro ou tiverem algum
+    caractere UTF-8 multibyte válido (mesmo misturado com bytes de outra codificação, lidos
+    pelo DECODE_ERRORS), e 'cp1252' se houver bytes não ASCII mas nenhum caractere UTF-8
+    multibyte válido (serviços Windows). As amostras são cortadas em quebras de linha,
+    para que um caractere partido na borda não conte como inválido. Sem `sample_tail` só
+    o início é examinado (ex.: arquivos compactados, em que chegar ao fim exige
+    descomprimir tudo).
+    """
+    file_obj.seek(0)
+    head = file_obj.read(SNIFF_BYTES)
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    samples = [head[:head.rfind(b"\n") + 1] if len(head) == SNIFF_BYTES else head]
+    file_size = file_size_of(file_obj)
+    if sample_tail and file_size > SNIFF_BYTES:
+        file_obj.seek(max(SNIFF_BYTES, file_size - SNIFF_BYTES))
+        tail = file_obj.read(SNIFF_BYTES)
+        samples.append(tail[tail.find(b"\n") + 1:])
+    evidence = [_utf8_evidence(sample) for sample in samples]
+    if all(count is None for count in evidence) or any(count for count in evidence):
+        return 'utf-8'
+    return 'cp1252'
+
+
+def decode_line(raw_line, encoding):
+    return raw_line.decode(encoding, DECODE_ERRORS)
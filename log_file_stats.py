@@ -0,0 +1,260 @@
+# log_file_stats.py
+"""
+Contagem de linhas e de linhas de erro dos arquivos de log, calculada em segundo plano
+com baixa prioridade e guardada em cache (em memória e em app_logs/file_stats.json).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+from PyQt5 import QtCore
+
+from log_archive import is_archive, open_log_file
+from log_highlighter import DEFAULT_LEVEL_PATTERNS
+from log_index_cache import FINGERPRINT_BYTES, fingerprint
+
+# Mesmo logger do visualizador (handlers configurados em log_viewer.py)
+app_logger = logging.getLogger("log_viewer")
+
+FILE_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_logs", "file_stats.json")
+# Versão do formato: caches de outra versão são ignorados (e sobrescritos)
+STATS_FORMAT_VERSION = 2
+# Bytes lidos por vez na contagem
+STATS_READ_SIZE = 4 * 1024 * 1024
+# Arquivos cujas contagens ficam no cache (os contados há mais tempo saem)
+MAX_CACHED_STATS = 20000
+# Espera após uma contagem nova antes de regravar o cache em disco, em ms
+SAVE_DELAY = 5000
+
+# Linha de erro: a mesma regra de nível "error" do realce padrão (sem diferenciar maiúsculas)
+ERROR_PATTERN = re.compile(dict(DEFAULT_LEVEL_PATTERNS)["error"].encode('ascii'), re.IGNORECASE)
+
+
+def count_lines_and_errors(file_obj, start=0, cancel_event=None, read_size=STATS_READ_SIZE):
+    """
+    Conta as linhas completas (terminadas em '\\n') a partir de `start` e quantas delas
+    têm um nível de erro (ERROR_PATTERN). Devolve (linhas, erros, fim do trecho contado,
+    há uma linha sem '\\n' depois dele) ou None se cancelada. O fim contado permite
+    continuar a contagem de onde parou quando o arquivo cresce.
+    """
+    file_obj.seek(start)
+    lines = errors = 0
+    counted_end = start
+    carry = b""
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        block = file_obj.read(read_size)
+        if not block:
+            break
+        data = carry + block if carry else block
+        cut = data.rfind(b"\n") + 1
+        if not cut:
+            carry = data
+            continue
+        complete, carry = data[:cut], data[cut:]
+        lines += complete.count(b"\n")
+        # Ocorrências costumam ser raras: basta localizar a linha de cada uma
+        last_line_start = None
+        for match in ERROR_PATTERN.finditer(complete):
+            line_start = complete.rfind(b"\n", 0, match.start())
+            if line_start != last_line_start:
+                errors += 1
+                last_line_start = line_start
+        counted_end += len(complete)
+    return lines, errors, counted_end, bool(carry)
+
+
+def counted_fingerprints(file_obj, counted_end):
+    """
+    Hashes do início do arquivo e do trecho que antecede `counted_end` (como no
+    IndexCache): se ainda batem, o arquivo é o mesmo já contado e só cresceu.
+    """
+    head_end = min(FINGERPRINT_BYTES, counted_end)
+    return (fingerprint(file_obj, 0, head_end),
+            fingerprint(file_obj, max(head_end, counted_end - FINGERPRINT_BYTES), counted_end))
+
+
+class FileStatsJobSignals(QtCore.QObject):
+    # Geração, caminho, tamanho e data de modificação contados, (linhas, erros, fim contado,
+    # linha parcial, hashes do trecho contado) ou None, mensagem de erro ("" se ok)
+    finished = QtCore.pyqtSignal(int, str, object, object, object, str)
+
+
+class FileStatsJob(QtCore.QRunnable):
+    """
+    Conta um arquivo numa thread de prioridade mínima. Com `base` (contagem anterior do
+    arquivo), continua do fim já contado em vez de reler tudo, desde que os hashes do
+    trecho contado confirmem que é o mesmo arquivo; senão (ex.: um Batman.log novo após
+    a rotação, já maior que o antigo) recomeça do zero.
+    """
+
+    def __init__(self, generation, path, size, mtime, cancel_event, base=None):
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.cancel_event = cancel_event
+        self.base = base
+        self.signals = FileStatsJobSignals()
+        self.setAutoDelete(True)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        QtCore.QThread.currentThread().setPriority(QtCore.QThread.LowestPriority)
+        result = None
+        error = ""
+        try:
+            with open_log_file(self.path) as file_obj:
+                base = self.base
+                if base and counted_fingerprints(file_obj, base[2]) != tuple(base[3]):
+                    base = None # Outro arquivo no mesmo caminho
+                result = count_lines_and_errors(file_obj, base[2] if base else 0, self.cancel_event)
+                if result is not None:
+                    lines, errors, counted_end, partial = result
+                    if base:
+                        lines, errors = base[0] + lines, base[1] + errors
+                    hashes = None if is_archive(self.path) else counted_fingerprints(file_obj, counted_end)
+                    result = (lines, errors, counted_end, partial, hashes)
+        except Exception as e:
+            error = str(e)
+        finally:
+            self.signals.finished.emit(self.generation, self.path, self.size, self.mtime, result, error)
+
+
+class FileStatsService(QtCore.QObject):
+    """
+    Contagens de linhas e erros por arquivo, compartilhadas por todos os visualizadores.
+
+    `stats` responde na hora com o que estiver no cache e, se a entrada não corresponder
+    ao tamanho e à data de modificação atuais, agenda a contagem num QThreadPool próprio
+    de uma única thread, em prioridade mínima; `stats_ready` avisa quando ela termina.
+    Cada (tamanho, data) é contado uma única vez: um arquivo que só cresceu continua a
+    contagem do fim já contado, e o cache é gravado em disco para as próximas sessões.
+    """
+    stats_ready = QtCore.pyqtSignal(str) # Caminho com contagem nova
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Serviço compartilhado; criado na thread da UI no primeiro uso."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, cache_path=FILE_STATS_PATH, parent=None):
+        super().__init__(parent)
+        self.cache_path = cache_path
+        # Caminho normalizado -> [tamanho, data, fim contado, linhas, erros, linha parcial,
+        # hashes do início e do fim do trecho contado (None nos compactados)]
+        self._entries = None
+        self._pending = {} # Caminho normalizado -> (tamanho, data) em contagem
+        self._failed = {} # Caminho normalizado -> (tamanho, data) cuja contagem falhou (não é repetida)
+        self._generation = 0
+        self._cancel_event = threading.Event()
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._save_timer = QtCore.QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save)
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._shutdown)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def stats(self, path, size, mtime):
+        """
+        (linhas, erros) do arquivo conforme o cache, ou None se ele nunca foi contado. Se
+        o cache estiver desatualizado em relação a `size`/`mtime`, a contagem é agendada
+        e o valor antigo continua valendo até `stats_ready`.
+        """
+        self._load()
+        key = self._key(path)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            self._schedule(key, path, size, mtime, entry)
+        if entry is None:
+            return None
+        return entry[3] + (1 if entry[5] else 0), entry[4]
+
+    def cancel(self):
+        """Descarta as contagens agendadas (a em andamento para no próximo bloco lido)."""
+        self._cancel_event.set()
+        self._cancel_event = threading.Event()
+        self._generation += 1
+        self._pending = {}
+        self._pool.clear()
+
+    def _schedule(self, key, path, size, mtime, entry):
+        if key in self._pending or self._failed.get(key) == (size, mtime):
+            return
+        # Só um arquivo comum que cresceu pode aproveitar a contagem anterior; o job confere
+        # os hashes do trecho contado antes de continuar dele (rotação, truncamento)
+        base = None
+        if entry is not None and entry[6] and size >= entry[2] and size >= entry[0]:
+            base = (entry[3], entry[4], entry[2], entry[6])
+        self._pending[key] = (size, mtime)
+        job = FileStatsJob(self._generation, path, size, mtime, self._cancel_event, base)
+        job.signals.finished.connect(self._on_job_finished)
+        self._pool.start(job)
+
+    def _on_job_finished(self, generation, path, size, mtime, result, error):
+        if generation != self._generation:
+            return
+        key = self._key(path)
+        self._pending.pop(key, None)
+        if error:
+            self._failed[key] = (size, mtime)
+            app_logger.warning(f"Erro ao contar linhas de '{path}': {error}")
+            return
+        if result is None:
+            return
+        lines, errors, counted_end, partial, hashes = result
+        self._entries.pop(key, None)
+        self._entries[key] = [size, mtime, counted_end, lines, errors, partial, hashes]
+        while len(self._entries) > MAX_CACHED_STATS:
+            del self._entries[next(iter(self._entries))]
+        if not self._save_timer.isActive():
+            self._save_timer.start()
+        self.stats_ready.emit(path)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == STATS_FORMAT_VERSION:
+                self._entries = data["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass # Sem cache (ou cache inválido): as contagens são refeitas
+
+    def save(self):
+        """Grava o cache em disco (substituição atômica; falhas só custam recontagens)."""
+        self._save_timer.stop()
+        if not self._entries:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": STATS_FORMAT_VERSION, "files": self._entries}, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            app_logger.warning(f"Erro ao gravar o cache de contagens em '{self.cache_path}': {e}")
+
+    def _shutdown(self):
+        self.cancel()
+        self._pool.waitForDone()
+        self.save()
@@ -0,0 +1,351 @@
+# log_file_tree.py
+"""
+Modelo em árvore (pastas e arquivos) do painel de arquivos de log, com colunas de
+tamanho, data de modificação e contagens de linhas/erros calculadas sob demanda.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import os
+
+from PyQt5 import QtCore, QtWidgets
+
+COLUMN_NAME, COLUMN_SIZE, COLUMN_MTIME, COLUMN_LINES, COLUMN_ERRORS = range(5)
+COLUMN_TITLES = ("Arquivo", "Tamanho", "Modificado", "Linhas", "Erros")
+# Caminho completo do arquivo (None nas pastas)
+LOG_FILE_PATH_ROLE = QtCore.Qt.UserRole
+# Lotes maiores que isso entram no fim da pasta e ela é reordenada de uma vez
+MAX_BISECT_INSERTS = 16
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _descending_text_key(text):
+    """Chave que ordena textos em ordem decrescente (um prefixo vem depois do texto maior)."""
+    return tuple(-ord(char) for char in text) + (1,)
+
+
+class _TreeNode:
+    """Pasta (entry None, com filhos) ou arquivo (entry = (nome, caminho, data, tamanho))."""
+    __slots__ = ("name", "parent", "entry", "children", "keys", "folders", "size", "mtime", "sort_key")
+
+    def __init__(self, name, parent=None, entry=None):
+        self.name = name
+        self.parent = parent
+        self.entry = entry
+        self.children = [] # Na ordem exibida
+        self.keys = [] # sort_key de cada filho (ordem crescente, para bisect)
+        self.folders = {} # Nome -> subpasta
+        # Nas pastas, soma dos tamanhos e data mais recente dos arquivos dentro delas
+        self.size = entry[3] if entry else 0
+        self.mtime = entry[2] if entry else 0.0
+        self.sort_key = None
+
+
+class LogFileTreeModel(QtCore.QAbstractItemModel):
+    """
+    Arquivos entregues pelo DirectoryListing, agrupados pelas subpastas do nome relativo.
+
+    O próprio modelo mantém cada pasta ordenada pela coluna escolhida (`sort`): os filhos
+    ficam junto de uma lista de chaves crescentes, e arquivos novos ou alterados entram
+    na posição certa por busca binária, sem reordenar a pasta (só lotes grandes a
+    reordenam de uma vez). Um QSortFilterProxyModel na frente só filtra. As contagens
+    de linhas e erros vêm do FileStatsService e só são pedidas quando a view consulta a
+    célula (ou ao ordenar por elas): numa lista grande, apenas as linhas visíveis são contadas.
+    """
+
+    def __init__(self, stats_service, parent=None):
+        super().__init__(parent)
+        self._root = _TreeNode("")
+        self._files = {} # Caminho -> nó do arquivo
+        self._sort_column = COLUMN_MTIME
+        self._sort_descending = True
+        self._stats = stats_service
+        self._stats.stats_ready.connect(self._on_stats_ready)
+        style = QtWidgets.QApplication.style()
+        self._folder_icon = style.standardIcon(QtWidgets.QStyle.SP_DirIcon)
+        self._file_icon = style.standardIcon(QtWidgets.QStyle.SP_FileIcon)
+
+    # --- Atualização a partir do DirectoryListing ---
+    def clear(self):
+        self.beginResetModel()
+        self._root = _TreeNode("")
+        self._files = {}
+        self.endResetModel()
+
+    def file_count(self):
+        return len(self._files)
+
+    def paths(self):
+        return list(self._files)
+
+    def add_entries(self, entries):
+        new_nodes = {} # Pasta -> arquivos novos
+        changed = []
+        for entry in entries:
+            if entry[1] in self._files:
+                changed.append(entry)
+                continue
+            *folder_names, file_name = entry[0].split(os.sep)
+            folder = self._folder_for(folder_names)
+            node = _TreeNode(file_name, folder, entry)
+            self._files[entry[1]] = node
+            new_nodes.setdefault(folder, []).append(node)
+        touched = set()
+        for folder, nodes in new_nodes.items():
+            if len(nodes) <= MAX_BISECT_INSERTS:
+                for node in nodes:
+                    self._insert_node(folder, node)
+            else:
+                first = len(folder.children)
+                self.beginInsertRows(self._index_of(folder), first, first + len(nodes) - 1)
+                folder.children.extend(nodes)
+                self.endInsertRows()
+                self._resort([folder])
+            for node in nodes:
+                self._add_to_folders(folder, node.size, node.mtime, touched)
+        self._folders_changed(touched)
+        if changed:
+            self.update_entries(changed)
+
+    def update_entries(self, entries):
+        touched = set()
+        for entry in entries:
+            node = self._files.get(entry[1])
+            if node is None:
+                continue
+            old_size, old_mtime = node.size, node.mtime
+            node.entry, node.size, node.mtime = entry, entry[3], entry[2]
+            self._add_to_folders(node.parent, node.size - old_size, node.mtime, touched)
+            if node.mtime < old_mtime:
+                self._recompute_folders(node.parent, touched)
+            row = self._reposition(node)
+            self.dataChanged.emit(self.createIndex(row, COLUMN_SIZE, node),
+                                  self.createIndex(row, COLUMN_ERRORS, node))
+        self._folders_changed(touched)
+
+    def remove_paths(self, paths):
+        touched = set()
+        for path in paths:
+            node = self._files.pop(path, None)
+            if node is None:
+                continue
+            folder = node.parent
+            self._remove_node(node)
+            # Pastas que ficaram vazias saem junto
+            while folder is not self._root and not folder.children:
+                parent = folder.parent
+                del parent.folders[folder.name]
+                self._remove_node(folder)
+                touched.discard(folder)
+                folder = parent
+            self._recompute_folders(folder, touched)
+        self._folders_changed(touched)
+
+    def index_for_path(self, path):
+        node = self._files.get(path)
+        return self._index_of(node) if node is not None else QtCore.QModelIndex()
+
+    # --- Ordenação ---
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_descending = order == QtCore.Qt.DescendingOrder
+        folders = []
+        pending = [self._root]
+        while pending:
+            folder = pending.pop()
+            folders.append(folder)
+            pending.extend(folder.folders.values())
+        self._resort(folders)
+
+    def _sort_key(self, node):
+        column = self._sort_column
+        if column == COLUMN_NAME:
+            name = node.name.lower()
+            return _descending_text_key(name) if self._sort_descending else (name,)
+        if column == COLUMN_SIZE:
+            value = node.size
+        elif column == COLUMN_MTIME:
+            value = node.mtime
+        else:
+            stats = self._file_stats(node) if node.entry is not None else None
+            value = stats[column - COLUMN_LINES] if stats is not None else -1
+        # Empates: pelo nome, sempre em ordem crescente
+        return (-value if self._sort_descending else value, node.name.lower())
+
+    def _resort(self, folders):
+        """Reordena as pastas inteiras (layoutChanged), preservando os índices persistentes."""
+        self.layoutAboutToBeChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+        persistent = [(index, index.internalPointer()) for index in self.persistentIndexList()]
+        for folder in folders:
+            for child in folder.children:
+                child.sort_key = self._sort_key(child)
+            folder.children.sort(key=lambda child: child.sort_key)
+            folder.keys = [child.sort_key for child in folder.children]
+        self.changePersistentIndexList([index for index, _ in persistent],
+                                       [self._index_of(node, index.column()) for index, node in persistent])
+        self.layoutChanged.emit([], QtCore.QAbstractItemModel.VerticalSortHint)
+
+    def _insert_node(self, folder, node):
+        node.sort_key = self._sort_key(node)
+        row = bisect_right(folder.keys, node.sort_key)
+        self.beginInsertRows(self._index_of(folder), row, row)
+        folder.children.insert(row, node)
+        folder.keys.insert(row, node.sort_key)
+        self.endInsertRows()
+
+    def _reposition(self, node):
+        """Leva o nó para a posição da sua chave atual (beginMoveRows); devolve a linha final."""
+        folder = node.parent
+        old_row = self._row_of(node)
+        sort_key = self._sort_key(node)
+        if sort_key == node.sort_key:
+            return old_row
+        new_row = bisect_right(folder.keys, sort_key)
+        if new_row > old_row:
+            new_row -= 1 # Posição na lista já sem o nó
+        if new_row == old_row:
+            node.sort_key = folder.keys[old_row] = sort_key
+            return old_row
+        parent_index = self._index_of(folder)
+        self.beginMoveRows(parent_index, old_row, old_row, parent_index, new_row + 1 if new_row > old_row else new_row)
+        del folder.children[old_row]
+        del folder.keys[old_row]
+        node.sort_key = sort_key
+        folder.children.insert(new_row, node)
+        folder.keys.insert(new_row, sort_key)
+        self.endMoveRows()
+        return new_row
+
+    def _row_of(self, node):
+        folder = node.parent
+        row = bisect_left(folder.keys, node.sort_key)
+        while folder.children[row] is not node: # Chaves iguais
+            row += 1
+        return row
+
+    def _folder_for(self, names):
+        folder = self._root
+        for name in names:
+            child = folder.folders.get(name)
+            if child is None:
+                child = _TreeNode(name, folder)
+                folder.folders[name] = child
+                self._insert_node(folder, child)
+            folder = child
+        return folder
+
+    def _remove_node(self, node):
+        parent = node.parent
+        row = self._row_of(node)
+        self.beginRemoveRows(self._index_of(parent), row, row)
+        del parent.children[row]
+        del parent.keys[row]
+        self.endRemoveRows()
+
+    def _add_to_folders(self, folder, size_delta, mtime, touched):
+        while folder is not self._root:
+            folder.size += size_delta
+            folder.mtime = max(folder.mtime, mtime)
+            touched.add(folder)
+            folder = folder.parent
+
+    def _recompute_folders(self, folder, touched):
+        while folder is not self._root:
+            folder.size = sum(child.size for child in folder.children)
+            folder.mtime = max((child.mtime for child in folder.children), default=0.0)
+            touched.add(folder)
+            folder = folder.parent
+
+    def _folders_changed(self, folders):
+        # Das mais profundas para as de cima: a posição de uma pasta depende dos totais de dentro
+        for folder in sorted(folders, key=self._depth, reverse=True):
+            if folder.parent.folders.get(folder.name) is not folder:
+                continue # Removida junto com os seus arquivos
+            row = self._reposition(folder)
+            self.dataChanged.emit(self.createIndex(row, COLUMN_SIZE, folder),
+                                  self.createIndex(row, COLUMN_MTIME, folder))
+
+    @staticmethod
+    def _depth(node):
+        depth = 0
+        while node.parent is not None:
+            node = node.parent
+            depth += 1
+        return depth
+
+    def _on_stats_ready(self, path):
+        node = self._files.get(path)
+        if node is None:
+            return
+        row = self._reposition(node) if self._sort_column in (COLUMN_LINES, COLUMN_ERRORS) else self._row_of(node)
+        self.dataChanged.emit(self.createIndex(row, COLUMN_LINES, node),
+                              self.createIndex(row, COLUMN_ERRORS, node))
+
+    # --- Interface do QAbstractItemModel ---
+    def _index_of(self, node, column=0):
+        if node is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(self._row_of(node), column, node)
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        children = parent.internalPointer().children if parent.isValid() else self._root.children
+        if 0 <= row < len(children) and 0 <= column < len(COLUMN_TITLES):
+            return self.createIndex(row, column, children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self._index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self._root.children)
+        return len(parent.internalPointer().children) if parent.column() == 0 else 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(COLUMN_TITLES)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return COLUMN_TITLES[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == COLUMN_NAME:
+                return node.name
+            if column == COLUMN_SIZE:
+                return format_size(node.size)
+            if column == COLUMN_MTIME:
+                return f"{datetime.fromtimestamp(node.mtime):%Y-%m-%d %H:%M:%S}" if node.mtime else ""
+            if node.entry is None:
+                return ""
+            stats = self._file_stats(node)
+            if stats is None:
+                return "…"
+            return f"{stats[column - COLUMN_LINES]:,}".replace(",", ".")
+        if role == LOG_FILE_PATH_ROLE:
+            return node.entry[1] if node.entry is not None else None
+        if role == QtCore.Qt.ToolTipRole:
+            return node.entry[1] if node.entry is not None else node.name
+        if role == QtCore.Qt.DecorationRole and column == COLUMN_NAME:
+            return self._file_icon if node.entry is not None else self._folder_icon
+        if role == QtCore.Qt.TextAlignmentRole and column != COLUMN_NAME:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def _file_stats(self, node):
+        _, path, mtime, size = node.entry
+        return self._stats.stats(path, size, mtime)
@@ -0,0 +1,111 @@
+# log_filter.py
+"""
+Filtragem das linhas do LineStore em segundo plano (QThreadPool), cancelável e incremental.
+"""
+
+from array import array
+import threading
+import time
+
+from PyQt5 import QtCore
+
+from log_encoding import DECODE_ERRORS
+from log_query import compile_query
+
+# Linhas verificadas entre checagens de cancelamento
+FILTER_BATCH_SIZE = 4096
+# Intervalo mínimo entre envios de resultados parciais (segundos)
+PARTIAL_RESULTS_INTERVAL = 0.05
+
+
+def make_filter_query(text, mode):
+    """
+    Compila o filtro (texto, modo) em uma CompiledQuery, ou None se o filtro estiver vazio.
+    No modo "exclude" a consulta é negada. Levanta QuerySyntaxError se o texto for inválido.
+    """
+    query = compile_query(text)
+    if query is not None and mode == "exclude":
+        query = query.negated()
+    return query
+
+
+class FilterJobSignals(QtCore.QObject):
+    partial_results = QtCore.pyqtSignal(int, object, object) # Geração, seqs visíveis do lote, seq até onde já varreu
+    finished = QtCore.pyqtSignal(int, object, bool) # Geração, array de seqs visíveis, cancelado
+
+
+class FilterJob(QtCore.QRunnable):
+    """
+    Aplica um predicado às linhas do LineStore em [start_seq, end_seq).
+
+    Se `candidate_seqs` for informado (refinamento de um filtro anterior), só esses seqs
+    são verificados, além das linhas em [candidates_end, end_seq). Com `candidate_ranges`
+    (faixas [início, fim) de seqs vindas do índice de trigramas), só essas faixas são
+    percorridas. Os resultados
+    parciais são emitidos em lotes para que a UI vá se preenchendo durante a varredura,
+    junto com o seq até onde a varredura já chegou.
+    """
+
+    def __init__(self, generation, line_store, predicate, end_seq, candidate_seqs=None, candidates_end=None,
+                 candidate_ranges=None):
+        super().__init__()
+        self.generation = generation
+        self.line_store = line_store
+        self.predicate = predicate
+        self.end_seq = end_seq
+        self.candidate_seqs = candidate_seqs
+        self.candidates_end = candidates_end
+        self.candidate_ranges = candidate_ranges
+        self.signals = FilterJobSignals()
+        self._cancel_event = threading.Event()
+        self.setAutoDelete(True)
+
+    def cancel(self):
+        """Pode ser chamado de qualquer thread."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _iter_candidates(self):
+        store = self.line_store
+        if self.candidate_ranges is not None:
+            for start_seq, end_seq in self.candidate_ranges:
+                yield from store.iter_lines(max(start_seq, store.first_seq), min(end_seq, self.end_seq))
+            return
+        if self.candidate_seqs is None:
+            yield from store.iter_lines(store.first_seq, self.end_seq)
+            return
+        encoding = store.encoding
+        for seq in self.candidate_seqs:
+            raw = store.get_raw(seq)
+            if raw is not None:
+                yield seq, raw.decode(encoding, DECODE_ERRORS)
+        yield from store.iter_lines(max(self.candidates_end, store.first_seq), self.end_seq)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        visible_seqs = array('Q')
+        pending_seqs = array('Q')
+        predicate = self.predicate
+        last_emit = time.monotonic()
+        checked = 0
+        try:
+            for seq, line in self._iter_candidates():
+                if predicate is None or predicate(line):
+                    visible_seqs.append(seq)
+                    pending_seqs.append(seq)
+                checked += 1
+                if checked % FILTER_BATCH_SIZE == 0:
+                    if self.is_cancelled():
+                        break
+                    # Emite mesmo sem linhas novas: o avanço da varredura já permite à UI
+                    # retirar as linhas do filtro anterior que não passam no atual
+                    if time.monotonic() - last_emit >= PARTIAL_RESULTS_INTERVAL:
+                        self.signals.partial_results.emit(self.generation, pending_seqs, seq + 1)
+                        pending_seqs = array('Q')
+                        last_emit = time.monotonic()
+            if not self.is_cancelled():
+                self.signals.partial_results.emit(self.generation, pending_seqs, self.end_seq)
+        finally:
+            self.signals.finished.emit(self.generation, visible_seqs, self.is_cancelled())
@@ -1,11 +1,190 @@
 # log_highlighter.py
+import re
+
 from PyQt5 import QtGui, QtCore
 
-class LogHighlighter(QtGui.QSyntaxHighlighter):
-    def __init__(self, parent_document):
-        super().__init__(parent_document)
-        self._highlighting_rules = []
-        self._search_highlight_rules = []
+# Regras padrão de nível: (nível, padrão), sem diferenciar maiúsculas
+DEFAULT_LEVEL_PATTERNS = [
+    ("error", r"\b(ERROR|ERRO|EXCEPTION|FALHA|CRITICAL)\b"),
+    ("warning", r"\b(WARNING|WARN|AVISO)\b"),
+    ("info", r"\b(INFO)\b"),
+    ("debug", r"\b(DEBUG|TRACE)\b"),
+]
+
+# Padrão formado só por palavras literais alternadas, com \b e um grupo opcionais
+_LITERAL_WORDS_RE = re.compile(r"(?:\\b)?(?:\((?:\?:)?)?([\w\- |]+?)\)?(?:\\b)?")
+# Palavras inteiras (só \w) entre \b dos dois lados, ex.: '\b(ERROR|ERRO)\b' ou '\bnfe\b'
+_BOUNDED_WORDS_RE = re.compile(r"\\b(?:\((?:\?:)?\w+(?:\|\w+)*\)|\w+)\\b")
+
+
+def _literal_words(pattern):
+    """
+    (palavras, entre \\b) se o padrão for só palavras literais alternadas (ex.: 'ERRO',
+    '\\b(ERROR|ERRO)\\b', 'nfe|cte'); senão, None.
+    """
+    match = _LITERAL_WORDS_RE.fullmatch(pattern)
+    if not match:
+        return None
+    words = match.group(1).split("|")
+    if not all(words):
+        return None
+    return words, bool(_BOUNDED_WORDS_RE.fullmatch(pattern))
+
+
+def _words_can_overlap(word, other):
+    """True se um match de `word` pode cobrir parte de um de `other` (um dentro do outro ou encaixados)."""
+    if word == other:
+        return False # Mesmo trecho: a ordem da alternância já dá a prioridade certa
+    if word in other or other in word:
+        return True
+    shortest = min(len(word), len(other))
+    return any(word.endswith(other[:size]) or other.endswith(word[:size]) for size in range(1, shortest))
+
+
+def _rules_cannot_overlap(patterns):
+    """
+    True se nenhum match de uma regra pode cobrir só parte de um match de outra. Vale
+    para regras de palavras literais (sem diferenciar maiúsculas, por segurança) em que
+    nenhuma palavra fica dentro de uma palavra de outra regra nem termina com o começo
+    dela (ex.: 'ERRO', 'AVISO', 'INFO'). Palavras inteiras entre \\b nunca se sobrepõem
+    parcialmente entre si, então esses pares nem são comparados.
+    """
+    parsed = [_literal_words(pattern) for pattern in patterns]
+    if not all(parsed):
+        return False
+    for index, (words, bounded) in enumerate(parsed):
+        for other_words, other_bounded in parsed[index + 1:]:
+            if bounded and other_bounded:
+                continue
+            if any(_words_can_overlap(word.casefold(), other.casefold()) for word in words for other in other_words):
+                return False
+    return True
+
+
+def _first_chars_of_literal_rules(patterns):
+    """
+    Se todos os padrões forem palavras literais (ex.: '\\b(ERROR|ERRO)\\b', 'nfe'),
+    retorna o conjunto de caracteres com que um match pode começar; senão, None.
+    """
+    first_chars = set()
+    for pattern in patterns:
+        parsed = _literal_words(pattern)
+        if not parsed:
+            return None
+        first_chars.update(word[0] for word in parsed[0])
+    return first_chars
+
+
+class HighlightMatcher:
+    """
+    Aplica as regras de realce a uma linha, com as expressões compiladas uma vez.
+
+    A prioridade segue a ordem das regras: uma regra posterior prevalece sobre as
+    anteriores caractere a caractere, inclusive quando o seu match fica dentro do de
+    outra regra (ex.: '\\d+' dentro de 'NFe \\d+'). Por isso, em geral, cada regra é
+    procurada na linha separadamente e os spans saem na ordem das regras (quem aplica
+    sobrepõe os posteriores). Quando as regras são só palavras literais que não podem
+    se sobrepor (as regras de nível padrão, as de highlight_rules.json), elas viram uma
+    única expressão (alternância de grupos nomeados, a regra posterior primeiro),
+    percorrida em uma só passada. O realce de busca é aplicado por cima de tudo (últimos spans retornados).
+    """
+
+    def __init__(self):
+        self._payloads = {}
+        self._combined = None
+        self._separate = [] # (expressão, payload) de cada regra, quando podem se sobrepor
+        self._search = None
+        self._search_payload = None
+
+    @property
+    def single_pass(self):
+        """True se as regras atuais são aplicadas com uma única expressão combinada."""
+        return not self._separate
+
+    def set_rules(self, rules):
+        """`rules`: lista de (padrão, diferencia_maiúsculas, payload), na ordem de aplicação."""
+        alternatives = []
+        self._payloads = {}
+        self._combined = None
+        self._separate = []
+        if not _rules_cannot_overlap([pattern for pattern, _, _ in rules]):
+            for pattern, case_sensitive, payload in rules:
+                try:
+                    self._separate.append((re.compile(pattern, 0 if case_sensitive else re.IGNORECASE), payload))
+                except re.error as e:
+                    print(f"Erro ao compilar regra de realce: {e} - Padrão: {pattern}")
+            return
+        # O modo mais comum vira flag global; só as exceções usam grupo com flag local
+        # (grupos (?i:...) em todas as alternativas deixam a varredura bem mais lenta)
+        ignore_case = sum(1 for _, case_sensitive, _ in rules if not case_sensitive) * 2 >= len(rules)
+        for index, (pattern, case_sensitive, payload) in reversed(list(enumerate(rules))):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                print(f"Erro ao compilar regra de realce: {e} - Padrão: {pattern}")
+                continue
+            name = f"r{index}"
+            if case_sensitive == (not ignore_case):
+                alternatives.append(f"(?P<{name}>{pattern})")
+            else:
+                alternatives.append(f"(?P<{name}>({'?-i' if case_sensitive else '?i'}:{pattern}))")
+            self._payloads[name] = payload
+        flags = re.IGNORECASE if ignore_case else 0
+        combined = "|".join(alternatives)
+        first_chars = _first_chars_of_literal_rules([pattern for pattern, _, _ in rules])
+        if first_chars:
+            # Regras só com palavras literais: o lookahead do primeiro caractere permite ao
+            # re pular rapidamente as posições em que nenhuma palavra pode começar
+            chars = set(first_chars)
+            chars |= {c.lower() for c in first_chars} | {c.upper() for c in first_chars}
+            combined = f"(?=[{re.escape(''.join(sorted(chars)))}])(?:{combined})"
+        self._combined = re.compile(combined, flags) if alternatives else None
+
+    def set_search(self, text, case_sensitive=False, payload=None):
+        """Termo de busca literal (None/"" remove o realce de busca)."""
+        if text:
+            self._search = re.compile(re.escape(text), 0 if case_sensitive else re.IGNORECASE)
+            self._search_payload = payload
+        else:
+            self._search = None
+            self._search_payload = None
+
+    def spans(self, text):
+        """Lista de (início, comprimento, payload) na ordem em que devem ser aplicados."""
+        result = []
+        if self._combined is not None:
+            payloads = self._payloads
+            for match in self._combined.finditer(text):
+                start, end = match.span()
+                if end > start:
+                    result.append((start, end - start, payloads[match.lastgroup]))
+        for expression, payload in self._separate:
+            for match in expression.finditer(text):
+                start, end = match.span()
+                if end > start:
+                    result.append((start, end - start, payload))
+        if self._search is not None:
+            payload = self._search_payload
+            for match in self._search.finditer(text):
+                start, end = match.span()
+                result.append((start, end - start, payload))
+        return result
+
+
+class LogHighlighter(QtCore.QObject):
+    """
+    Regras de realce do visualizador (níveis, regras personalizadas e termo de busca).
+
+    Não depende de um documento: o delegate da lista pede os spans de cada linha no
+    momento de pintar, então só as linhas visíveis são processadas. `rules_changed`
+    avisa a view para repintar.
+    """
+    rules_changed = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._matcher = HighlightMatcher()
+        self._search_state = None # (padrão, diferencia maiúsculas) do realce de busca atual
 
         # Formatos padrão (Nord Theme)
         self._default_error_format = QtGui.QTextCharFormat()
@@ -29,24 +208,26 @@ class LogHighlighter(QtGui.QSyntaxHighlighter):
         self._search_format.setForeground(QtGui.QColor("#2E3440")) # Nord Darkest (Texto)
         self._search_format.setFontWeight(QtGui.QFont.Bold) # Deixa a busca em negrito
 
+    @property
+    def matcher(self):
+        return self._matcher
+
     def load_default_rules(self):
         # Limpa as regras existentes antes de carregar as padrão
-        self._highlighting_rules = [
-            (QtCore.QRegExp(r"\b(ERROR|ERRO|EXCEPTION|FALHA|CRITICAL)\b", QtCore.Qt.CaseInsensitive), self._default_error_format),
-            (QtCore.QRegExp(r"\b(WARNING|WARN|AVISO)\b", QtCore.Qt.CaseInsensitive), self._default_warning_format),
-            (QtCore.QRegExp(r"\b(INFO)\b", QtCore.Qt.CaseInsensitive), self._default_info_format),
-            (QtCore.QRegExp(r"\b(DEBUG|TRACE)\b", QtCore.Qt.CaseInsensitive), self._default_other_format),
-        ]
-        self.rehighlight()
+        formats = {
+            "error": self._default_error_format,
+            "warning": self._default_warning_format,
+            "info": self._default_info_format,
+            "debug": self._default_other_format,
+        }
+        self._matcher.set_rules([(pattern, False, formats[level]) for level, pattern in DEFAULT_LEVEL_PATTERNS])
+        self.rules_changed.emit()
 
     def set_custom_rules(self, rules_data):
-        self._highlighting_rules = []
+        rules = []
         for rule in rules_data:
             try:
-                # Usa QRegExp.ExactMatch para correspondência exata se não for regex,
-                # mas normalmente para highlight, regex é mais flexível.
-                # Se quiser correspondência de palavra inteira sem regex, precisaria de uma flag extra.
-                pattern = QtCore.QRegExp(rule['pattern'], QtCore.Qt.CaseSensitive if rule.get('case_sensitive', False) else QtCore.Qt.CaseInsensitive)
+                # Os padrões são expressões regulares (sintaxe do módulo re)
                 format = QtGui.QTextCharFormat()
                 format.setForeground(QtGui.QColor(rule['color']))
                 if rule.get('bold', False):
@@ -55,41 +236,21 @@ class LogHighlighter(QtGui.QSyntaxHighlighter):
                     format.setFontItalic(True)
                 if rule.get('background', None):
                     format.setBackground(QtGui.QColor(rule['background']))
-                self._highlighting_rules.append((pattern, format))
+                rules.append((rule['pattern'], rule.get('case_sensitive', False), format))
             except Exception as e:
                 print(f"Erro ao carregar regra personalizada: {e} - Rule: {rule}")
-        self.rehighlight() # Aplica as novas regras imediatamente
+        self._matcher.set_rules(rules)
+        self.rules_changed.emit() # Aplica as novas regras imediatamente
 
     def set_search_pattern(self, pattern, case_sensitive=False):
-        self._search_highlight_rules = []
-        if pattern:
-            # Use QRegExp.FixedString para uma busca literal que não interpreta metacaracteres de regex
-            # Se você quer que o usuário possa digitar regex na busca, remova QtCore.QRegExp.FixedString
-            regexp = QtCore.QRegExp(pattern, QtCore.Qt.CaseSensitive if case_sensitive else QtCore.Qt.CaseInsensitive, QtCore.QRegExp.FixedString)
-            self._search_highlight_rules.append((regexp, self._search_format))
-        self.rehighlight() # Re-aplica todo o realce (busca e regras normais)
-
-    def highlightBlock(self, text):
-        """
-        Método sobrescrito para aplicar o realce a um bloco de texto (uma linha).
-        Prioriza realce de busca sobre regras de log.
-        """
-        # Aplica as regras de realce de log primeiro
-        for pattern, format in self._highlighting_rules:
-            expression = QtCore.QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
-
-        # Aplica o realce de busca por último (ele deve sobrescrever os formatos de log)
-        for pattern, format in self._search_highlight_rules:
-            expression = QtCore.QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
-
-        self.setCurrentBlockState(0)
\ No newline at end of file
+        # Busca literal: metacaracteres de regex não são interpretados
+        state = (pattern, case_sensitive) if pattern else None
+        if state == self._search_state:
+            return # Nada mudou: evita repintar
+        self._search_state = state
+        self._matcher.set_search(pattern, case_sensitive, self._search_format)
+        self.rules_changed.emit()
+
+    def spans(self, text):
+        """(início, comprimento, QTextCharFormat) a aplicar na linha; a busca vem por último."""
+        return self._matcher.spans(text)
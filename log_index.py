@@ -0,0 +1,138 @@
+# log_index.py
+"""
+Índice esparso de offsets de linha para navegar em arquivos de log grandes.
+"""
+
+from array import array
+from bisect import bisect_right
+import os
+
+# Um checkpoint (offset em bytes) a cada N linhas
+DEFAULT_CHECKPOINT_INTERVAL = 256
+# Quantidade de bytes processada por passo de indexação
+INDEX_STEP_BYTES = 4 * 1024 * 1024
+# Tamanho dos blocos lidos ao extrair linhas de uma posição do arquivo
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class LineOffsetIndex:
+    """
+    Guarda o offset do início de uma linha a cada `interval` linhas num array compacto.
+
+    O índice é alimentado em fluxo (feed / extend_from_file), de forma incremental: pode
+    ser construído aos poucos em segundo plano e continua crescendo junto com o arquivo.
+    Para chegar à linha N basta ir ao checkpoint anterior e pular no máximo `interval`
+    linhas, lendo somente os bytes necessários.
+    """
+
+    def __init__(self, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.interval = interval
+        self.checkpoints = array('Q', [0])
+        self.total_lines = 0 # Linhas terminadas por '\n'
+        self.indexed_bytes = 0
+        self._tail_start = 0 # Offset do início da linha ainda não terminada
+
+    @property
+    def line_count(self):
+        """Número de linhas conhecidas, incluindo uma última linha sem quebra final."""
+        return self.total_lines + (1 if self.indexed_bytes > self._tail_start else 0)
+
+    def reset(self):
+        self.checkpoints = array('Q', [0])
+        self.total_lines = 0
+        self.indexed_bytes = 0
+        self._tail_start = 0
+
+    def state(self):
+        """(checkpoints, metadados) para gravar o índice em disco (ver IndexCache)."""
+        return self.checkpoints, {"interval": self.interval, "total_lines": self.total_lines,
+                                  "tail_start": self._tail_start}
+
+    def restore(self, checkpoints, meta, indexed_bytes):
+        """Retoma um índice gravado com `state()`. Retorna False se ele não for compatível."""
+        if meta.get("interval") != self.interval or not checkpoints or checkpoints[0] != 0:
+            return False
+        self.checkpoints = array('Q', checkpoints)
+        self.total_lines = meta["total_lines"]
+        self._tail_start = meta["tail_start"]
+        self.indexed_bytes = indexed_bytes
+        return True
+
+    def feed(self, data):
+        """Processa o próximo trecho do arquivo (começando em indexed_bytes)."""
+        base = self.indexed_bytes
+        interval = self.interval
+        position = 0
+        # Contadas uma única vez por trecho; cada checkpoint só desconta as linhas que consumiu
+        available = data.count(b"\n")
+        while True:
+            needed = interval - (self.total_lines % interval)
+            if available < needed:
+                if available:
+                    self.total_lines += available
+                    self._tail_start = base + data.rindex(b"\n") + 1
+                break
+            for _ in range(needed):
+                position = data.index(b"\n", position) + 1
+            available -= needed
+            self.total_lines += needed
+            self._tail_start = base + position
+            self.checkpoints.append(base + position)
+        self.indexed_bytes = base + len(data)
+
+    def extend_from_file(self, file_obj, max_bytes=INDEX_STEP_BYTES):
+        """Indexa até `max_bytes` a partir de onde parou. Retorna o número de bytes lidos."""
+        file_obj.seek(self.indexed_bytes)
+        data = file_obj.read(max_bytes)
+        if data:
+            self.feed(data)
+        return len(data)
+
+    def locate_line(self, line_number):
+        """Retorna (offset do checkpoint, linhas a pular) para chegar à linha informada (base 0)."""
+        line_number = max(0, min(line_number, self.total_lines))
+        checkpoint = min(line_number // self.interval, len(self.checkpoints) - 1)
+        return self.checkpoints[checkpoint], line_number - checkpoint * self.interval
+
+    def line_for_offset(self, file_obj, offset):
+        """Retorna o número (base 0) da linha que contém o byte `offset`."""
+        offset = max(0, min(offset, self.indexed_bytes))
+        checkpoint = bisect_right(self.checkpoints, offset) - 1
+        start = self.checkpoints[checkpoint]
+        file_obj.seek(start)
+        return checkpoint * self.interval + file_obj.read(offset - start).count(b"\n")
+
+    def read_lines(self, file_obj, first_line, count):
+        """Lê `count` linhas (em bytes, sem '\\n') a partir da linha `first_line`."""
+        offset, skip = self.locate_line(first_line)
+        file_obj.seek(offset)
+        lines = []
+        pending = b""
+        while len(lines) < count:
+            block = file_obj.read(READ_BLOCK_SIZE)
+            if not block:
+                if pending and skip == 0:
+                    lines.append(pending)
+                break
+            parts = (pending + block).split(b"\n")
+            pending = parts.pop()
+            if skip:
+                dropped = min(skip, len(parts))
+                del parts[:dropped]
+                skip -= dropped
+            lines.extend(parts)
+        return lines[:count]
+
+    def is_complete(self, file_size):
+        return self.indexed_bytes >= file_size
+
+
+def file_stat(file_obj):
+    """Stat do arquivo aberto; fluxos virtuais (ex.: RotatedLogStream) fornecem o próprio stat()."""
+    stat = getattr(file_obj, "stat", None)
+    return stat() if stat is not None else os.fstat(file_obj.fileno())
+
+
+def file_size_of(file_obj):
+    """Tamanho atual do arquivo aberto (sem depender da posição corrente)."""
+    return file_stat(file_obj).st_size
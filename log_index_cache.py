@@ -0,0 +1,136 @@
+# log_index_cache.py
+"""
+Cache em disco dos índices de cada arquivo de log (arquivos "sidecar" em app_logs/index_cache).
+"""
+
+from array import array
+import hashlib
+import json
+import os
+
+from log_index import file_stat
+
+INDEX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_logs", "index_cache")
+# Versão do formato: sidecars de outra versão são ignorados (e sobrescritos)
+CACHE_FORMAT_VERSION = 1
+# Bytes do início do arquivo e do final do trecho indexado conferidos ao reabrir
+FINGERPRINT_BYTES = 64 * 1024
+# Sidecars mantidos; os usados há mais tempo são apagados
+MAX_CACHE_FILES = 256
+
+
+def fingerprint(file_obj, start, end):
+    """Hash SHA-1 do trecho [start, end) do arquivo aberto em modo binário."""
+    file_obj.seek(start)
+    return hashlib.sha1(file_obj.read(max(0, end - start))).hexdigest()
+
+
+class IndexCache:
+    """
+    Guarda e recupera índices de um arquivo de log: metadados JSON mais seções de arrays
+    numéricos (ex.: offsets de linha), num sidecar cujo nome vem do caminho do arquivo.
+
+    O sidecar registra tamanho, mtime e até onde o arquivo foi indexado, além do hash do
+    início do arquivo e do trecho que antecede o fim indexado. Ao reabrir, basta conferir
+    esses dois trechos: se batem, o arquivo só cresceu (ou não mudou) e o índice vale até
+    `indexed_bytes`, bastando estendê-lo a partir dali. Arquivo menor que o trecho
+    indexado ou com outro conteúdo (rotação, truncamento) invalida o sidecar. Para um
+    .gz/.zip, o sidecar guarda também o tamanho compactado: se o arquivo não mudou, o
+    tamanho descomprimido gravado é adotado em vez da estimativa do cabeçalho.
+    """
+
+    def __init__(self, directory=INDEX_CACHE_DIR, max_files=MAX_CACHE_FILES):
+        self.directory = directory
+        self.max_files = max_files
+
+    def sidecar_path(self, log_path):
+        key = os.path.normcase(os.path.abspath(log_path))
+        name = os.path.basename(log_path)
+        return os.path.join(self.directory, f"{name}.{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.idx")
+
+    def load(self, log_path, file_obj):
+        """
+        Retorna (metadados, {seção: array}) se o sidecar existir e ainda valer para o
+        arquivo aberto em `file_obj` (modo binário); senão None.
+        """
+        sidecar = self.sidecar_path(log_path)
+        try:
+            with open(sidecar, 'rb') as f:
+                meta = json.loads(f.readline())
+                if meta.get("version") != CACHE_FORMAT_VERSION:
+                    return None
+                stat = file_stat(file_obj)
+                if (not getattr(stat, "st_size_exact", True) and meta.get("compressed_size") == stat.st_compressed_size
+                        and meta["mtime"] == stat.st_mtime):
+                    # Mesmo arquivo compactado: vale o tamanho descomprimido já medido (o do
+                    # cabeçalho .gz é só uma estimativa) e não é preciso descomprimir tudo
+                    file_obj.assume_size(meta["size"])
+                    stat = file_stat(file_obj)
+                indexed_bytes = meta["indexed_bytes"]
+                if stat.st_size < indexed_bytes and getattr(stat, "st_size_exact", True):
+                    return None # Arquivo truncado ou substituído por um menor
+                unchanged = stat.st_size == meta["size"] and stat.st_mtime == meta["mtime"]
+                if not unchanged: # Mesmo tamanho e mtime: vale sem reler nada
+                    head_end = min(FINGERPRINT_BYTES, indexed_bytes)
+                    if fingerprint(file_obj, 0, head_end) != meta["head_hash"]:
+                        return None
+                    if fingerprint(file_obj, max(head_end, indexed_bytes - FINGERPRINT_BYTES), indexed_bytes) != meta["tail_hash"]:
+                        return None
+                sections = {}
+                for name, (typecode, count) in meta["sections"].items():
+                    values = array(typecode)
+                    values.fromfile(f, count)
+                    sections[name] = values
+        except (OSError, ValueError, KeyError, EOFError, TypeError):
+            return None
+        try:
+            os.utime(sidecar) # Marca como usado recentemente (limpeza por data)
+        except OSError:
+            pass
+        return meta, sections
+
+    def save(self, log_path, file_obj, indexed_bytes, sections, **extra):
+        """
+        Grava o sidecar do arquivo, válido até `indexed_bytes`. `sections`: {nome: array};
+        `extra`: metadados adicionais (valores JSON). Falhas de gravação são ignoradas.
+        """
+        try:
+            stat = file_stat(file_obj)
+            head_end = min(FINGERPRINT_BYTES, indexed_bytes)
+            # Compactados: só com o tamanho descomprimido exato (ver CompressedLogFile.assume_size)
+            exact = getattr(stat, "st_size_exact", True)
+            meta = dict(extra)
+            meta.update({
+                "version": CACHE_FORMAT_VERSION,
+                "path": os.path.abspath(log_path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "compressed_size": getattr(stat, "st_compressed_size", None) if exact else None,
+                "indexed_bytes": indexed_bytes,
+                "head_hash": fingerprint(file_obj, 0, head_end),
+                "tail_hash": fingerprint(file_obj, max(head_end, indexed_bytes - FINGERPRINT_BYTES), indexed_bytes),
+                "sections": {name: (values.typecode, len(values)) for name, values in sections.items()},
+            })
+            os.makedirs(self.directory, exist_ok=True)
+            sidecar = self.sidecar_path(log_path)
+            temp_path = sidecar + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(json.dumps(meta).encode('utf-8') + b"\n")
+                for values in sections.values():
+                    values.tofile(f)
+            os.replace(temp_path, sidecar) # Quem lê nunca vê um sidecar pela metade
+        except OSError:
+            return False
+        self._prune()
+        return True
+
+    def _prune(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".idx")]
+            if len(entries) <= self.max_files:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_files]:
+                os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,154 @@
+# log_io.py
+"""
+Rotinas de leitura de arquivos de log em nível de bytes, usadas pelo LogFileReader.
+"""
+
+import os
+
+from log_encoding import decode_line
+from log_timestamps import compare_timestamps, parse_line_timestamp
+
+# Tamanho do bloco usado na varredura reversa (leitura das últimas linhas)
+TAIL_BLOCK_SIZE = 64 * 1024
+# Bloco lido em cada sondagem da busca por horário; abaixo deste intervalo a busca vira linear
+TIME_PROBE_BYTES = 64 * 1024
+# Teto de bytes lidos numa sondagem à procura de uma linha com timestamp (ex.: stack traces longos)
+MAX_TIME_PROBE_BYTES = 1024 * 1024
+# Bytes do início da linha examinados para reconhecer o timestamp
+TIMESTAMP_PREFIX_BYTES = 64
+
+
+def find_tail_offset(file_obj, num_lines, file_size=None, block_size=TAIL_BLOCK_SIZE):
+    """
+    Retorna o offset (em bytes) onde começam as últimas `num_lines` linhas do arquivo.
+
+    Varre o arquivo de trás para frente em blocos de tamanho fixo, contando quebras de
+    linha até encontrar exatamente as N fronteiras necessárias. Só os blocos que contêm
+    essas linhas são lidos, independente do tamanho médio das linhas.
+    `file_obj` deve estar aberto em modo binário.
+    """
+    if file_size is None:
+        file_obj.seek(0, os.SEEK_END)
+        file_size = file_obj.tell()
+
+    if num_lines <= 0 or file_size == 0:
+        return file_size
+
+    # A quebra de linha final encerra a última linha; não conta como fronteira
+    end = file_size
+    file_obj.seek(file_size - 1)
+    if file_obj.read(1) == b"\n":
+        end -= 1
+
+    remaining = num_lines
+    position = end
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        file_obj.seek(position)
+        block = file_obj.read(read_size)
+
+        index = len(block)
+        while True:
+            index = block.rfind(b"\n", 0, index)
+            if index < 0:
+                break
+            remaining -= 1
+            if remaining == 0:
+                return position + index + 1
+
+    return 0
+
+
+def _next_line_start(file_obj, offset, max_bytes=MAX_TIME_PROBE_BYTES):
+    """Offset do início da primeira linha que começa em `offset` ou depois, ou None (fim do arquivo/teto)."""
+    if offset <= 0:
+        return 0
+    file_obj.seek(offset - 1)
+    scanned = 0
+    while scanned < max_bytes:
+        block = file_obj.read(TIME_PROBE_BYTES)
+        if not block:
+            return None
+        newline = block.find(b"\n")
+        if newline >= 0:
+            return offset + scanned + newline
+        scanned += len(block)
+    return None
+
+
+def _iter_stamped_lines(file_obj, position, max_bytes, encoding='utf-8'):
+    """
+    Gera (offset, timestamp) das linhas com timestamp a partir do início de linha `position`.
+    O prefixo é decodificado como o visualizador decodifica a linha (decode_line, com a
+    codificação detectada no arquivo), para que a busca leia o mesmo horário exibido.
+    """
+    file_obj.seek(position)
+    pending = b""
+    read = 0
+    while read < max_bytes:
+        block = file_obj.read(TIME_PROBE_BYTES)
+        read += len(block)
+        if block:
+            lines = (pending + block).split(b"\n")
+            pending = lines.pop()
+        else:
+            lines = [pending] if pending else [] # Última linha, sem '\n' final
+        for raw_line in lines:
+            stamp = parse_line_timestamp(decode_line(raw_line[:TIMESTAMP_PREFIX_BYTES], encoding))
+            if stamp is not None:
+                yield position, stamp
+            position += len(raw_line) + 1
+        if not block:
+            return
+
+
+def _first_stamped_line(file_obj, offset, encoding='utf-8'):
+    """(offset, timestamp) da primeira linha com timestamp que começa em `offset` ou depois, ou None."""
+    position = _next_line_start(file_obj, offset)
+    if position is None:
+        return None
+    return next(_iter_stamped_lines(file_obj, position, MAX_TIME_PROBE_BYTES, encoding), None)
+
+
+def find_time_offset(file_obj, reference, file_size=None, encoding='utf-8'):
+    """
+    Retorna o offset do início da primeira linha cujo timestamp é >= `reference`
+    ((date ou None, time), como parse_user_timestamp), ou o tamanho do arquivo se não houver.
+
+    Busca binária pelos bytes do arquivo: cada sondagem lê a partir do meio do intervalo
+    até a primeira linha com timestamp (linhas sem timestamp, como as de stack trace,
+    pertencem à entrada anterior). São O(log n) leituras de TIME_PROBE_BYTES, e a busca
+    termina com uma varredura linear de no máximo um intervalo desse tamanho.
+    Sem data no horário pedido, vale o dia da última linha do arquivo (o log de "hoje",
+    ou o último dia de um arquivo rotacionado).
+    """
+    if file_size is None:
+        file_obj.seek(0, os.SEEK_END)
+        file_size = file_obj.tell()
+
+    if reference[0] is None:
+        last_day = None
+        start = _next_line_start(file_obj, max(0, file_size - TIME_PROBE_BYTES))
+        if start is not None:
+            for _, (day, _) in _iter_stamped_lines(file_obj, start, TIME_PROBE_BYTES, encoding):
+                last_day = day
+        if last_day is not None:
+            reference = (last_day, reference[1])
+
+    low, high = 0, file_size
+    while high - low > TIME_PROBE_BYTES:
+        middle = (low + high) // 2
+        probe = _first_stamped_line(file_obj, middle, encoding)
+        if probe is None or compare_timestamps(probe[1], reference) >= 0:
+            high = middle
+        else:
+            low = probe[0] + 1 # Todas as linhas até a sondada são anteriores ao horário
+
+    start = _next_line_start(file_obj, low)
+    if start is None:
+        return file_size
+    for offset, stamp in _iter_stamped_lines(file_obj, start, file_size - start, encoding):
+        if compare_timestamps(stamp, reference) >= 0:
+            return offset
+    return file_size
@@ -0,0 +1,256 @@
+# log_line_store.py
+"""
+Armazenamento compacto das linhas lidas de um log, com teto de memória.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+import threading
+
+from log_encoding import DECODE_ERRORS
+
+# Teto padrão de memória para as linhas mantidas (bytes brutos + offsets)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Tamanho de cada arena; a remoção por memória descarta arenas inteiras
+ARENA_SIZE = 1024 * 1024
+# Quantidade de linhas decodificadas por vez ao iterar (o lock é solto entre lotes)
+ITER_BATCH_SIZE = 4096
+
+
+class _Arena:
+    """Bloco contíguo de linhas: bytes concatenados e o offset final de cada linha."""
+    __slots__ = ("data", "ends", "first_seq")
+
+    def __init__(self, first_seq):
+        self.data = bytearray()
+        self.ends = array('I')
+        self.first_seq = first_seq
+
+    def line(self, index):
+        start = self.ends[index - 1] if index else 0
+        return bytes(self.data[start:self.ends[index]])
+
+    def nbytes(self):
+        return len(self.data) + len(self.ends) * self.ends.itemsize
+
+
+class LineStore:
+    """
+    Guarda linhas como bytes brutos em arenas, sem um objeto str por linha.
+
+    Cada linha recebe um número de sequência crescente (seq) que nunca é reutilizado.
+    As linhas só são decodificadas quando lidas (exibição/filtro). Ao passar de
+    `max_bytes`, as arenas mais antigas são descartadas e `first_seq` avança.
+    Acesso protegido por lock: a thread de leitura escreve enquanto outras leem.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, arena_size=ARENA_SIZE, encoding='utf-8'):
+        self.max_bytes = max_bytes
+        self.arena_size = arena_size
+        self.encoding = encoding
+        self._lock = threading.RLock()
+        self._arenas = []
+        self._arena_starts = [] # first_seq de cada arena, para busca binária
+        self._next_seq = 0
+        self._first_seq = 0
+        self._nbytes = 0
+        self.evicted_lines = 0
+        self.max_line_bytes = 0 # Maior linha já guardada (largura da view sem decodificar tudo)
+
+    @property
+    def first_seq(self):
+        return self._first_seq
+
+    @property
+    def next_seq(self):
+        return self._next_seq
+
+    def __len__(self):
+        return self._next_seq - self._first_seq
+
+    def memory_usage(self):
+        """Bytes ocupados pelas linhas mantidas (conteúdo + tabela de offsets)."""
+        return self._nbytes
+
+    def clear(self):
+        with self._lock:
+            self._arenas = []
+            self._arena_starts = []
+            self._first_seq = self._next_seq
+            self._nbytes = 0
+            self.max_line_bytes = 0
+
+    def append_raw(self, raw_line):
+        """Adiciona uma linha (bytes, sem '\\n') e retorna seu número de sequência."""
+        with self._lock:
+            arena = self._arenas[-1] if self._arenas else None
+            if arena is None or (arena.ends and len(arena.data) + len(raw_line) > self.arena_size):
+                arena = _Arena(self._next_seq)
+                self._arenas.append(arena)
+                self._arena_starts.append(self._next_seq)
+            arena.data += raw_line
+            if len(raw_line) > self.max_line_bytes:
+                self.max_line_bytes = len(raw_line)
+            arena.ends.append(len(arena.data))
+            self._nbytes += len(raw_line) + arena.ends.itemsize
+            seq = self._next_seq
+            self._next_seq += 1
+            self._evict_if_needed()
+            return seq
+
+    def append_text(self, text):
+        """Adiciona uma linha de texto (ex.: marcadores gerados pelo visualizador)."""
+        return self.append_raw(text.encode(self.encoding, errors='replace'))
+
+    def _evict_if_needed(self):
+        while self._nbytes > self.max_bytes and len(self._arenas) > 1:
+            arena = self._arenas.pop(0)
+            self._arena_starts.pop(0)
+            self._nbytes -= arena.nbytes()
+            self.evicted_lines += len(arena.ends)
+            self._first_seq = self._arenas[0].first_seq
+
+    def _locate(self, seq):
+        index = bisect_right(self._arena_starts, seq) - 1
+        arena = self._arenas[index]
+        return arena, seq - arena.first_seq
+
+    def get_raw(self, seq):
+        """Bytes da linha `seq`, ou None se ela já foi descartada."""
+        with self._lock:
+            if not self._first_seq <= seq < self._next_seq:
+                return None
+            arena, index = self._locate(seq)
+            return arena.line(index)
+
+    def get_line(self, seq):
+        """Texto decodificado da linha `seq`, ou None se ela já foi descartada."""
+        raw = self.get_raw(seq)
+        return None if raw is None else raw.decode(self.encoding, DECODE_ERRORS)
+
+    def raw_lines(self, start_seq, end_seq):
+        """Lista de (seq, bytes) no intervalo [start_seq, end_seq) ainda mantido."""
+        with self._lock:
+            start_seq = max(start_seq, self._first_seq)
+            end_seq = min(end_seq, self._next_seq)
+            result = []
+            seq = start_seq
+            while seq < end_seq:
+                arena, index = self._locate(seq)
+                ends = arena.ends
+                data = arena.data
+                stop = min(len(ends), index + end_seq - seq)
+                start = ends[index - 1] if index else 0
+                for i in range(index, stop):
+                    end = ends[i]
+                    result.append((seq, bytes(data[start:end])))
+                    start = end
+                    seq += 1
+            return result
+
+    def iter_lines(self, start_seq=None, end_seq=None, batch_size=ITER_BATCH_SIZE):
+        """
+        Itera (seq, texto) decodificando em lotes; o lock é mantido só durante a cópia
+        de cada lote, então a escrita de novas linhas não fica bloqueada.
+        """
+        seq = self._first_seq if start_seq is None else start_seq
+        end_seq = self._next_seq if end_seq is None else end_seq
+        encoding = self.encoding
+        while seq < end_seq:
+            seq = max(seq, self._first_seq)
+            batch = self.raw_lines(seq, min(end_seq, seq + batch_size))
+            if not batch:
+                break
+            for line_seq, raw in batch:
+                yield line_seq, raw.decode(encoding, DECODE_ERRORS)
+            seq = batch[-1][0] + 1
+
+
+class VisibleSeqFeed:
+    """
+    Canal entre a thread de leitura e a UI: a sequência de seqs visíveis publicada pelo
+    leitor, numerada por posição (crescente, nunca reutilizada dentro de uma época).
+
+    O leitor publica lotes e a UI puxa só o trecho que ainda não exibiu, sem cópias em
+    sinais. Uma nova época (`reset`) indica que o conteúdo foi substituído (ex.: filtro
+    novo). Enquanto um filtro ainda varre as linhas, `scanned_end` diz até qual seq o
+    conteúdo da época já é definitivo (None = completo). As entradas cujas linhas o LineStore já descartou saem do início do buffer,
+    então ele fica limitado pelo mesmo teto de memória das linhas.
+    """
+
+    def __init__(self, line_store):
+        self._store = line_store
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._seqs = array('Q')
+        self._base = 0 # Posição de _seqs[0]
+        self._scanned_end = None # Seqs abaixo deste valor já foram avaliados (None = todos)
+        self._notified = False # Já há um aviso de publicação ainda não atendido pela UI
+
+    @property
+    def epoch(self):
+        return self._epoch
+
+    @property
+    def line_store(self):
+        """LineStore dos seqs da época atual (troca junto com a época, ver `reset`)."""
+        return self._store
+
+    def end_position(self):
+        with self._lock:
+            return self._base + len(self._seqs)
+
+    def reset(self, seqs=(), scanned_end=None, line_store=None):
+        """
+        Substitui todo o conteúdo (nova época); a UI sempre deve ser avisada. Com
+        `line_store`, os seqs passam a ser desse LineStore (ex.: outro arquivo).
+        """
+        with self._lock:
+            # A época muda antes do store: quem lê line_store e depois epoch sem o lock
+            # nunca vê o store novo junto com a época antiga
+            self._epoch += 1
+            if line_store is not None:
+                self._store = line_store
+            self._seqs = array('Q', seqs)
+            self._base = 0
+            self._scanned_end = scanned_end
+            self._notified = True
+
+    def publish(self, seqs, scanned_end=None):
+        """Anexa seqs visíveis ao conteúdo atual. Retorna True se a UI precisa ser avisada."""
+        with self._lock:
+            if not seqs and scanned_end == self._scanned_end:
+                return False
+            self._seqs.extend(seqs)
+            self._scanned_end = scanned_end
+            self._trim_evicted()
+            # Um único aviso pendente por vez: a UI puxa tudo o que houver quando atender
+            notify = not self._notified
+            self._notified = True
+            return notify
+
+    def _trim_evicted(self):
+        first_seq = self._store.first_seq
+        if self._seqs and self._seqs[0] < first_seq:
+            count = bisect_left(self._seqs, first_seq)
+            del self._seqs[:count]
+            self._base += count
+
+    def read(self, epoch, position, max_count=None):
+        """
+        Trecho a partir de `position` na época `epoch`: retorna (época, posição inicial, seqs,
+        scanned_end). Se a época mudou, retorna todo o conteúdo da época atual (substituição);
+        senão, no máximo `max_count` seqs. Posições já descartadas são puladas. O conteúdo
+        exibido é definitivo para os seqs abaixo de scanned_end (None = todos).
+        """
+        with self._lock:
+            self._notified = False
+            self._trim_evicted()
+            if epoch != self._epoch:
+                return self._epoch, self._base, self._seqs[:], self._scanned_end
+            start = max(position, self._base) - self._base
+            stop = len(self._seqs) if max_count is None else min(len(self._seqs), start + max_count)
+            scanned_end = self._scanned_end
+            if stop < len(self._seqs):
+                scanned_end = self._seqs[stop] # Lote cortado: definitivo até o próximo seq publicado
+            return self._epoch, self._base + start, self._seqs[start:stop], scanned_end
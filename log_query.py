@@ -0,0 +1,323 @@
+# log_query.py
+"""
+Linguagem de consulta do filtro de linhas do visualizador de logs.
+
+Sintaxe (operadores em maiúsculas; termos sem operador são combinados com AND):
+    ERRO nfe                 linhas com "erro" E "nfe" (sem diferenciar maiúsculas)
+    "falha ao conectar"      frase exata
+    /NF-?e \\d{44}/           expressão regular
+    timeout OR rejeitada     OU   (também: OU, ||)
+    NOT timeout  /  -timeout NÃO (também: NAO, !)
+    (a OR b) AND c           agrupamento; AND também aceita E, &&
+    level:error,warn         nível da linha (nivel: também vale)
+    after:14:00  before:15:30  time:14:00-15:00   hora do timestamp no início da linha
+                             (apos:, antes:, hora:; aceitam data, ex. after:2025-07-14T14:00)
+"""
+
+import re
+
+from log_timestamps import compare_timestamps, parse_line_timestamp, parse_user_timestamp
+
+# Palavras de cada nível (as mesmas reconhecidas pelo realce padrão)
+LEVEL_KEYWORDS = {
+    "error": ("ERROR", "ERRO", "EXCEPTION", "FALHA", "CRITICAL"),
+    "warning": ("WARNING", "WARN", "AVISO"),
+    "info": ("INFO",),
+    "debug": ("DEBUG", "TRACE"),
+}
+_LEVEL_ALIASES = {
+    "error": "error", "erro": "error", "err": "error", "critical": "error", "falha": "error",
+    "warning": "warning", "warn": "warning", "aviso": "warning",
+    "info": "info",
+    "debug": "debug", "trace": "debug",
+}
+
+_AND_WORDS = ("AND", "E", "&&")
+_OR_WORDS = ("OR", "OU", "||")
+_NOT_WORDS = ("NOT", "NAO", "NÃO", "!")
+_LEVEL_KEYS = ("level", "nivel", "nível")
+_AFTER_KEYS = ("after", "apos", "após")
+_BEFORE_KEYS = ("before", "antes")
+_TIME_KEYS = ("time", "hora")
+# Intervalo "início-fim": o '-' separador é o que vem logo após os minutos/segundos do início
+_TIME_RANGE_RE = re.compile(r"(.*?\d:\d{2}(?::\d{2})?(?:[.,]\d+)?)-(.+)$")
+
+# Custo relativo de cada tipo de nó: dentro de um AND os mais baratos são avaliados antes
+_COST_LITERAL, _COST_LEVEL, _COST_REGEX, _COST_TIME = 0, 1, 2, 3
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class _Node:
+    cost = _COST_REGEX
+    required_literals = frozenset()
+
+    def compile(self):
+        """Retorna uma função (line, line_lower) -> bool."""
+        raise NotImplementedError
+
+
+class _Literal(_Node):
+    cost = _COST_LITERAL
+
+    def __init__(self, text):
+        self.text = text.lower()
+        self.required_literals = frozenset([self.text])
+
+    def compile(self):
+        text = self.text
+        return lambda line, lower: text in lower
+
+
+class _Regex(_Node):
+    cost = _COST_REGEX
+
+    def __init__(self, pattern):
+        try:
+            self.regex = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise QuerySyntaxError(f"Expressão regular inválida /{pattern}/: {e}")
+
+    def compile(self):
+        search = self.regex.search
+        return lambda line, lower: search(line) is not None
+
+
+class _Level(_Node):
+    cost = _COST_LEVEL
+
+    def __init__(self, value):
+        levels = []
+        for name in value.split(","):
+            level = _LEVEL_ALIASES.get(name.strip().lower())
+            if level is None:
+                raise QuerySyntaxError(f"Nível desconhecido: '{name}'. Use error, warn, info ou debug.")
+            levels.append(level)
+        keywords = [keyword for level in levels for keyword in LEVEL_KEYWORDS[level]]
+        self.regex = re.compile(r"\b(?:" + "|".join(keywords) + r")\b", re.IGNORECASE)
+
+    def compile(self):
+        search = self.regex.search
+        return lambda line, lower: search(line) is not None
+
+
+class _TimeRange(_Node):
+    cost = _COST_TIME
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def compile(self):
+        start, end = self.start, self.end
+
+        def matches(line, lower):
+            stamp = parse_line_timestamp(line)
+            if stamp is None:
+                return False # Linhas sem timestamp (ex.: continuação de stack trace) não entram
+            if start is not None and compare_timestamps(stamp, start) < 0:
+                return False
+            if end is not None and compare_timestamps(stamp, end) > 0:
+                return False
+            return True
+        return matches
+
+
+class _Not(_Node):
+    def __init__(self, child):
+        self.child = child
+        self.cost = child.cost
+
+    def compile(self):
+        child = self.child.compile()
+        return lambda line, lower: not child(line, lower)
+
+
+class _And(_Node):
+    def __init__(self, children):
+        # Avalia primeiro os nós baratos (literais) para descartar linhas cedo
+        self.children = sorted(children, key=lambda node: node.cost)
+        self.cost = max(node.cost for node in children)
+        self.required_literals = frozenset().union(*(node.required_literals for node in children))
+
+    def compile(self):
+        literals = [node.text for node in self.children if isinstance(node, _Literal)]
+        others = [node.compile() for node in self.children if not isinstance(node, _Literal)]
+        if not others:
+            return lambda line, lower: all(text in lower for text in literals)
+
+        def matches(line, lower):
+            for text in literals:
+                if text not in lower:
+                    return False
+            for check in others:
+                if not check(line, lower):
+                    return False
+            return True
+        return matches
+
+
+class _Or(_Node):
+    def __init__(self, children):
+        self.children = sorted(children, key=lambda node: node.cost)
+        self.cost = max(node.cost for node in children)
+        # Só é obrigatório o literal exigido por todos os ramos
+        self.required_literals = frozenset.intersection(*(node.required_literals for node in children))
+
+    def compile(self):
+        checks = [node.compile() for node in self.children]
+        return lambda line, lower: any(check(line, lower) for check in checks)
+
+
+# --- Tokenização e análise sintática ---
+
+_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<lparen>\()|(?P<rparen>\))|"(?P<phrase>(?:[^"\\]|\\.)*)"'
+    r'|/(?P<regex>(?:[^/\\]|\\.)+)/|(?P<word>[^\s()]+))'
+)
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise QuerySyntaxError(f"Não foi possível interpretar o filtro a partir de: '{text[position:]}'")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "phrase":
+            value = value.replace('\\"', '"')
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise QuerySyntaxError("Parêntese ')' sem abertura correspondente.")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() in (("word", word) for word in _OR_WORDS):
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def parse_and(self):
+        children = [self.parse_unary()]
+        while True:
+            kind, value = self.peek()
+            if kind is None or kind == "rparen" or (kind == "word" and value in _OR_WORDS):
+                break
+            if kind == "word" and value in _AND_WORDS:
+                self.take()
+            children.append(self.parse_unary())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def parse_unary(self):
+        kind, value = self.take()
+        if kind is None:
+            raise QuerySyntaxError("Filtro incompleto: falta um termo após o operador.")
+        if kind == "word" and value in _NOT_WORDS:
+            return _Not(self.parse_unary())
+        if kind == "word" and value.startswith("-") and len(value) > 1:
+            return _Not(self._term(value[1:]))
+        if kind == "lparen":
+            node = self.parse_or()
+            if self.take()[0] != "rparen":
+                raise QuerySyntaxError("Parêntese '(' sem fechamento correspondente.")
+            return node
+        if kind == "rparen":
+            raise QuerySyntaxError("Parêntese ')' inesperado.")
+        if kind == "phrase":
+            return _Literal(value)
+        if kind == "regex":
+            return _Regex(value)
+        return self._term(value)
+
+    def _term(self, word):
+        key, sep, value = word.partition(":")
+        key = key.lower()
+        if sep and value:
+            if key in _LEVEL_KEYS:
+                return _Level(value)
+            if key in _AFTER_KEYS:
+                return _TimeRange(start=_parse_time_value(value))
+            if key in _BEFORE_KEYS:
+                return _TimeRange(end=_parse_time_value(value))
+            if key in _TIME_KEYS:
+                match = _TIME_RANGE_RE.match(value)
+                if not match:
+                    raise QuerySyntaxError(f"Intervalo de hora inválido: '{value}'. Use, por exemplo, time:14:00-15:00.")
+                return _TimeRange(start=_parse_time_value(match.group(1)), end=_parse_time_value(match.group(2)))
+        return _Literal(word)
+
+
+def _parse_time_value(value):
+    stamp = parse_user_timestamp(value)
+    if stamp is None:
+        raise QuerySyntaxError(f"Horário inválido: '{value}'. Use HH:MM, HH:MM:SS ou AAAA-MM-DDTHH:MM.")
+    return stamp
+
+
+class CompiledQuery:
+    """Consulta compilada uma única vez; `matches(line)` é chamado para cada linha."""
+
+    def __init__(self, text, node):
+        self.text = text
+        self._node = node
+        self.required_literals = node.required_literals
+        # Consulta formada só por literais combinados com AND (permite refinamento incremental)
+        if isinstance(node, _Literal):
+            self.literal_conjunction = (node.text,)
+        elif isinstance(node, _And) and all(isinstance(child, _Literal) for child in node.children):
+            self.literal_conjunction = tuple(child.text for child in node.children)
+        else:
+            self.literal_conjunction = None
+        self._check = node.compile()
+
+    def matches(self, line):
+        return self._check(line, line.lower())
+
+    def negated(self):
+        """Consulta que aceita exatamente as linhas recusadas por esta (modo 'Excluir')."""
+        return CompiledQuery(self.text, _Not(self._node))
+
+    def is_refinement_of(self, other):
+        """True se toda linha aceita por esta consulta também é aceita por `other`."""
+        if other is None:
+            return True
+        if other.literal_conjunction is None:
+            return False
+        return all(any(old in new for new in self.required_literals) for old in other.literal_conjunction)
+
+
+def compile_query(text):
+    """Compila o texto do filtro. Retorna None para filtro vazio; levanta QuerySyntaxError se inválido."""
+    if not text or not text.strip():
+        return None
+    return CompiledQuery(text, _Parser(_tokenize(text)).parse())
+
+
+def literal_query(text):
+    """Consulta que busca o texto literalmente (usada quando o filtro digitado é inválido)."""
+    return CompiledQuery(text, _Literal(text))
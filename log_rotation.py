@@ -0,0 +1,148 @@
+# log_rotation.py
+"""
+Identidade de arquivos e acesso aos logs rotacionados (Batman.log.1, Batman.log.2, ...).
+"""
+
+from bisect import bisect_right
+import os
+import re
+from types import SimpleNamespace
+
+from log_archive import ARCHIVE_EXTENSIONS, CompressedLogFile, open_log_file
+from log_index import file_size_of
+
+# Rotacionados considerados no histórico (os mais antigos além disso ficam de fora)
+MAX_ROTATED_FILES = 50
+
+
+def file_identity(stat):
+    """
+    Identidade do arquivo por trás de um caminho: (dispositivo, inode/id do arquivo no
+    Windows). Renomear mantém a identidade; recriar com o mesmo nome a troca. Sistemas de
+    arquivos sem id caem na data de criação (st_ctime no Windows).
+    """
+    if stat.st_ino:
+        return stat.st_dev, stat.st_ino
+    return stat.st_dev, stat.st_ctime
+
+
+def rotated_siblings(path, max_files=MAX_ROTATED_FILES):
+    """
+    Caminhos dos rotacionados de `path` (`path`.1, `path`.2.gz, ...), do mais antigo ao mais
+    recente, limitados aos `max_files` mais recentes. Levanta OSError se a pasta não puder
+    ser listada.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    archive_suffix = "|".join(re.escape(extension) for extension in ARCHIVE_EXTENSIONS)
+    pattern = re.compile(re.escape(name) + r"\.(\d+)(?:" + archive_suffix + r")?$", re.IGNORECASE)
+    numbered = []
+    for entry in os.scandir(directory):
+        match = pattern.match(entry.name)
+        if match and entry.is_file():
+            numbered.append((int(match.group(1)), entry.path))
+    numbered.sort()
+    return [sibling for _, sibling in reversed(numbered[:max_files])]
+
+
+class RotatedLogStream:
+    """
+    Arquivo binário somente leitura que apresenta os rotacionados e o log atual, do mais
+    antigo ao mais recente, como um único fluxo de bytes (read/seek/tell/readline), para
+    que o índice de linhas e a navegação percorram o histórico inteiro.
+
+    Todos os membros são abertos na criação: uma nova rotação renomeia os arquivos, mas
+    os handles continuam apontando para os mesmos conteúdos. Os dados só são lidos sob
+    demanda; rotacionados compactados (.gz/.zip) são descomprimidos em fluxo. O início de
+    cada membro só é calculado quando a leitura chega a ele, pois o tamanho exato de um
+    compactado exige descomprimi-lo; o último membro (o log ativo) continua crescendo.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._handles = []
+        try:
+            for path in self.paths:
+                self._handles.append(open_log_file(path))
+        except (OSError, ValueError):
+            self.close()
+            raise
+        self.identities = [file_identity(os.fstat(handle.fileno())) for handle in self._handles]
+        self._starts = [0] # Offsets de início já conhecidos (dos primeiros membros)
+        self._position = 0
+
+    def _start(self, index):
+        while len(self._starts) <= index:
+            member = self._handles[len(self._starts) - 1]
+            size = member.exact_size() if isinstance(member, CompressedLogFile) else file_size_of(member)
+            self._starts.append(self._starts[-1] + size)
+        return self._starts[index]
+
+    def stat(self):
+        """Tamanho total (estimado para compactados ainda não lidos) e data de modificação do log ativo."""
+        known = len(self._starts) - 1
+        size = self._starts[known] + sum(file_size_of(handle) for handle in self._handles[known:])
+        live = os.fstat(self._handles[-1].fileno())
+        return SimpleNamespace(st_size=size, st_mtime=live.st_mtime)
+
+    def _member_at(self, position):
+        index = bisect_right(self._starts, position) - 1
+        while index + 1 < len(self._handles) and self._start(index + 1) <= position:
+            index += 1
+        return index
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.stat().st_size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        parts = []
+        index = self._member_at(self._position)
+        while size and index < len(self._handles):
+            handle = self._handles[index]
+            handle.seek(self._position - self._starts[index])
+            last = index + 1 == len(self._handles)
+            limit = None if last else self._start(index + 1) - self._position
+            if limit is not None and size >= 0:
+                limit = min(limit, size)
+            elif limit is None:
+                limit = size
+            data = handle.read(limit)
+            if data:
+                parts.append(data)
+                self._position += len(data)
+                if size > 0:
+                    size -= len(data)
+            if not last and self._position >= self._starts[index + 1]:
+                index += 1
+            else:
+                break
+        return b"".join(parts)
+
+    def readline(self):
+        parts = []
+        index = self._member_at(self._position)
+        while index < len(self._handles):
+            handle = self._handles[index]
+            handle.seek(self._position - self._starts[index])
+            line = handle.readline()
+            last = index + 1 == len(self._handles)
+            if not last:
+                line = line[:self._start(index + 1) - self._position]
+            parts.append(line)
+            self._position += len(line)
+            if line.endswith(b"\n") or last or self._position < self._starts[index + 1]:
+                break
+            index += 1 # Membro terminou sem '\n': a linha continua no próximo
+        return b"".join(parts)
+
+    def close(self):
+        for handle in self._handles:
+            handle.close()
+        self._handles = []
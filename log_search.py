@@ -0,0 +1,367 @@
+# log_search.py
+"""
+Busca de um termo em todos os arquivos de log de um diretório, em paralelo (QThreadPool).
+Arquivos compactados (.gz/.zip) são descomprimidos em fluxo durante a varredura.
+"""
+
+import os
+import re
+import threading
+import time
+
+from PyQt5 import QtCore
+
+from log_archive import ARCHIVE_EXTENSIONS, LOG_READ_ERRORS, is_archive, open_log_file
+from log_encoding import decode_line, sniff_encoding
+
+# Bytes lidos por vez de cada arquivo (leitura bufferizada grande, sem passar por linhas)
+SEARCH_READ_SIZE = 4 * 1024 * 1024
+# Teto de bytes acumulados de uma linha sem '\n' (como MAX_PARTIAL_LINE_BYTES do tail): além
+# dele, o trecho já lido é varrido e descartado, e a linha continua no bloco seguinte
+MAX_CARRY_BYTES = 4 * 1024 * 1024
+# Arquivos varridos ao mesmo tempo (a leitura libera o GIL; o resto é find/count em C)
+MAX_PARALLEL_FILES = 4
+# Intervalo mínimo entre envios de resultados e progresso de cada arquivo (segundos)
+SEARCH_EMIT_INTERVAL = 0.1
+# Teto de resultados de uma busca: ao atingir, as varreduras restantes são canceladas
+MAX_SEARCH_RESULTS = 5000
+# Caracteres do trecho exibido ao redor da ocorrência
+SNIPPET_CHARS = 300
+# Extensões consideradas arquivos de log (além de arquivos sem extensão)
+LOG_FILE_EXTENSIONS = ('.log', '.txt', '.out', '.err', '.trace')
+# Sufixo numérico dos arquivos rotacionados (Batman.log.1, Batman.log.2, ...)
+ROTATION_SUFFIX = re.compile(r"\.\d+$")
+# Níveis de subpastas percorridos por scan_log_files(recursive=True)
+MAX_SCAN_DEPTH = 8
+
+
+def is_log_file_name(filename):
+    """
+    Nome de arquivo de log: com uma das LOG_FILE_EXTENSIONS ou sem extensão, rotacionado
+    (sufixo .1, .2, ...) ou não, e opcionalmente compactado (.gz/.zip). Compactados precisam
+    da extensão de log por dentro (Batman.log.2.gz), para não pegar outros .zip da pasta.
+    """
+    name = filename.lower()
+    archived = name.endswith(ARCHIVE_EXTENSIONS)
+    if archived:
+        name = os.path.splitext(name)[0]
+    name = ROTATION_SUFFIX.sub("", name)
+    return name.endswith(LOG_FILE_EXTENSIONS) or ("." not in name and not archived)
+
+
+def scan_log_files(directory, cancel_event=None, recursive=False, on_directory=None):
+    """
+    Gera (nome, caminho, data de modificação, tamanho) de cada arquivo de log da pasta
+    (ver is_log_file_name) com os.scandir: um único stat por entrada (no Windows ele já
+    vem da própria listagem). Levanta OSError se a pasta não puder ser listada.
+
+    Com `recursive`, desce também pelas subpastas (até MAX_SCAN_DEPTH níveis, sem seguir
+    links simbólicos); o nome passa a ser o caminho relativo à pasta. Subpastas que não
+    puderem ser listadas são ignoradas. `on_directory(caminho)` é chamado para cada pasta
+    listada.
+    """
+    pending = [(directory, "", 0)]
+    while pending:
+        current, prefix, depth = pending.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            if current == directory:
+                raise
+            continue # Subpasta removida durante a varredura ou sem permissão
+        if on_directory is not None:
+            on_directory(current)
+        with entries:
+            for entry in entries:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        if depth < MAX_SCAN_DEPTH and not entry.name.startswith("."):
+                            pending.append((entry.path, prefix + entry.name + os.sep, depth + 1))
+                        continue
+                    if not is_log_file_name(entry.name) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue # Removido durante a listagem ou sem permissão
+                yield prefix + entry.name, entry.path, stat.st_mtime, stat.st_size
+
+
+def iter_file_matches(file_obj, needle, case_sensitive=False, cancel_event=None, read_size=SEARCH_READ_SIZE,
+                      on_progress=None, max_carry=MAX_CARRY_BYTES):
+    """
+    Gera (número da linha base 0, linha em bytes sem '\\n') para cada linha do arquivo
+    que contém `needle` (bytes; em minúsculas quando `case_sensitive` é False).
+
+    O arquivo é lido em blocos de `read_size` cortados na última quebra de linha; o
+    termo é procurado no bloco inteiro e as linhas só são contadas até cada ocorrência.
+    Sem diferenciar maiúsculas, o bloco é convertido com bytes.lower() (só ASCII).
+    `on_progress(bytes)` é chamado a cada bloco lido.
+
+    Uma linha sem '\\n' maior que `max_carry` é varrida em trechos (cada linha sai uma
+    única vez, com o trecho em que o termo aparece), para que um arquivo sem quebras não
+    vá inteiro para a memória.
+    """
+    line_base = 0
+    last_hit_line = -1
+    carry = b""
+    overlap = max(0, len(needle) - 1) # Ocorrência partida entre dois trechos da mesma linha
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        block = file_obj.read(read_size)
+        if on_progress is not None and block:
+            on_progress(len(block))
+        if block:
+            data = carry + block
+            cut = data.rfind(b"\n") + 1
+            if not cut:
+                if len(data) <= max_carry:
+                    carry = data # Linha maior que o bloco: continua acumulando
+                    continue
+                # Linha gigante: varre o que já chegou e guarda só o final que pode conter o
+                # começo de uma ocorrência
+                carry = data[max(1, len(data) - overlap):]
+            else:
+                data, carry = data[:cut], data[cut:]
+        else:
+            data, carry = carry, b""
+            if not data:
+                return
+
+        haystack = data if case_sensitive else data.lower()
+        counted_to = 0
+        position = haystack.find(needle)
+        while position >= 0:
+            line_start = data.rfind(b"\n", 0, position) + 1
+            line_end = data.find(b"\n", position)
+            if line_end < 0:
+                line_end = len(data)
+            line_base += data.count(b"\n", counted_to, line_start)
+            counted_to = line_start
+            if line_base != last_hit_line: # Linha gigante já achada num trecho anterior
+                last_hit_line = line_base
+                yield line_base, data[line_start:line_end]
+            position = haystack.find(needle, line_end)
+        line_base += data.count(b"\n", counted_to)
+        if not block:
+            return
+
+
+def make_snippet(text, term, case_sensitive=False, width=SNIPPET_CHARS):
+    """Trecho da linha com no máximo `width` caracteres, centrado na primeira ocorrência do termo."""
+    if len(text) <= width:
+        return text
+    position = text.find(term) if case_sensitive else text.lower().find(term.lower())
+    start = max(0, min(position - width // 3, len(text) - width)) if position >= 0 else 0
+    snippet = text[start:start + width]
+    return ("…" if start else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+# Evento de cancelamento dos workers de search_file_task (definido por init_search_worker)
+_worker_cancel_event = None
+
+
+def init_search_worker(cancel_event):
+    """Inicializador dos workers de um Executor (threads ou processos) que rodam search_file_task."""
+    global _worker_cancel_event
+    _worker_cancel_event = cancel_event
+
+
+def search_file_task(path, term, case_sensitive=False, max_hits=MAX_SEARCH_RESULTS, encoding=None):
+    """
+    Procura o termo em um arquivo e retorna (caminho, [(linha base 0, trecho)], bytes lidos,
+    mensagem de erro). Função de módulo para poder rodar num ProcessPoolExecutor. Sem
+    `encoding`, a codificação é detectada no próprio arquivo (sniff_encoding).
+    """
+    hits = []
+    bytes_read = 0
+
+    def on_progress(size):
+        nonlocal bytes_read
+        bytes_read += size
+
+    try:
+        with open_log_file(path) as file_obj:
+            file_encoding = encoding or sniff_encoding(file_obj, sample_tail=not is_archive(path))
+            file_obj.seek(0)
+            needle = (term if case_sensitive else term.lower()).encode(file_encoding, errors='replace')
+            for line_number, raw_line in iter_file_matches(file_obj, needle, case_sensitive, _worker_cancel_event,
+                                                           on_progress=on_progress):
+                text = decode_line(raw_line, file_encoding).rstrip('\r')
+                hits.append((line_number, make_snippet(text, term, case_sensitive)))
+                if len(hits) >= max_hits:
+                    break
+    except LOG_READ_ERRORS as e: # Inclui .gz/.zip corrompidos
+        return path, hits, bytes_read, str(e) or type(e).__name__
+    return path, hits, bytes_read, ""
+
+
+class FileSearchJobSignals(QtCore.QObject):
+    hits = QtCore.pyqtSignal(int, str, object) # Geração, arquivo, lista de (linha base 0, trecho)
+    progress = QtCore.pyqtSignal(int, int) # Geração, bytes lidos desde o último aviso
+    finished = QtCore.pyqtSignal(int, str, str) # Geração, arquivo, mensagem de erro ("" se ok)
+
+
+class FileSearchJob(QtCore.QRunnable):
+    """Varre um arquivo procurando o termo; os resultados são emitidos em lotes."""
+
+    def __init__(self, generation, path, term, case_sensitive, cancel_event, encoding=None):
+        super().__init__()
+        self.generation = generation
+        self.path = path
+        self.term = term
+        self.case_sensitive = case_sensitive
+        self.cancel_event = cancel_event
+        self.encoding = encoding
+        self.signals = FileSearchJobSignals()
+        self.setAutoDelete(True)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        pending_hits = []
+        pending_bytes = 0
+        last_emit = time.monotonic()
+
+        def flush():
+            nonlocal pending_hits, pending_bytes, last_emit
+            if pending_hits:
+                self.signals.hits.emit(self.generation, self.path, pending_hits)
+            self.signals.progress.emit(self.generation, pending_bytes)
+            pending_hits, pending_bytes = [], 0
+            last_emit = time.monotonic()
+
+        def on_progress(size):
+            nonlocal pending_bytes
+            pending_bytes += size
+            if time.monotonic() - last_emit >= SEARCH_EMIT_INTERVAL:
+                flush() # Arquivos sem ocorrências também informam o avanço (MB/s)
+
+        error = ""
+        try:
+            with open_log_file(self.path) as file_obj:
+                # Detectada por arquivo
+                encoding = self.encoding or sniff_encoding(file_obj, sample_tail=not is_archive(self.path))
+                file_obj.seek(0)
+                needle = (self.term if self.case_sensitive else self.term.lower()).encode(encoding, errors='replace')
+                for line_number, raw_line in iter_file_matches(file_obj, needle, self.case_sensitive,
+                                                               self.cancel_event, on_progress=on_progress):
+                    text = decode_line(raw_line, encoding).rstrip('\r')
+                    pending_hits.append((line_number, make_snippet(text, self.term, self.case_sensitive)))
+                    if time.monotonic() - last_emit >= SEARCH_EMIT_INTERVAL:
+                        flush()
+        except Exception as e:
+            error = str(e)
+        finally:
+            flush()
+            self.signals.finished.emit(self.generation, self.path, error)
+
+
+class DirectorySearch(QtCore.QObject):
+    """
+    Coordena a busca de um termo em vários arquivos: um FileSearchJob por arquivo num
+    QThreadPool próprio com no máximo MAX_PARALLEL_FILES threads. Uma busca nova (ou
+    `cancel`) descarta a anterior; os sinais de jobs antigos são ignorados pela geração.
+    """
+    hits_found = QtCore.pyqtSignal(str, object) # Arquivo, lista de (linha base 0, trecho)
+    progress = QtCore.pyqtSignal(int, int, int, float) # Arquivos concluídos, total, resultados, MB/s
+    finished = QtCore.pyqtSignal(bool, bool) # Cancelada, limite de resultados atingido
+    file_failed = QtCore.pyqtSignal(str, str) # Arquivo, mensagem de erro
+
+    def __init__(self, parent=None, max_results=MAX_SEARCH_RESULTS):
+        super().__init__(parent)
+        self.max_results = max_results
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(MAX_PARALLEL_FILES, QtCore.QThread.idealThreadCount())))
+        self._generation = 0
+        self._cancel_event = threading.Event()
+        self._running = False
+        self._files_total = 0
+        self._files_done = 0
+        self._result_count = 0
+        self._bytes_read = 0
+        self._started_at = 0.0
+        self._limit_reached = False
+
+    def is_running(self):
+        return self._running
+
+    def start(self, paths, term, case_sensitive=False):
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        self._files_total = len(paths)
+        self._files_done = 0
+        self._result_count = 0
+        self._bytes_read = 0
+        self._limit_reached = False
+        self._started_at = time.monotonic()
+        self._running = True
+        if not paths:
+            self._running = False
+            self.finished.emit(False, False)
+            return
+
+        def size_of(path):
+            try:
+                return os.path.getsize(path)
+            except OSError:
+                return 0
+
+        # Maiores primeiro: os arquivos pequenos preenchem as threads livres no final
+        for path in sorted(paths, key=size_of, reverse=True):
+            job = FileSearchJob(self._generation, path, term, case_sensitive, self._cancel_event)
+            job.signals.hits.connect(self._on_hits)
+            job.signals.progress.connect(self._on_progress)
+            job.signals.finished.connect(self._on_file_finished)
+            self._pool.start(job)
+
+    def cancel(self):
+        """Interrompe a busca em andamento (os jobs param no próximo bloco lido)."""
+        self._cancel_event.set()
+        if self._running:
+            self._running = False
+            self._generation += 1
+            self.finished.emit(True, self._limit_reached)
+
+    def mb_per_second(self):
+        elapsed = time.monotonic() - self._started_at
+        return self._bytes_read / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+
+    def _emit_progress(self):
+        self.progress.emit(self._files_done, self._files_total, self._result_count, self.mb_per_second())
+
+    def _on_hits(self, generation, path, hits):
+        if generation != self._generation:
+            return
+        room = self.max_results - self._result_count
+        if len(hits) > room:
+            hits = hits[:room]
+        self._result_count += len(hits)
+        if hits:
+            self.hits_found.emit(path, hits)
+        if self._result_count >= self.max_results:
+            self._limit_reached = True
+            self._cancel_event.set()
+            self._emit_progress()
+            self._running = False
+            self._generation += 1
+            self.finished.emit(False, True)
+
+    def _on_progress(self, generation, size):
+        if generation != self._generation:
+            return
+        self._bytes_read += size
+        self._emit_progress()
+
+    def _on_file_finished(self, generation, path, error):
+        if generation != self._generation:
+            return
+        if error:
+            self.file_failed.emit(path, error)
+        self._files_done += 1
+        self._emit_progress()
+        if self._files_done == self._files_total:
+            self._running = False
+            self.finished.emit(False, False)
@@ -0,0 +1,684 @@
+# log_tail_engine.py
+"""
+Motor de tail compartilhado: uma única thread acompanha todos os arquivos abertos nos
+visualizadores, com um só agendador e intervalos de verificação adaptativos por arquivo.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from PyQt5 import QtCore
+
+from log_io import find_tail_offset
+from log_index import LineOffsetIndex, file_size_of
+from log_index_cache import IndexCache
+from log_encoding import sniff_encoding
+from log_line_store import LineStore, DEFAULT_MAX_BYTES as LINE_STORE_MAX_BYTES
+from log_trigram_index import TrigramIndex
+from log_rotation import RotatedLogStream, file_identity, rotated_siblings
+from log_archive import is_archive, open_log_file
+
+# Mesmo logger do visualizador (handlers configurados em log_viewer.py)
+app_logger = logging.getLogger("log_viewer")
+
+# Leitura incremental: blocos de tamanho fixo e teto de bytes por ciclo do event loop
+READ_CHUNK_SIZE = 1024 * 1024
+MAX_READ_BYTES_PER_STEP = 4 * READ_CHUNK_SIZE
+MAX_PARTIAL_LINE_BYTES = 4 * 1024 * 1024
+PARTIAL_LINE_TIMEOUT = 2.0 # Segundos sem crescimento até exibir uma linha sem '\n' final
+
+# Intervalo de verificação de cada arquivo (ms): volta ao mínimo quando o arquivo muda e
+# dobra a cada verificação sem novidade, até o máximo (o watcher antecipa a verificação)
+POLL_INTERVAL_MIN = 200
+POLL_INTERVAL_MAX = 2000
+
+# Crescimento do trecho indexado que justifica regravar o índice em disco durante o tail
+INDEX_CACHE_SAVE_MIN_BYTES = 16 * 1024 * 1024
+# Sufixo da chave do índice em disco quando ele cobre também os arquivos rotacionados
+ROTATED_INDEX_CACHE_SUFFIX = "+rotacionados"
+# Espera pela thread de leitura ao parar o motor antes de registrar o atraso no log (ms)
+STOP_WARNING_TIMEOUT = 2000
+
+
+class TailedFile(QtCore.QObject):
+    """
+    Um arquivo acompanhado pelo TailEngine, compartilhado por todos os visualizadores que o
+    exibem: handle, posição de leitura, LineStore, índice de linhas e índice de trigramas.
+
+    Vive na thread do motor. Cada verificação (`poll`) lê o que o arquivo cresceu e avisa
+    por `lines_appended` a faixa de seqs adicionada; filtro e exibição ficam com cada
+    LogFileReader.
+    """
+    lines_appended = QtCore.pyqtSignal(object, object) # Primeiro seq, fim (exclusivo) das linhas novas
+    error_occurred = QtCore.pyqtSignal(str)
+    index_progress = QtCore.pyqtSignal(int, int) # Linhas indexadas, percentual do arquivo
+    status_message = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, watcher, file_encodings, index_cache, max_store_bytes=LINE_STORE_MAX_BYTES, parent=None,
+                 stop_event=None):
+        super().__init__(parent)
+        self.path = path
+        self._stop_event = stop_event or threading.Event() # Motor parando: leituras longas param no próximo bloco
+        self._watcher = watcher # QFileSystemWatcher do motor, compartilhado entre os arquivos
+        self._file_encodings = file_encodings # Codificação detectada de cada caminho (do motor)
+        self._index_cache = index_cache
+        self.file_handle = None
+        self._file_identity = None # Identidade do arquivo aberto em file_handle (ver file_identity)
+        self._file_missing = False # Caminho sumiu (rotação em andamento); aguardando o novo arquivo
+        self.archive = is_archive(path) # Compactado (.gz/.zip): lido em fluxo, sem acompanhar o final
+        self.current_position = 0
+        self.read_pending = False # A última verificação parou no teto de bytes: ainda há o que ler
+        self._partial_line = b"" # Final de linha ainda sem '\n', aguardando o resto da escrita
+        self._partial_line_since = 0.0
+
+        self._line_store = LineStore(max_bytes=max_store_bytes)
+
+        # Índice esparso de linhas do arquivo inteiro, construído em segundo plano
+        self._line_index = LineOffsetIndex()
+        self._index_handle = None
+        self._index_timer = QtCore.QTimer(self)
+        self._index_timer.setInterval(0)
+        self._index_timer.timeout.connect(self._extend_line_index)
+        self._index_saved_bytes = 0
+        # Navegação pelo histórico: o índice cobre os rotacionados (.1, .2, ...) e o log atual
+        self._include_rotated = False
+
+        # Índice de trigramas das linhas em memória: só começa a ser construído no primeiro
+        # filtro/busca por texto e depois acompanha as linhas novas
+        self._text_index = TrigramIndex()
+        self._text_index_enabled = False
+        self._text_index_timer = QtCore.QTimer(self)
+        self._text_index_timer.setInterval(0)
+        self._text_index_timer.timeout.connect(self._extend_text_index)
+
+        self._debug_mode = True
+
+    @property
+    def line_store(self):
+        """LineStore com as linhas lidas; seguro para leitura a partir de outras threads."""
+        return self._line_store
+
+    @property
+    def text_index(self):
+        """TrigramIndex das linhas do LineStore; consultas são seguras a partir de outras threads."""
+        return self._text_index
+
+    @property
+    def line_index(self):
+        return self._line_index
+
+    @property
+    def index_handle(self):
+        """Fonte percorrida pelo índice de linhas (arquivo atual ou histórico), ou None."""
+        return self._index_handle
+
+    def _log_debug(self, message):
+        if self._debug_mode:
+            app_logger.debug(f"[TailedFile {os.path.basename(self.path)}] {message}")
+
+    def open(self):
+        """Abre o arquivo e lê as linhas iniciais; levanta a exceção se não for possível."""
+        self.file_handle = open_log_file(self.path)
+        try:
+            self._file_identity = file_identity(os.fstat(self.file_handle.fileno()))
+            self._detect_encoding()
+            self._line_store.append_text(f"--- Monitorando log: {os.path.basename(self.path)} ---")
+            self._line_store.append_text(f"--- Data/Hora Início: {QtCore.QDateTime.currentDateTime().toString('yyyy-MM-dd HH:mm:ss')} ---")
+            if self.archive:
+                self._log_debug("Arquivo compactado: não será acompanhado (não cresce).")
+                self._read_archive_head()
+            else:
+                self._read_initial_lines()
+                self._watch()
+        except Exception:
+            self.file_handle.close()
+            self.file_handle = None
+            raise
+        self._start_line_index()
+        self._schedule_text_index_update()
+        self._log_debug(f"Aberto. Posição inicial: {self.current_position}")
+
+    def close(self):
+        """Grava o índice em disco e fecha os handles (o último visualizador saiu)."""
+        self._index_timer.stop()
+        self._text_index_timer.stop()
+        if self._index_handle:
+            self._save_line_index(force=True)
+            self._index_handle.close()
+            self._index_handle = None
+        if self.file_handle:
+            self.file_handle.close()
+            self.file_handle = None
+        if self.path in self._watcher.files():
+            self._watcher.removePath(self.path)
+        self._log_debug("Fechado.")
+
+    def _watch(self):
+        # Após uma rotação o watcher acompanhava o arquivo renomeado: passa a observar o novo
+        if self.path in self._watcher.files():
+            self._watcher.removePath(self.path)
+        self._watcher.addPath(self.path)
+
+    def _read_initial_lines(self, num_lines=1000):
+        """Lê as últimas N linhas do arquivo de log na abertura."""
+        # Varredura reversa: lê apenas os bytes das últimas N linhas
+        file_size = file_size_of(self.file_handle)
+        start_position = find_tail_offset(self.file_handle, num_lines, file_size)
+        self._log_debug(f"Últimas {num_lines} linhas começam na posição: {start_position}")
+
+        self.file_handle.seek(start_position)
+        raw_lines = self.file_handle.read(file_size - start_position).split(b'\n')
+        # Uma última linha sem '\n' pode estar no meio de uma escrita: fica aguardando o resto
+        self._set_partial_line(raw_lines.pop())
+        for raw_line in raw_lines:
+            self._line_store.append_raw(raw_line.strip())
+        self._line_store.append_text("--- Fim das linhas iniciais. Monitorando novas entradas ---")
+
+        # O que for escrito depois da varredura será lido pelas próximas verificações
+        self.current_position = file_size
+
+    def _read_archive_head(self, num_lines=1000):
+        """
+        Arquivo compactado: guarda as primeiras N linhas, pois chegar ao final exigiria
+        descomprimir o arquivo inteiro. O restante é navegável pelo índice, construído em
+        segundo plano junto com os checkpoints de descompressão.
+        """
+        self.file_handle.seek(0)
+        for _ in range(num_lines):
+            raw_line = self.file_handle.readline()
+            if not raw_line:
+                break
+            self._line_store.append_raw(raw_line.rstrip(b'\n').strip())
+        self._line_store.append_text("--- Arquivo compactado: exibindo as primeiras linhas. "
+                                     "Use 'Ir para' (linha, % ou hora) para navegar pelo restante. ---")
+
+    def _detect_encoding(self):
+        """
+        Define a codificação usada para decodificar as linhas do arquivo: detectada na
+        primeira abertura (sniff_encoding) e reaproveitada nas seguintes.
+        """
+        encoding = self._file_encodings.get(self.path)
+        if encoding is None:
+            try:
+                encoding = sniff_encoding(self.file_handle, sample_tail=not self.archive)
+            except OSError as e:
+                self._log_debug(f"Falha ao detectar a codificação, usando UTF-8: {e}")
+                encoding = 'utf-8'
+            self._file_encodings[self.path] = encoding
+            self._log_debug(f"Codificação detectada: {encoding}")
+        self._line_store.encoding = encoding
+
+    # --- Acompanhamento do final do arquivo ---
+    def _set_partial_line(self, data):
+        self._partial_line = data
+        self._partial_line_since = time.monotonic()
+
+    def _consume_chunk(self, chunk):
+        """Separa as linhas completas de um bloco lido, guardando o final incompleto."""
+        raw_lines = (self._partial_line + chunk).split(b'\n')
+        remainder = raw_lines.pop()
+        if len(remainder) > MAX_PARTIAL_LINE_BYTES:
+            # Linha gigante sem quebra: entrega o que já chegou para manter a memória limitada
+            raw_lines.append(remainder)
+            remainder = b""
+        if remainder != self._partial_line or raw_lines:
+            self._set_partial_line(remainder)
+
+        lines_added = 0
+        for raw_line in raw_lines:
+            raw_line = raw_line.strip()
+            if raw_line: # Adiciona apenas linhas não vazias
+                self._line_store.append_raw(raw_line)
+                lines_added += 1
+        return lines_added
+
+    def _flush_stale_partial_line(self):
+        """Entrega a linha incompleta se o arquivo ficou parado tempo suficiente (escrita sem '\n' final)."""
+        if self._partial_line and time.monotonic() - self._partial_line_since >= PARTIAL_LINE_TIMEOUT:
+            self._finish_partial_line()
+
+    def _finish_partial_line(self):
+        """Entrega a linha incompleta: o trecho do arquivo onde ela estava terminou."""
+        raw_line = self._partial_line.strip()
+        self._partial_line = b""
+        if raw_line:
+            self._line_store.append_raw(raw_line)
+
+    def _stat_log_path(self):
+        """os.stat do caminho monitorado, ou None se ele não existir (ex.: entre renomear e recriar)."""
+        try:
+            return os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+    def poll(self):
+        """
+        Verifica o arquivo e lê o que ele cresceu (no máximo MAX_READ_BYTES_PER_STEP; com
+        `read_pending` o restante fica para a próxima verificação). Retorna True se o arquivo
+        mudou (crescimento, truncamento ou rotação). As linhas novas são avisadas por
+        `lines_appended`.
+        """
+        if not self.file_handle or self.archive:
+            return False
+        first_seq = self._line_store.next_seq
+        changed = False
+        try:
+            path_stat = self._stat_log_path()
+            if (not self.read_pending and path_stat is not None
+                    and file_identity(path_stat) == self._file_identity
+                    and path_stat.st_size == self.current_position):
+                self._flush_stale_partial_line()
+            elif not self._file_missing or path_stat is not None:
+                self._read_new_lines(path_stat)
+                changed = True
+        except PermissionError as e:
+            self.read_pending = False
+            self.error_occurred.emit(f"Erro de permissão ao ler novas linhas: {e}. "
+                                     f"Verifique se o arquivo está sendo usado por outro programa.")
+            self._log_debug(f"ERRO de Permissão: {e}")
+            # Não para o acompanhamento, pois pode ser um problema temporário
+        except Exception as e:
+            self.read_pending = False
+            self.error_occurred.emit(f"Erro inesperado ao ler novas linhas: {e}")
+            self._log_debug(f"ERRO: {e}")
+        if self._line_store.next_seq > first_seq:
+            self.lines_appended.emit(first_seq, self._line_store.next_seq)
+        return changed
+
+    def _read_new_lines(self, path_stat):
+        # A identidade do arquivo (e não só o caminho) diz se ele foi rotacionado: o handle
+        # aberto continua lendo o arquivo antigo até esgotá-lo, e só então a leitura passa
+        # para o arquivo novo com o mesmo nome
+        rotated = path_stat is None or file_identity(path_stat) != self._file_identity
+        if not rotated and path_stat.st_size < self.current_position:
+            self._handle_file_truncation()
+
+        self.read_pending = self._read_step()
+        if self.read_pending or not rotated:
+            return
+        if path_stat is None:
+            if not self._file_missing:
+                self._file_missing = True
+                self._finish_partial_line()
+                self.status_message.emit(f"Arquivo '{os.path.basename(self.path)}' foi movido ou "
+                                         f"excluído; aguardando um novo arquivo com o mesmo nome.")
+        elif self._follow_rotated_file():
+            self._file_missing = False
+            self.read_pending = True
+
+    def _read_step(self):
+        """
+        Consome o crescimento do arquivo em blocos de tamanho fixo, com um teto por passo;
+        retorna True se ainda há bytes a ler.
+        """
+        self.file_handle.seek(self.current_position)
+        bytes_this_step = 0
+        lines_read = 0
+        while bytes_this_step < MAX_READ_BYTES_PER_STEP and not self._stop_event.is_set():
+            chunk = self.file_handle.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            bytes_this_step += len(chunk)
+            self.current_position += len(chunk)
+            lines_read += self._consume_chunk(chunk)
+
+        self.schedule_line_index_update()
+        self._schedule_text_index_update()
+
+        if bytes_this_step:
+            self._log_debug(f"Lidas {lines_read} novas linhas. Nova posição: {self.current_position} bytes.")
+        return self.current_position < file_size_of(self.file_handle)
+
+    def _handle_file_truncation(self):
+        """
+        Arquivo truncado no lugar (ex.: rotação por cópia + truncamento): a leitura continua
+        do início do conteúdo novo, mantendo as linhas já lidas.
+        """
+        self._log_debug("Arquivo truncado detectado! Continuando do início.")
+        self._finish_partial_line()
+        self.current_position = 0
+        self._file_encodings.pop(self.path, None) # Conteúdo novo: detecta de novo
+        self._detect_encoding()
+        self._line_store.append_text("--- Arquivo de log truncado/resetado. Continuando do início. ---")
+        self._start_line_index()
+
+    def _follow_rotated_file(self):
+        """
+        O caminho passou a apontar para outro arquivo (rotação por renomeação): depois de
+        esgotado o arquivo antigo, a leitura continua no novo, do início, sem recarregar.
+        """
+        old_name = os.path.basename(self.path)
+        self._finish_partial_line()
+        try:
+            new_handle = open(self.path, 'rb')
+        except OSError as e:
+            self._log_debug(f"Novo arquivo ainda não pode ser aberto, tentando na próxima verificação: {e}")
+            return False
+        self.file_handle.close()
+        self.file_handle = new_handle
+        self._file_identity = file_identity(os.fstat(new_handle.fileno()))
+        self.current_position = 0
+        self._file_encodings.pop(self.path, None)
+        self._detect_encoding()
+        self._watch()
+        self._line_store.append_text(f"--- Log rotacionado: continuando no novo {old_name} ---")
+        self._log_debug("Rotação detectada; seguindo o novo arquivo.")
+        self.status_message.emit(f"Log rotacionado: seguindo o novo {old_name}.")
+        self._start_line_index(keep_if_extended=True)
+        return True
+
+    # --- Índice de linhas e navegação pelo arquivo inteiro ---
+    def _open_index_source(self):
+        """
+        Abre o que o índice de linhas percorre: o arquivo atual ou, com o histórico ativo,
+        um RotatedLogStream dos rotacionados seguidos do arquivo atual.
+        """
+        if self._include_rotated:
+            try:
+                siblings = rotated_siblings(self.path)
+            except OSError as e:
+                siblings = []
+                self._log_debug(f"Não foi possível listar os arquivos rotacionados: {e}")
+            if siblings:
+                return RotatedLogStream(siblings + [self.path])
+        return open_log_file(self.path)
+
+    @staticmethod
+    def _source_identities(source):
+        identities = getattr(source, "identities", None)
+        return identities if identities is not None else [file_identity(os.fstat(source.fileno()))]
+
+    def _index_cache_key(self):
+        if isinstance(self._index_handle, RotatedLogStream):
+            return self.path + ROTATED_INDEX_CACHE_SUFFIX
+        return self.path
+
+    def _start_line_index(self, keep_if_extended=False):
+        """
+        (Re)inicia a construção do índice de linhas do arquivo. Com `keep_if_extended`
+        (após uma rotação), o índice é mantido se a fonte nova só acrescenta arquivos ao
+        final da anterior: no histórico, o log antigo virou o último rotacionado.
+        """
+        old_identities = None
+        if self._index_handle:
+            if keep_if_extended:
+                old_identities = self._source_identities(self._index_handle)
+            self._index_handle.close()
+            self._index_handle = None
+        try:
+            self._index_handle = self._open_index_source()
+        except Exception as e:
+            self._line_index.reset()
+            self._index_saved_bytes = 0
+            self._log_debug(f"Não foi possível abrir o arquivo para indexação: {e}")
+            return
+        new_identities = self._source_identities(self._index_handle)
+        if old_identities and new_identities[:len(old_identities)] == old_identities:
+            self._log_debug(f"Índice de linhas mantido após a rotação ({self._line_index.line_count} linhas).")
+        else:
+            self._line_index.reset()
+            self._index_saved_bytes = 0
+            self._load_cached_line_index()
+        self._index_timer.start()
+
+    def set_include_rotated(self, include):
+        """Liga/desliga a navegação pelo histórico (arquivos rotacionados + arquivo atual)."""
+        if include == self._include_rotated:
+            return
+        self._include_rotated = include
+        if not self.file_handle:
+            return
+        self._save_line_index(force=True)
+        self._start_line_index()
+        if isinstance(self._index_handle, RotatedLogStream):
+            members = len(self._index_handle.paths) - 1
+            self.status_message.emit(f"Histórico: {members} arquivo(s) rotacionado(s) incluídos na navegação "
+                                     f"({file_size_of(self._index_handle) / (1024 * 1024):.1f} MB).")
+        elif include:
+            self.status_message.emit("Nenhum arquivo rotacionado encontrado para este log.")
+
+    def _load_cached_line_index(self):
+        """Retoma o índice gravado em disco, se ainda valer para o arquivo (ver IndexCache)."""
+        cached = self._index_cache.load(self._index_cache_key(), self._index_handle)
+        if cached is None:
+            return
+        meta, sections = cached
+        checkpoints = sections.get("line_checkpoints")
+        if checkpoints is not None and self._line_index.restore(checkpoints, meta, meta["indexed_bytes"]):
+            self._index_saved_bytes = self._line_index.indexed_bytes
+            self._log_debug(f"Índice de linhas recuperado do cache: {self._line_index.line_count} linhas, "
+                            f"{self._line_index.indexed_bytes} bytes.")
+
+    def _save_line_index(self, force=False):
+        """Grava o índice em disco quando avançou o bastante (ou sempre que `force`, ao fechar)."""
+        indexed_bytes = self._line_index.indexed_bytes
+        if not self._index_handle or not indexed_bytes or indexed_bytes == self._index_saved_bytes:
+            return
+        if not force and abs(indexed_bytes - self._index_saved_bytes) < INDEX_CACHE_SAVE_MIN_BYTES:
+            return
+        checkpoints, meta = self._line_index.state()
+        if self._index_cache.save(self._index_cache_key(), self._index_handle, indexed_bytes,
+                                  {"line_checkpoints": checkpoints}, **meta):
+            self._index_saved_bytes = indexed_bytes
+
+    def index_complete(self):
+        return self._index_handle is not None and self._line_index.is_complete(file_size_of(self._index_handle))
+
+    def schedule_line_index_update(self):
+        """Retoma a indexação quando o arquivo cresce além do que já foi indexado."""
+        if self._index_handle and not self._index_timer.isActive():
+            self._index_timer.start()
+
+    @QtCore.pyqtSlot()
+    def _extend_line_index(self):
+        """Indexa o próximo trecho do arquivo; roda em passos curtos para não atrasar o tail."""
+        if not self._index_handle or self._stop_event.is_set():
+            self._index_timer.stop()
+            return
+        try:
+            file_size = file_size_of(self._index_handle)
+            if file_size < self._line_index.indexed_bytes:
+                self._line_index.reset() # Arquivo truncado: recomeça o índice
+                self._index_saved_bytes = 0
+            self._line_index.extend_from_file(self._index_handle)
+            if self._line_index.is_complete(file_size):
+                self._index_timer.stop()
+                self._save_line_index()
+            percent = 100 if not file_size else int(self._line_index.indexed_bytes * 100 / file_size)
+            self.index_progress.emit(self._line_index.line_count, percent)
+        except Exception as e:
+            self._index_timer.stop()
+            self._log_debug(f"Erro ao indexar linhas do arquivo: {e}")
+
+    # --- Índice de trigramas (busca e filtro por texto) ---
+    def request_text_index(self):
+        """Passa a construir e manter o índice de trigramas (chamado no primeiro uso)."""
+        self._text_index_enabled = True
+        self._schedule_text_index_update()
+
+    def _schedule_text_index_update(self):
+        if (self._text_index_enabled and not self._text_index_timer.isActive()
+                and self._text_index.has_pending_blocks(self._line_store)):
+            self._text_index_timer.start()
+
+    @QtCore.pyqtSlot()
+    def _extend_text_index(self):
+        """Indexa alguns blocos de linhas por vez, devolvendo o controle ao event loop entre passos."""
+        try:
+            if not self._text_index.extend(self._line_store):
+                self._text_index_timer.stop()
+        except Exception as e:
+            self._text_index_timer.stop()
+            self._log_debug(f"Erro ao construir o índice de trigramas: {e}")
+
+
+class TailEngine(QtCore.QObject):
+    """
+    Thread única de leitura de todos os visualizadores. Os LogFileReader são movidos para
+    ela (`attach`) e pedem os arquivos com `acquire`: visualizadores do mesmo arquivo
+    recebem o mesmo TailedFile (contagem de referências), com um só handle e um só LineStore.
+
+    Um único QTimer de disparo único atende a todos os arquivos pela ordem do próximo
+    vencimento. Cada arquivo tem seu próprio intervalo: POLL_INTERVAL_MIN enquanto cresce,
+    dobrando a cada verificação sem novidade até POLL_INTERVAL_MAX; um aviso do watcher ou
+    uma leitura interrompida pelo teto de bytes antecipa a próxima verificação.
+    """
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Motor compartilhado; criado na thread da UI no primeiro uso."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self._thread = QtCore.QThread()
+        self._viewers = 0
+        self._files = {} # Caminho normalizado -> TailedFile
+        self._refcounts = {} # TailedFile -> visualizadores que o usam
+        self._intervals = {} # TailedFile -> intervalo atual de verificação (ms)
+        self._due = {} # TailedFile -> instante (time.monotonic) da próxima verificação
+        # Estado compartilhado entre os arquivos: codificações detectadas e índices em disco
+        self._file_encodings = {}
+        self._index_cache = IndexCache()
+        # Pedido de parada da thread: as leituras em andamento param no próximo bloco
+        self._stop_event = threading.Event()
+
+        # Filhos do motor: moveToThread os leva junto para a thread de leitura
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+        self._scheduler = QtCore.QTimer(self)
+        self._scheduler.setSingleShot(True)
+        self._scheduler.timeout.connect(self._poll_due_files)
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            # Direta: roda na thread da UI, que é quem pode esperar a thread do motor terminar
+            app.aboutToQuit.connect(self._stop_thread, QtCore.Qt.DirectConnection)
+
+    # --- Chamados da thread da UI ---
+    def attach(self, reader):
+        """Move um LogFileReader para a thread do motor, iniciando-a se necessário."""
+        if not self._thread.isRunning():
+            # Parado, o motor fica na thread da UI (ver _stop_thread); volta para a de leitura
+            self._stop_event.clear()
+            self.moveToThread(self._thread)
+            self._thread.start()
+            app_logger.debug("[TailEngine] Thread de leitura iniciada.")
+        reader.moveToThread(self._thread)
+        self._viewers += 1
+
+    def detach(self, reader):
+        """Para o LogFileReader (liberando seus arquivos) e encerra a thread se era o último."""
+        if self._thread.isRunning():
+            # Executa stop_monitoring na thread dona dos timers, aguardando a conclusão
+            QtCore.QMetaObject.invokeMethod(reader, "stop_monitoring", QtCore.Qt.BlockingQueuedConnection)
+        reader.deleteLater()
+        self._viewers -= 1
+        if self._viewers <= 0:
+            self._viewers = 0
+            self._stop_thread()
+
+    def _stop_thread(self):
+        if self._thread.isRunning():
+            # Parada cooperativa: a leitura em andamento para no próximo bloco (sem terminate,
+            # que poderia matar a thread com o lock do LineStore ou um arquivo aberto)
+            self._stop_event.set()
+            # Traz o motor (e seus timers) de volta à thread da UI antes de parar a de leitura:
+            # timers de uma thread encerrada não podem ser parados nem destruídos de outra
+            QtCore.QMetaObject.invokeMethod(self, "_move_to_main_thread", QtCore.Qt.BlockingQueuedConnection)
+            self._thread.quit()
+            if not self._thread.wait(STOP_WARNING_TIMEOUT):
+                app_logger.warning("[TailEngine] A thread de leitura está demorando para encerrar; aguardando.")
+                self._thread.wait()
+            app_logger.debug("[TailEngine] Thread de leitura encerrada.")
+
+    # --- Chamados na thread do motor (slots dos LogFileReader) ---
+    @QtCore.pyqtSlot()
+    def _move_to_main_thread(self):
+        self._scheduler.stop()
+        self.moveToThread(QtCore.QCoreApplication.instance().thread())
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def acquire(self, path, max_store_bytes=LINE_STORE_MAX_BYTES):
+        """
+        TailedFile de `path`, aberto e agendado no primeiro pedido; os pedidos seguintes
+        recebem o mesmo objeto. Levanta a exceção da abertura se o arquivo não puder ser lido.
+        """
+        key = self._key(path)
+        tailed = self._files.get(key)
+        if tailed is None:
+            tailed = TailedFile(path, self.watcher, self._file_encodings, self._index_cache, max_store_bytes, parent=self,
+                                stop_event=self._stop_event)
+            try:
+                tailed.open()
+            except Exception:
+                tailed.deleteLater()
+                raise
+            self._files[key] = tailed
+            self._refcounts[tailed] = 0
+            if not tailed.archive:
+                self._schedule(tailed, POLL_INTERVAL_MIN)
+            app_logger.debug(f"[TailEngine] Acompanhando {path} ({len(self._files)} arquivo(s)).")
+        self._refcounts[tailed] += 1
+        return tailed
+
+    def release(self, tailed):
+        """Devolve um TailedFile; o último visualizador a sair fecha o arquivo."""
+        self._refcounts[tailed] -= 1
+        if self._refcounts[tailed] > 0:
+            return
+        del self._refcounts[tailed]
+        self._files.pop(self._key(tailed.path), None)
+        self._intervals.pop(tailed, None)
+        self._due.pop(tailed, None)
+        self._arm_scheduler()
+        tailed.close()
+        tailed.deleteLater()
+        app_logger.debug(f"[TailEngine] {tailed.path} liberado ({len(self._files)} arquivo(s)).")
+
+    def _schedule(self, tailed, interval):
+        self._intervals[tailed] = interval
+        self._due[tailed] = time.monotonic() + interval / 1000
+        self._arm_scheduler()
+
+    def _arm_scheduler(self):
+        if not self._due:
+            self._scheduler.stop()
+            return
+        delay = min(self._due.values()) - time.monotonic()
+        self._scheduler.start(max(0, int(delay * 1000 + 0.999)))
+
+    @QtCore.pyqtSlot()
+    def _poll_due_files(self):
+        now = time.monotonic()
+        for tailed in [tailed for tailed, due in self._due.items() if due <= now]:
+            if self._stop_event.is_set():
+                return # Parando: _move_to_main_thread desarma o agendador
+            if tailed not in self._due:
+                continue # Liberado durante esta rodada
+            changed = tailed.poll()
+            if tailed.read_pending:
+                interval = 0 # Continua no próximo ciclo do event loop, depois dos outros arquivos
+            elif changed:
+                interval = POLL_INTERVAL_MIN
+            else:
+                interval = min(max(self._intervals[tailed], POLL_INTERVAL_MIN) * 2, POLL_INTERVAL_MAX)
+            self._intervals[tailed] = interval
+            self._due[tailed] = time.monotonic() + interval / 1000
+        self._arm_scheduler()
+
+    @QtCore.pyqtSlot(str)
+    def _on_file_changed(self, path):
+        """Aviso do QFileSystemWatcher: verifica o arquivo já, sem esperar o intervalo."""
+        tailed = self._files.get(self._key(path))
+        if tailed is not None and tailed in self._due:
+            self._schedule(tailed, 0)
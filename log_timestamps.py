@@ -0,0 +1,70 @@
+# log_timestamps.py
+"""
+Reconhecimento do timestamp no início das linhas de log dos serviços.
+"""
+
+from datetime import date, datetime, time
+import re
+
+# Timestamps aceitos no início da linha (após espaços/colchetes opcionais):
+#   2025-07-14 14:32:10,123   2025-07-14T14:32:10.123   2025/07/14 14:32:10
+#   14/07/2025 14:32:10       14-07-2025 14:32          14:32:10.123 (só hora)
+_TIMESTAMP_PATTERN = (
+    r"(?:(?:(?P<y1>\d{4})[-/.](?P<m1>\d{1,2})[-/.](?P<d1>\d{1,2})"
+    r"|(?P<d2>\d{1,2})[-/.](?P<m2>\d{1,2})[-/.](?P<y2>\d{4}))[T\s]+)?"
+    r"(?P<H>\d{1,2}):(?P<M>\d{2})(?::(?P<S>\d{2}))?(?:[.,](?P<f>\d{1,6}))?"
+)
+_LEADING_TIMESTAMP_RE = re.compile(r"[\s\[\(]*" + _TIMESTAMP_PATTERN)
+_USER_TIMESTAMP_RE = re.compile(_TIMESTAMP_PATTERN + r"$")
+
+
+def _build_timestamp(match):
+    """Converte um match em (date ou None, time). Retorna None se os valores forem inválidos."""
+    try:
+        hour, minute = int(match.group("H")), int(match.group("M"))
+        second = int(match.group("S") or 0)
+        fraction = match.group("f")
+        microsecond = int(fraction.ljust(6, "0")) if fraction else 0
+        time_of_day = time(hour, minute, second, microsecond)
+        if match.group("y1"):
+            day = date(int(match.group("y1")), int(match.group("m1")), int(match.group("d1")))
+        elif match.group("y2"):
+            day = date(int(match.group("y2")), int(match.group("m2")), int(match.group("d2")))
+        else:
+            day = None
+    except ValueError:
+        return None
+    return day, time_of_day
+
+
+def parse_line_timestamp(line):
+    """
+    Retorna (date ou None, time) do timestamp no início da linha, ou None se não houver.
+    A data é None quando o serviço grava apenas a hora.
+    """
+    match = _LEADING_TIMESTAMP_RE.match(line)
+    if not match:
+        return None
+    return _build_timestamp(match)
+
+
+def parse_user_timestamp(text):
+    """Interpreta um horário digitado pelo usuário ('14:00', '2025-07-14T14:00', '14/07/2025 14:00')."""
+    match = _USER_TIMESTAMP_RE.match(text.strip())
+    if not match:
+        return None
+    return _build_timestamp(match)
+
+
+def compare_timestamps(line_stamp, reference):
+    """
+    Compara dois (date ou None, time): -1, 0 ou 1. As datas só entram na comparação
+    quando os dois lados têm data; caso contrário compara-se apenas a hora do dia.
+    """
+    line_day, line_time = line_stamp
+    ref_day, ref_time = reference
+    if line_day is not None and ref_day is not None:
+        left, right = datetime.combine(line_day, line_time), datetime.combine(ref_day, ref_time)
+    else:
+        left, right = line_time, ref_time
+    return (left > right) - (left < right)
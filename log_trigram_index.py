@@ -0,0 +1,153 @@
+# log_trigram_index.py
+"""
+Índice de trigramas das linhas do LineStore, para busca e filtro por substring.
+"""
+
+from array import array
+from bisect import bisect_left
+import sys
+import threading
+
+from log_encoding import DECODE_ERRORS
+
+# Linhas por bloco: o índice aponta blocos (não linhas), que depois são verificados linha a linha
+BLOCK_LINES = 1024
+# Blocos indexados por passo de construção (o restante fica para o próximo ciclo do event loop)
+BLOCKS_PER_STEP = 4
+# Blocos descartados pelo LineStore acumulados antes de limpar as listas de postings
+PRUNE_MIN_BLOCKS = 64
+
+
+def _text_trigrams(text):
+    """Trigramas do texto (já em minúsculas) como inteiros dos 3 bytes UTF-8."""
+    data = text.encode('utf-8') + b"\n\n\n" # Preenchimento: os trigramas do final também entram
+    view = memoryview(data)
+    size = len(data)
+    # Os bytes são lidos como inteiros de 4 bytes, em C: cada 4-grama contém os trigramas de
+    # duas posições seguidas, então as leituras a partir dos offsets 0 e 2 cobrem todas elas
+    grams = set(view[:size // 4 * 4].cast('I'))
+    grams.update(view[2:2 + (size - 2) // 4 * 4].cast('I'))
+    trigrams = {gram & 0xFFFFFF for gram in grams}
+    trigrams.update(gram >> 8 for gram in grams)
+    return trigrams
+
+
+def _literal_trigrams(literal):
+    data = literal.encode('utf-8')
+    return {int.from_bytes(data[i:i + 3], sys.byteorder) for i in range(len(data) - 2)}
+
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama -> blocos de linhas do LineStore que o contêm.
+
+    É construído em passos (`extend`) pela thread de leitura, sobre os blocos completos
+    de BLOCK_LINES linhas, e consultado de outras threads (filtro e busca). As linhas
+    são indexadas em minúsculas, como as compara a CompiledQuery; as linhas ainda não
+    indexadas (bloco final incompleto, construção em andamento) são sempre candidatas.
+    """
+
+    def __init__(self, block_lines=BLOCK_LINES):
+        self.block_lines = block_lines
+        self._lock = threading.Lock()
+        self._postings = {} # trigrama -> array('I') crescente de números de bloco
+        self._indexed_end = 0 # Seqs abaixo deste valor estão indexados (ou já descartados)
+        self._first_block = 0 # Blocos abaixo deste já foram removidos das postings
+
+    @property
+    def indexed_end(self):
+        return self._indexed_end
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._indexed_end = 0
+            self._first_block = 0
+
+    def has_pending_blocks(self, line_store):
+        start = max(self._indexed_end, line_store.first_seq)
+        return (start // self.block_lines + 1) * self.block_lines <= line_store.next_seq
+
+    def extend(self, line_store, max_blocks=BLOCKS_PER_STEP):
+        """Indexa até `max_blocks` blocos completos. Retorna True se ainda restam blocos completos."""
+        block_lines = self.block_lines
+        for _ in range(max_blocks):
+            start = max(self._indexed_end, line_store.first_seq)
+            block = start // block_lines
+            end = (block + 1) * block_lines
+            if end > line_store.next_seq:
+                break
+            raw_lines = [raw for _, raw in line_store.raw_lines(start, end)]
+            text = b"\n".join(raw_lines).decode(line_store.encoding, DECODE_ERRORS).lower()
+            trigrams = _text_trigrams(text)
+            with self._lock:
+                postings = self._postings
+                for trigram in trigrams:
+                    blocks = postings.get(trigram)
+                    if blocks is None:
+                        postings[trigram] = blocks = array('I')
+                    blocks.append(block)
+                self._indexed_end = end
+        self._prune_evicted(line_store.first_seq // block_lines)
+        return self.has_pending_blocks(line_store)
+
+    def _prune_evicted(self, first_block):
+        """Remove das postings os blocos cujas linhas o LineStore já descartou."""
+        if first_block - self._first_block < PRUNE_MIN_BLOCKS:
+            return
+        with self._lock:
+            for trigram in list(self._postings):
+                blocks = self._postings[trigram]
+                del blocks[:bisect_left(blocks, first_block)]
+                if not blocks:
+                    del self._postings[trigram]
+            self._first_block = first_block
+
+    def candidate_ranges(self, literals, start_seq, end_seq):
+        """
+        Faixas [início, fim) de seqs dentro de [start_seq, end_seq) em que podem estar as
+        linhas que contêm todos os `literals` (em minúsculas). Retorna None se nenhum
+        literal tem 3 ou mais bytes: nesse caso o índice não ajuda e tudo é candidato.
+        """
+        trigrams = set()
+        for literal in literals:
+            trigrams |= _literal_trigrams(literal)
+        if not trigrams:
+            return None
+
+        with self._lock:
+            indexed_end = self._indexed_end
+            lists = []
+            for trigram in trigrams:
+                blocks = self._postings.get(trigram)
+                if blocks is None:
+                    lists = None # Trigrama ausente: nenhum bloco indexado serve
+                    break
+                lists.append(blocks)
+            if lists:
+                lists.sort(key=len)
+                candidate_blocks = set(lists[0])
+                for blocks in lists[1:]:
+                    candidate_blocks.intersection_update(blocks)
+                    if not candidate_blocks:
+                        break
+            else:
+                candidate_blocks = ()
+
+        block_lines = self.block_lines
+        ranges = []
+        for block in sorted(candidate_blocks):
+            low = max(block * block_lines, start_seq)
+            high = min((block + 1) * block_lines, end_seq, indexed_end)
+            if low < high:
+                if ranges and ranges[-1][1] == low:
+                    ranges[-1] = (ranges[-1][0], high)
+                else:
+                    ranges.append((low, high))
+        low = max(indexed_end, start_seq)
+        if low < end_seq:
+            if ranges and ranges[-1][1] == low:
+                ranges[-1] = (ranges[-1][0], end_seq)
+            else:
+                ranges.append((low, end_seq))
+        return ranges
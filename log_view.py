@@ -0,0 +1,250 @@
+# log_view.py
+"""
+Exibição virtualizada das linhas do log: modelo sobre o LineStore e delegate com realce.
+"""
+
+from array import array
+from bisect import bisect_left
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+# Limite de caracteres considerado na largura das linhas (rolagem horizontal e pintura)
+MAX_LINE_WIDTH_CHARS = 4096
+# Espaço à esquerda do texto de cada linha (px)
+LINE_PADDING = 4
+# Acima deste número de trechos alterados, trocar o conteúdo de uma vez sai mais barato
+MAX_DIFF_HUNKS = 512
+
+
+def _diff_hunks(old, new, max_hunks):
+    """
+    Compara dois arrays crescentes de seqs e retorna a lista de trechos alterados
+    (início_old, fim_old, início_new, fim_new), ou None se passar de `max_hunks`.
+    Em cada trecho, old[início_old:fim_old] é substituído por new[início_new:fim_new].
+    """
+    hunks = []
+    i = j = 0
+    old_len, new_len = len(old), len(new)
+    while i < old_len and j < new_len:
+        if old[i] == new[j]:
+            i += 1
+            j += 1
+            continue
+        start_i, start_j = i, j
+        while i < old_len and j < new_len and old[i] != new[j]:
+            if old[i] < new[j]:
+                i += 1
+            else:
+                j += 1
+        hunks.append((start_i, i, start_j, j))
+        if len(hunks) > max_hunks:
+            return None
+    if i < old_len or j < new_len:
+        hunks.append((i, old_len, j, new_len))
+    return hunks if len(hunks) <= max_hunks else None
+
+
+class LogLineModel(QtCore.QAbstractListModel):
+    """
+    Lista das linhas visíveis do log.
+
+    Guarda apenas o número de sequência (seq) de cada linha no LineStore do leitor; o
+    texto é decodificado sob demanda, só para as linhas que a view pinta. No modo de
+    navegação exibe uma lista de textos avulsa (trecho do arquivo lido pelo índice).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._store = None
+        self._seqs = array('Q')
+        self._texts = None # Lista de str quando exibindo um trecho avulso do arquivo
+        self._texts_max_length = 0
+
+    def set_line_store(self, line_store):
+        self.beginResetModel()
+        self._store = line_store
+        self._seqs = array('Q')
+        self._texts = None
+        self.endResetModel()
+
+    def line_store(self):
+        return self._store
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._texts) if self._texts is not None else len(self._seqs)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        return self.line_text(index.row())
+
+    def line_text(self, row):
+        if self._texts is not None:
+            return self._texts[row]
+        line = self._store.get_line(self._seqs[row]) if self._store is not None else None
+        return "" if line is None else line # Linha já descartada do LineStore
+
+    def seq_at(self, row):
+        """Seq da linha exibida em `row`, ou None no modo de navegação."""
+        return None if self._texts is not None else self._seqs[row]
+
+    def seqs(self):
+        """Cópia dos seqs exibidos (vazia no modo de navegação)."""
+        return array('Q') if self._texts is not None else array('Q', self._seqs)
+
+    def row_for_seq(self, seq):
+        """Primeira linha com seq >= `seq` (busca binária; os seqs são crescentes)."""
+        return bisect_left(self._seqs, seq)
+
+    def is_showing_file_window(self):
+        return self._texts is not None
+
+    def max_line_length(self):
+        """Estimativa do maior comprimento de linha (caracteres), para a largura da view."""
+        if self._texts is not None:
+            return self._texts_max_length
+        return self._store.max_line_bytes if self._store is not None else 0
+
+    def clear(self):
+        self.beginResetModel()
+        self._seqs = array('Q')
+        self._texts = None
+        self.endResetModel()
+
+    def set_seqs(self, seqs):
+        """Substitui todo o conteúdo (carga inicial, mudança de filtro, volta ao modo seguir)."""
+        self.beginResetModel()
+        self._texts = None
+        self._seqs = array('Q', seqs)
+        self.endResetModel()
+
+    def merge_seqs(self, seqs, lo=0, hi=None):
+        """
+        Substitui as linhas com seq em [lo, hi) (hi None = até o fim) por `seqs`,
+        aplicando só as remoções e inserções necessárias, para que a view mantenha a
+        seleção e a posição. Muitas alterações espalhadas viram uma troca completa.
+        Retorna False nesse caso (a view precisa reposicionar a rolagem).
+        """
+        if self._texts is not None:
+            self.set_seqs(seqs)
+            return False
+        self.drop_evicted()
+        start = bisect_left(self._seqs, lo)
+        stop = len(self._seqs) if hi is None else bisect_left(self._seqs, hi)
+        old = self._seqs[start:stop]
+        if old == seqs:
+            return True
+        hunks = _diff_hunks(old, seqs, MAX_DIFF_HUNKS)
+        if hunks is None:
+            merged = self._seqs[:start]
+            merged.extend(seqs)
+            merged.extend(self._seqs[stop:])
+            self.set_seqs(merged)
+            return False
+        parent = QtCore.QModelIndex()
+        for old_start, old_end, new_start, new_end in reversed(hunks): # Do fim para o início: índices válidos
+            row = start + old_start
+            if old_end > old_start:
+                self.beginRemoveRows(parent, row, start + old_end - 1)
+                del self._seqs[row:start + old_end]
+                self.endRemoveRows()
+            if new_end > new_start:
+                self.beginInsertRows(parent, row, row + new_end - new_start - 1)
+                self._seqs[row:row] = seqs[new_start:new_end]
+                self.endInsertRows()
+        return True
+
+    def drop_evicted(self):
+        """Remove do topo as linhas que o LineStore já descartou pelo teto de memória."""
+        if self._texts is not None or self._store is None:
+            return
+        count = bisect_left(self._seqs, self._store.first_seq)
+        if count:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, count - 1)
+            del self._seqs[:count]
+            self.endRemoveRows()
+
+    def set_text_lines(self, lines):
+        self.beginResetModel()
+        self._texts = list(lines)
+        self._texts_max_length = max((len(line) for line in self._texts), default=0)
+        self.endResetModel()
+
+
+class LogLineDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Pinta uma linha de log com os spans de realce do LogHighlighter. Cada trecho é
+    desenhado uma única vez com o formato que prevalece nele (a busca por cima das regras).
+    """
+
+    def __init__(self, highlighter, parent=None):
+        super().__init__(parent)
+        self._highlighter = highlighter
+
+    def sizeHint(self, option, index):
+        metrics = option.fontMetrics
+        chars = min(index.model().max_line_length(), MAX_LINE_WIDTH_CHARS)
+        return QtCore.QSize(metrics.horizontalAdvance("M") * chars + 2 * LINE_PADDING, metrics.height() + 2)
+
+    def _segments(self, text):
+        """Divide a linha em trechos (início, fim, formato ou None) sem sobreposição."""
+        spans = self._highlighter.spans(text)
+        if not spans:
+            return [(0, len(text), None)]
+        boundaries = {0, len(text)}
+        for start, length, _ in spans:
+            boundaries.add(start)
+            boundaries.add(start + length)
+        points = sorted(boundaries)
+        segments = []
+        for start, end in zip(points, points[1:]):
+            format = None
+            for span_start, span_length, span_format in spans: # O último span que cobre o trecho prevalece
+                if span_start <= start < span_start + span_length:
+                    format = span_format
+            segments.append((start, end, format))
+        return segments
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        painter.setClipRect(rect)
+        selected = bool(option.state & QtWidgets.QStyle.State_Selected)
+        if selected:
+            painter.fillRect(rect, option.palette.highlight())
+            base_color = option.palette.highlightedText().color()
+        else:
+            base_color = option.palette.text().color()
+
+        text = index.model().line_text(index.row())[:MAX_LINE_WIDTH_CHARS]
+        base_font = option.font
+        base_metrics = QtGui.QFontMetrics(base_font)
+        baseline = rect.y() + (rect.height() - base_metrics.height()) // 2 + base_metrics.ascent()
+        right_limit = option.widget.viewport().width() if option.widget else rect.right()
+        x = rect.x() + LINE_PADDING
+
+        for start, end, format in self._segments(text):
+            if x > right_limit:
+                break # O resto da linha está fora da área visível
+            segment = text[start:end]
+            font = base_font
+            color = base_color
+            if format is not None:
+                font = QtGui.QFont(base_font)
+                if format.fontWeight() >= QtGui.QFont.Bold:
+                    font.setBold(True)
+                if format.fontItalic():
+                    font.setItalic(True)
+                if not selected and format.hasProperty(QtGui.QTextFormat.ForegroundBrush):
+                    color = format.foreground().color()
+            metrics = QtGui.QFontMetrics(font) if font is not base_font else base_metrics
+            width = metrics.horizontalAdvance(segment)
+            if format is not None and not selected and format.hasProperty(QtGui.QTextFormat.BackgroundBrush):
+                painter.fillRect(QtCore.QRect(x, rect.y(), width, rect.height()), format.background())
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawText(x, baseline, segment)
+            x += width
+        painter.restore()
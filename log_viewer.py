@@ -6,6 +6,8 @@ from datetime import datetime
 import json
 import logging
 import stat
+from array import array
+from bisect import bisect_left, bisect_right
 
 # Configuração básica do logger para o módulo (opcional, pode ser centralizado)
 app_logger = logging.getLogger(__name__)
@@ -20,90 +22,167 @@ if not app_logger.handlers:
 # Importe as novas classes
 # Certifique-se de que log_highlighter.py e highlight_settings_dialog.py estão no mesmo diretório
 from log_highlighter import LogHighlighter
+from log_view import LINE_PADDING, MAX_LINE_WIDTH_CHARS, LogLineDelegate, LogLineModel
 from highlight_settings_dialog import HighlightSettingsDialog
+from log_io import find_time_offset
+from log_index import file_size_of
+from log_encoding import DECODE_ERRORS
+from log_line_store import LineStore, VisibleSeqFeed, DEFAULT_MAX_BYTES as LINE_STORE_MAX_BYTES
+from log_filter import FilterJob, make_filter_query
+from log_trigram_index import TrigramIndex
+from log_query import QuerySyntaxError, literal_query
+from log_timestamps import parse_user_timestamp
+from log_search import DirectorySearch
+from log_directory import DirectoryListing
+from log_file_stats import FileStatsService
+from log_file_tree import COLUMN_MTIME, COLUMN_NAME, LOG_FILE_PATH_ROLE, LogFileTreeModel
+from log_tail_engine import TailEngine
+
+# Janela de linhas lida ao navegar para uma linha/percentual do arquivo
+WINDOW_LINES = 1000
+WINDOW_CONTEXT_LINES = 100 # Linhas exibidas antes da linha alvo
+
+# Anexação de linhas na UI: no máximo um lote por quadro de tela, com teto de linhas
+DEFAULT_REFRESH_RATE = 60 # Hz, quando a tela não informa a taxa de atualização
+MAX_APPEND_ROWS_PER_FRAME = 20000
 
 class LogFileReader(QtCore.QObject):
     """
-    Worker para ler e monitorar um arquivo de log em uma thread separada.
-    Emite novas linhas em lotes para otimizar a atualização da UI.
+    Worker de um visualizador: acompanha um arquivo de log pelo TailEngine (thread de
+    leitura compartilhada por todos os visualizadores) e publica as linhas visíveis.
+
+    O arquivo em si (handle, LineStore, índices) é um TailedFile do motor, compartilhado
+    com outros visualizadores do mesmo arquivo; filtro, janela de navegação e publicação
+    são deste worker. As linhas visíveis são publicadas como seqs do LineStore
+    (`line_store`) no `visible_feed`; `lines_published` só avisa a UI, que puxa do feed o
+    trecho que ainda não exibiu e lê do LineStore apenas as linhas que está mostrando.
     """
-    new_log_lines = QtCore.pyqtSignal(list)
-    filtered_full_log = QtCore.pyqtSignal(list)
+    lines_published = QtCore.pyqtSignal() # Há seqs novos (ou um conteúdo substituído) no visible_feed
     error_occurred = QtCore.pyqtSignal(str)
     finished = QtCore.pyqtSignal()
     file_loaded = QtCore.pyqtSignal() # Sinal para indicar que um novo arquivo foi carregado
+    file_window = QtCore.pyqtSignal(list, int, int, int) # Linhas, primeira linha, linha alvo, total de linhas
+    index_progress = QtCore.pyqtSignal(int, int) # Linhas indexadas, percentual do arquivo
+    status_message = QtCore.pyqtSignal(str)
+    store_usage = QtCore.pyqtSignal(int, int) # Linhas mantidas em memória, bytes ocupados
 
-    def __init__(self):
+    def __init__(self, max_store_bytes=LINE_STORE_MAX_BYTES, engine=None):
         super().__init__()
         self.log_file_path = None
-        self.watcher = QtCore.QFileSystemWatcher()
-        self.file_handle = None
+        # O worker é movido para a thread do motor (TailEngine.attach); o timer é filho
+        # dele e vai junto. Os slots são decorados com pyqtSlot para que o PyQt não crie
+        # proxies presos à thread onde a conexão foi feita.
+        self._engine = engine or TailEngine.instance()
+        self._max_store_bytes = max_store_bytes
+        self._source = None # TailedFile do arquivo atual (compartilhado pelo motor)
         self.is_running = True
-        self.current_position = 0
-        self.line_buffer = [] # Buffer para linhas que ainda não foram enviadas à UI
+        self.line_buffer = array('Q') # Seqs de linhas visíveis que ainda não foram publicados
 
-        self._all_log_lines = []
+        # Linhas do arquivo atual: o LineStore do TailedFile (vazio enquanto não há arquivo)
+        self._line_store = LineStore(max_bytes=max_store_bytes)
+        self._visible_feed = VisibleSeqFeed(self._line_store)
+        self._empty_text_index = TrigramIndex()
 
         self._filter_term = ""
         self._filter_mode = "include"
-
-        self.buffer_timer = QtCore.QTimer()
+        self._filter_query = None # CompiledQuery do filtro atual (None = sem filtro)
+        self._filter_error_shown = False
+        self._line_predicate = None
+
+        # Filtragem em segundo plano: geração atual, job em andamento e seqs visíveis
+        self._filter_generation = 0
+        self._filter_job = None
+        self._filter_job_sent_first = False
+        self._visible_seqs = None # array de seqs visíveis para o filtro atual (None = sem filtro)
+        self._visible_seqs_end = 0 # seqs abaixo deste valor já foram avaliados
+        self._visible_seqs_query = None # Consulta que gerou _visible_seqs
+        self._pending_visible_seqs = array('Q') # Linhas novas aceitas enquanto o job roda
+
+        self.buffer_timer = QtCore.QTimer(self)
         self.buffer_timer.setInterval(50)
         self.buffer_timer.timeout.connect(self._flush_buffer)
 
-        self.polling_timer = QtCore.QTimer()
-        self.polling_timer.setInterval(1000)
-        self.polling_timer.timeout.connect(self._read_new_lines_if_needed)
+        self._pending_window_line = None # Linha pedida além do índice: lida quando for indexada
+        # Navegação pelo histórico: o índice cobre os rotacionados (.1, .2, ...) e o log atual
+        self._include_rotated = False
 
         self._debug_mode = True # Manter para logs internos do FileReader
-
-        self.watcher.fileChanged.connect(self._on_file_changed_signal)
         app_logger.debug("[LogFileReader] Inicializado.")
 
 
+    @property
+    def line_store(self):
+        """LineStore com as linhas lidas; seguro para leitura a partir de outras threads."""
+        return self._line_store
+
+    @property
+    def text_index(self):
+        """TrigramIndex das linhas do LineStore; consultas são seguras a partir de outras threads."""
+        source = self._source
+        return source.text_index if source else self._empty_text_index
+
+    @property
+    def visible_feed(self):
+        """VisibleSeqFeed com os seqs visíveis publicados; a UI puxa dele a partir de outra thread."""
+        return self._visible_feed
+
     def _log_debug(self, message):
         if self._debug_mode:
             app_logger.debug(f"[LogFileReader] {message}")
 
+    @QtCore.pyqtSlot(str, str)
     def set_filter(self, term, mode):
-        self._filter_term = term.lower() if term else ""
+        self._filter_term = term or ""
         self._filter_mode = mode
+        try:
+            self._filter_query = make_filter_query(self._filter_term, self._filter_mode)
+            if self._filter_error_shown:
+                self._filter_error_shown = False
+                self.status_message.emit("")
+        except QuerySyntaxError as e:
+            # Filtro incompleto/inválido (ex.: ainda digitando): usa o texto literalmente
+            self.status_message.emit(f"Filtro inválido ({e}); buscando o texto literalmente.")
+            self._filter_error_shown = True
+            self._filter_query = literal_query(self._filter_term)
+            if self._filter_mode == "exclude":
+                self._filter_query = self._filter_query.negated()
+        self._line_predicate = self._filter_query.matches if self._filter_query else None
         self._log_debug(f"Filtro atualizado: Termo='{self._filter_term}', Modo='{self._filter_mode}'. Reaplicando filtro no log completo.")
         # Reenvia o log completo filtrado para atualizar a UI
-        self._send_filtered_full_log()
+        self._send_filtered_full_log(allow_refinement=True)
 
     def _should_line_be_visible(self, line):
-        if not self._filter_term:
-            return True
-
-        line_lower = line.lower()
-        if self._filter_mode == "include":
-            return self._filter_term in line_lower
-        elif self._filter_mode == "exclude":
-            return self._filter_term not in line_lower
-        return True
+        return self._line_predicate is None or self._line_predicate(line)
 
+    def cancel_filter_job(self):
+        """Aborta o filtro em andamento. Seguro para chamar de qualquer thread (ex.: a cada tecla)."""
+        job = self._filter_job
+        if job:
+            job.cancel()
 
+    @QtCore.pyqtSlot(str)
     def set_log_file(self, new_path):
         """Define e começa a monitorar um novo arquivo de log."""
         self._log_debug(f"Chamado set_log_file para: {new_path}")
-        self.stop_monitoring() # Para o monitoramento atual, se houver
+        self.stop_monitoring() # Para o monitoramento atual (devolve o arquivo ao motor)
 
-        # Remove o caminho antigo do watcher, se ele estiver lá
-        if self.log_file_path and self.log_file_path in self.watcher.files():
-            self.watcher.removePath(self.log_file_path)
-            self._log_debug(f"Removido path '{self.log_file_path}' do watcher.")
+        self.cancel_filter_job()
+        self._filter_job = None
+        self._filter_generation += 1
+        self._visible_seqs = None
+        self._visible_seqs_query = None
 
         self.log_file_path = new_path
-        self.current_position = 0
-        self.line_buffer = []
-        self._all_log_lines = []
+        self.line_buffer = array('Q')
+        self._line_store = LineStore(max_bytes=self._max_store_bytes)
+        self._publish_reset()
         # Emite file_loaded ANTES de start_monitoring para que a UI possa se redefinir
         self.file_loaded.emit()
         self.start_monitoring()
         self._log_debug(f"Caminho do log atualizado e monitoramento iniciado para: {new_path}")
 
 
+    @QtCore.pyqtSlot()
     def start_monitoring(self):
         """Inicia o monitoramento do arquivo de log atual."""
         if not self.log_file_path:
@@ -130,49 +209,23 @@ class LogFileReader(QtCore.QObject):
                 self.finished.emit()
                 return
 
-
-            if self.log_file_path not in self.watcher.files():
-                self.watcher.addPath(self.log_file_path)
-                self._log_debug(f"Adicionado path '{self.log_file_path}' ao watcher.")
-            else:
-                self._log_debug(f"Path '{self.log_file_path}' já está no watcher.")
-
-
-            if self.file_handle:
-                self.file_handle.close()
-                self._log_debug(f"Handle do arquivo antigo fechado.")
-
-            try:
-                # Tenta abrir o arquivo. Se for um diretório aqui dará PermissionError ou IsADirectoryError
-                self.file_handle = open(self.log_file_path, 'r', encoding='utf-8', errors='ignore')
-            except Exception as e:
-                error_msg = f"Falha ao abrir o arquivo de log '{self.log_file_path}': {e}. Verifique permissões."
-                self.error_occurred.emit(error_msg)
-                self._log_debug(f"ERRO: {error_msg}")
-                self.is_running = False
-                self.finished.emit()
-                return
-
-            self.file_handle.seek(0)
-            self.current_position = self.file_handle.tell()
-            self._log_debug(f"Arquivo '{os.path.basename(self.log_file_path)}' aberto. Posição inicial: {self.current_position}")
-
-
-            self._all_log_lines.append(f"--- Monitorando log: {os.path.basename(self.log_file_path)} ---")
-            self._all_log_lines.append(f"--- Data/Hora Início: {QtCore.QDateTime.currentDateTime().toString('yyyy-MM-dd HH:mm:ss')} ---")
-
-            self._read_initial_lines()
-
+            if self._source is None:
+                try:
+                    # Outro visualizador do mesmo arquivo já o acompanha: o motor devolve o mesmo TailedFile
+                    self._attach_source(self._engine.acquire(self.log_file_path, self._max_store_bytes))
+                except Exception as e:
+                    error_msg = f"Falha ao abrir o arquivo de log '{self.log_file_path}': {e}. Verifique permissões."
+                    self.error_occurred.emit(error_msg)
+                    self._log_debug(f"ERRO: {error_msg}")
+                    self.is_running = False
+                    self.finished.emit()
+                    return
+
+            # Publica o log completo (linhas iniciais e marcadores) uma única vez
+            self._send_filtered_full_log()
             self.buffer_timer.start()
-            self.polling_timer.start()
             self._log_debug(f"Monitoramento iniciado com sucesso para {self.log_file_path}.")
 
-        except PermissionError as e:
-            error_msg = f"Erro de permissão ao abrir arquivo de log: {e}. Verifique se o arquivo está sendo usado por outro programa ou se o caminho é um diretório."
-            self.error_occurred.emit(error_msg)
-            self._log_debug(f"ERRO de Permissão: {error_msg}")
-            self.is_running = False
-            self.finished.emit()
         except Exception as e:
             error_msg = f"Erro inesperado ao iniciar monitoramento: {e}"
             self.error_occurred.emit(error_msg)
@@ -180,79 +233,168 @@ class LogFileReader(QtCore.QObject):
             self.is_running = False
             self.finished.emit()
 
-    def _add_line_to_all_log_and_buffer(self, line):
-        self._all_log_lines.append(line)
-        if self._should_line_be_visible(line):
-            self.line_buffer.append(line)
+    def _attach_source(self, source):
+        self._source = source
+        self._line_store = source.line_store
+        source.lines_appended.connect(self._on_lines_appended)
+        source.error_occurred.connect(self.error_occurred)
+        source.status_message.connect(self.status_message)
+        source.index_progress.connect(self._on_index_progress)
+        source.set_include_rotated(self._include_rotated)
+
+    def _release_source(self):
+        source, self._source = self._source, None
+        if source is None:
+            return
+        source.lines_appended.disconnect(self._on_lines_appended)
+        source.error_occurred.disconnect(self.error_occurred)
+        source.status_message.disconnect(self.status_message)
+        source.index_progress.disconnect(self._on_index_progress)
+        self._engine.release(source)
+
+    @QtCore.pyqtSlot(object, object)
+    def _on_lines_appended(self, first_seq, end_seq):
+        """Linhas novas no LineStore compartilhado: aplica o filtro deste visualizador."""
+        if not self.is_running:
+            return
+        first_seq = max(first_seq, self._line_store.first_seq)
+        if self._line_predicate is None:
+            # Sem filtro não é preciso decodificar: a UI decodifica só o que exibir
+            visible = array('Q', range(first_seq, end_seq))
+        else:
+            visible = array('Q', (seq for seq, line in self._line_store.iter_lines(first_seq, end_seq)
+                                  if self._should_line_be_visible(line)))
+        self.line_buffer.extend(visible)
+        if self._filter_job:
+            self._pending_visible_seqs.extend(visible)
+        else:
+            if self._visible_seqs is not None:
+                self._visible_seqs.extend(visible)
+            self._visible_seqs_end = end_seq
 
+    @QtCore.pyqtSlot()
     def _flush_buffer(self):
-        if self.line_buffer and self.is_running:
-            self.new_log_lines.emit(self.line_buffer)
-            self.line_buffer = []
-            self._log_debug(f"Buffer de novas linhas emitido. Buffer agora vazio.")
-
-
-    def _send_filtered_full_log(self):
-        filtered_lines = [line for line in self._all_log_lines if self._should_line_be_visible(line)]
-        self._log_debug(f"Enviando {len(filtered_lines)} linhas (log completo filtrado) para a UI.")
-        self.filtered_full_log.emit(filtered_lines)
-
-
-    def _read_initial_lines(self, num_lines=1000):
-        """Lê as últimas N linhas do arquivo de log na inicialização."""
-        self._log_debug(f"Lendo {num_lines} linhas iniciais...")
-        if not self.file_handle:
-            self._log_debug("file_handle é None, não é possível ler linhas iniciais.")
+        # Enquanto um filtro roda, as linhas novas esperam para não se misturarem aos lotes dele
+        if self.line_buffer and self.is_running and not self._filter_job:
+            self._publish(self.line_buffer)
+            self.line_buffer = array('Q')
+            self._log_debug(f"Buffer de novas linhas publicado. Buffer agora vazio.")
+            self._emit_store_usage()
+
+    def _publish(self, seqs, scanned_end=None):
+        # O aviso só é emitido se a UI já atendeu o anterior: os sinais não se acumulam
+        if self._visible_feed.publish(seqs, scanned_end):
+            self.lines_published.emit()
+
+    def _publish_reset(self, seqs=(), scanned_end=None):
+        """Substitui o conteúdo exibido pela UI (carga inicial, novo filtro, volta ao final)."""
+        self._visible_feed.reset(seqs, scanned_end, self._line_store)
+        self.lines_published.emit()
+
+    def _emit_store_usage(self):
+        self.store_usage.emit(len(self._line_store), self._line_store.memory_usage())
+
+
+    def _send_filtered_full_log(self, allow_refinement=False):
+        """Reaplica o filtro atual a todas as linhas mantidas, em segundo plano."""
+        if self._filter_job:
+            self._filter_job.cancel()
+        self._filter_generation += 1
+        self._filter_job_sent_first = False
+        # As linhas do buffer serão cobertas pelo job (estão abaixo de end_seq)
+        self.line_buffer = array('Q')
+        self._pending_visible_seqs = array('Q')
+
+        end_seq = self._line_store.next_seq
+        if self._line_predicate is None:
+            # Sem filtro todas as linhas mantidas são visíveis: não há o que varrer
+            self._filter_job = None
+            self._visible_seqs = None
+            self._visible_seqs_query = None
+            self._visible_seqs_end = end_seq
+            self._filter_job_sent_first = True
+            self._publish_reset(range(self._line_store.first_seq, end_seq))
+            self._emit_store_usage()
             return
 
-        try:
-            # Ir para o final para pegar o tamanho
-            self.file_handle.seek(0, os.SEEK_END)
-            file_size = self.file_handle.tell()
-            self._log_debug(f"Tamanho do arquivo para leitura inicial: {file_size} bytes.")
-
-            # Estimativa de bytes para ler as últimas N linhas (média de 200 bytes por linha)
-            read_bytes_from_end = num_lines * 200
-            start_position = max(0, file_size - read_bytes_from_end)
-
-            self._log_debug(f"Buscando para a posição inicial de leitura: {start_position}")
-            self.file_handle.seek(start_position)
-
-            lines = self.file_handle.readlines()
-            self._log_debug(f"Lidas {len(lines)} linhas a partir de {start_position}.")
-
-            # Se começamos no meio do arquivo, a primeira linha pode estar incompleta
-            if start_position > 0 and len(lines) > 0:
-                self._log_debug("Descartando a primeira linha lida (potencialmente parcial).")
-                lines = lines[1:]
-
-            # Pega apenas as últimas 'num_lines' linhas
-            lines_to_add = lines[-num_lines:] if len(lines) > num_lines else lines
-            self._log_debug(f"Adicionando {len(lines_to_add)} linhas iniciais ao _all_log_lines.")
-
-            for line in lines_to_add:
-                self._all_log_lines.append(line.strip())
-
-            # Envia o log completo (com as linhas iniciais) para a UI
-            self._send_filtered_full_log()
-
-            # Posiciona o handle do arquivo no final para monitorar novas linhas
-            self.file_handle.seek(0, os.SEEK_END)
-            self.current_position = self.file_handle.tell()
-            self._log_debug(f"Posição atualizada após leitura inicial (no final do arquivo): {self.current_position}")
-
-            self._all_log_lines.append("\n--- Fim das linhas iniciais. Monitorando novas entradas ---")
-            self._send_filtered_full_log()
-
-        except Exception as e:
-            error_msg = f"Erro ao ler linhas iniciais do log: {e}"
-            self.error_occurred.emit(error_msg)
-            self._log_debug(f"ERRO: {error_msg}")
-            self.stop_monitoring()
-
+        first_seq = self._line_store.first_seq
+        candidate_seqs = None
+        candidates_end = None
+        if allow_refinement and self._can_refine_filter():
+            # O filtro novo é mais restrito: basta verificar as linhas que já passavam no anterior
+            candidate_seqs = self._visible_seqs[bisect_left(self._visible_seqs, first_seq):]
+            candidates_end = self._visible_seqs_end
+
+        candidate_ranges = None
+        if self._filter_query.required_literals:
+            self.request_text_index()
+            candidate_ranges = self.text_index.candidate_ranges(self._filter_query.required_literals, first_seq, end_seq)
+            if candidate_ranges is not None and candidate_seqs is not None:
+                # Usa o que exigir menos linhas a verificar: as do filtro anterior ou as do índice
+                if len(candidate_seqs) + end_seq - candidates_end <= sum(high - low for low, high in candidate_ranges):
+                    candidate_ranges = None
+                else:
+                    candidate_seqs = candidates_end = None
+        if candidate_seqs is not None:
+            self._log_debug(f"Refinando filtro sobre {len(candidate_seqs)} linhas candidatas.")
+        elif candidate_ranges is not None:
+            self._log_debug(f"Filtro sobre {sum(high - low for low, high in candidate_ranges)} linhas candidatas do índice.")
+
+        job = FilterJob(self._filter_generation, self._line_store, self._line_predicate, end_seq,
+                        candidate_seqs, candidates_end, candidate_ranges)
+        job.signals.partial_results.connect(self._on_filter_partial_results)
+        job.signals.finished.connect(self._on_filter_finished)
+        self._filter_job = job
+        self._visible_seqs_end = end_seq
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def _can_refine_filter(self):
+        return (self._visible_seqs is not None and self._visible_seqs_query is not None
+                and self._filter_query is not None
+                and self._filter_query.is_refinement_of(self._visible_seqs_query))
+
+    @QtCore.pyqtSlot(int, object, object)
+    def _on_filter_partial_results(self, generation, seqs, scanned_end):
+        if generation != self._filter_generation:
+            return # Resultado de um filtro já substituído
+        # A UI troca o conteúdo antigo pelo novo só até scanned_end; o resto espera a varredura
+        if self._filter_job_sent_first:
+            self._publish(seqs, scanned_end)
+        else:
+            self._filter_job_sent_first = True
+            self._publish_reset(seqs, scanned_end)
 
+    @QtCore.pyqtSlot(int, object, bool)
+    def _on_filter_finished(self, generation, visible_seqs, cancelled):
+        if generation != self._filter_generation:
+            return
+        self._filter_job = None
+        if cancelled:
+            # Filtro abortado por uma tecla nova; o pedido seguinte reinicia a varredura
+            self._visible_seqs = None
+            self._visible_seqs_query = None
+            return
+        if not self._filter_job_sent_first:
+            self._filter_job_sent_first = True
+            self._publish_reset() # Nenhuma linha visível: limpa a exibição
+        else:
+            self._publish(()) # Conteúdo completo: a UI descarta o que sobrou do filtro anterior
+        if self._line_predicate is None:
+            self._visible_seqs = None
+            self._visible_seqs_query = None
+        else:
+            visible_seqs.extend(self._pending_visible_seqs)
+            self._visible_seqs = visible_seqs
+            self._visible_seqs_query = self._filter_query
+        self._pending_visible_seqs = array('Q')
+        self._visible_seqs_end = self._line_store.next_seq
+        self._log_debug(f"Filtro concluído (geração {generation}).")
+        self._emit_store_usage()
+        self._flush_buffer()
+
+    @QtCore.pyqtSlot()
     def stop_monitoring(self):
-        """Para o monitoramento do arquivo de log."""
+        """Para o monitoramento e devolve o arquivo ao motor (fechado se ninguém mais o exibe)."""
         if not self.is_running:
             self._log_debug("Monitoramento já parado.")
             return
@@ -260,113 +402,145 @@ class LogFileReader(QtCore.QObject):
         self._log_debug(f"Parando monitoramento para: {self.log_file_path}")
         self.is_running = False
         self.buffer_timer.stop()
-        self.polling_timer.stop()
+        self.cancel_filter_job()
+        self._pending_window_line = None
         self._flush_buffer() # Garante que as linhas pendentes sejam enviadas
-        if self.file_handle:
-            self.file_handle.close()
-            self.file_handle = None
-
-        if self.log_file_path and self.log_file_path in self.watcher.files():
-            self.watcher.removePath(self.log_file_path)
-            self._log_debug(f"Removido path '{self.log_file_path}' do watcher ao parar.")
+        self._release_source()
 
         self.finished.emit()
         self._log_debug(f"Monitoramento parado.")
 
-
-    def _on_file_changed_signal(self, path):
-        """Slot para o sinal fileChanged do QFileSystemWatcher."""
-        if path == self.log_file_path:
-            self._log_debug(f"Sinal 'fileChanged' disparado para: {path}")
-            self._read_new_lines()
-        else:
-            self._log_debug(f"Sinal 'fileChanged' para arquivo não monitorado atualmente: {path}")
-
-    def _read_new_lines_if_needed(self):
-        """Verifica se há novas linhas usando polling e as lê."""
-        if not self.is_running or not self.log_file_path:
+    # --- Índice de linhas e navegação pelo arquivo inteiro ---
+    @QtCore.pyqtSlot(bool)
+    def set_include_rotated(self, include):
+        """
+        Liga/desliga a navegação pelo histórico (arquivos rotacionados + arquivo atual).
+        O índice é do arquivo: vale para todos os visualizadores que o exibem.
+        """
+        self._include_rotated = include
+        if self._source:
+            self._source.set_include_rotated(include)
+
+    @QtCore.pyqtSlot(int, int)
+    def _on_index_progress(self, indexed_lines, percent):
+        self.index_progress.emit(indexed_lines, percent)
+        if self._pending_window_line is not None and (
+                self._pending_window_line < indexed_lines or self._source.index_complete()):
+            self.read_window(self._pending_window_line)
+
+    # --- Índice de trigramas (busca e filtro por texto) ---
+    @QtCore.pyqtSlot()
+    def request_text_index(self):
+        """Passa a construir e manter o índice de trigramas do arquivo (chamado no primeiro uso)."""
+        if self._source:
+            self._source.request_text_index()
+
+    def _decode_raw_lines(self, raw_lines):
+        encoding = self._line_store.encoding
+        return [line.decode(encoding, DECODE_ERRORS).rstrip('\r') for line in raw_lines]
+
+    def _index_source(self):
+        """(LineOffsetIndex, fonte indexada) do arquivo atual, ou (None, None) sem arquivo/índice."""
+        source = self._source
+        if source is None or source.index_handle is None:
+            return None, None
+        return source.line_index, source.index_handle
+
+    @QtCore.pyqtSlot(int)
+    def read_window(self, target_line):
+        """Lê uma janela de linhas ao redor de `target_line` (base 0), em qualquer ponto do arquivo."""
+        line_index, index_handle = self._index_source()
+        if not index_handle:
             return
-
+        known_lines = line_index.line_count
+        self._pending_window_line = None
+        if target_line >= known_lines and not line_index.is_complete(file_size_of(index_handle)):
+            # A janela é lida assim que o índice chegar à linha (ex.: resultado da busca em todos os arquivos)
+            self._pending_window_line = target_line
+            self._source.schedule_line_index_update()
+            self.status_message.emit(f"Índice ainda em construção: {known_lines} linhas disponíveis até o momento. "
+                                     f"A linha {target_line + 1} será exibida assim que for indexada.")
+            return
+        target_line = max(0, min(target_line, known_lines - 1))
+        first_line = max(0, target_line - WINDOW_CONTEXT_LINES)
         try:
-            current_file_size = os.path.getsize(self.log_file_path)
-            if current_file_size > self.current_position:
-                self._log_debug(f"Polling detectou novas linhas. Tamanho atual: {current_file_size}, Posição: {self.current_position}")
-                self._read_new_lines()
-            elif current_file_size < self.current_position:
-                 # Caso o arquivo tenha sido truncado ou resetado pelo programa de log
-                self._log_debug(f"Arquivo truncado detectado via polling! ({current_file_size} < {self.current_position}).")
-                self._handle_file_truncation()
-        except FileNotFoundError:
-            self._log_debug(f"Arquivo não encontrado durante polling: {self.log_file_path}")
-            self.error_occurred.emit(f"Arquivo monitorado '{os.path.basename(self.log_file_path)}' foi movido ou excluído.")
-            self.stop_monitoring()
+            raw_lines = line_index.read_lines(index_handle, first_line, WINDOW_LINES)
         except Exception as e:
-            self._log_debug(f"Polling error checking file size: {e}")
-
-
-    def _handle_file_truncation(self):
-        """Trata o caso em que o arquivo de log é truncado/resetado."""
-        self._log_debug(f"Arquivo truncado detectado! Reiniciando leitura de {self.log_file_path}")
-        self._all_log_lines.append("\n--- Arquivo de log resetado/truncado. Reiniciando leitura. ---")
-        self._send_filtered_full_log() # Envia a mensagem de reset para a UI
-
-        if self.file_handle:
-            self.file_handle.close()
-            self.file_handle = None # Fechar e reabrir para garantir nova leitura do início
-
+            self.error_occurred.emit(f"Erro ao ler trecho do log: {e}")
+            return
+        self._log_debug(f"Janela lida: linhas {first_line}-{first_line + len(raw_lines)} (alvo {target_line}).")
+        self.file_window.emit(self._decode_raw_lines(raw_lines), first_line, target_line, known_lines)
+
+    @QtCore.pyqtSlot(float)
+    def read_window_at_percentage(self, percentage):
+        """Lê uma janela de linhas a partir de uma posição percentual do arquivo."""
+        line_index, index_handle = self._index_source()
+        if not index_handle:
+            return
+        file_size = file_size_of(index_handle)
+        self._read_window_at_offset(int(file_size * max(0.0, min(percentage, 100.0)) / 100))
+
+    @QtCore.pyqtSlot(str)
+    def read_window_at_time(self, text):
+        """Lê uma janela de linhas a partir da primeira linha com horário >= `text` (busca binária no arquivo)."""
+        reference = parse_user_timestamp(text)
+        line_index, index_handle = self._index_source()
+        if not index_handle or reference is None:
+            return
         try:
-            # Reabre o arquivo e reinicia a posição
-            self.file_handle = open(self.log_file_path, 'r', encoding='utf-8', errors='ignore')
-            self.file_handle.seek(0)
-            self.current_position = 0
-            self._all_log_lines = [] # Limpa todas as linhas antigas
-            self._read_initial_lines() # Lê as novas linhas iniciais do arquivo resetado
+            file_size = file_size_of(index_handle)
+            offset = find_time_offset(index_handle, reference, file_size, self._line_store.encoding)
         except Exception as e:
-            error_msg = f"Erro ao reabrir arquivo truncado '{self.log_file_path}': {e}"
-            self.error_occurred.emit(error_msg)
-            self._log_debug(f"ERRO: {error_msg}")
-            self.stop_monitoring()
-
+            self.error_occurred.emit(f"Erro ao procurar o horário no log: {e}")
+            return
+        if offset >= file_size:
+            self.status_message.emit(f"Nenhuma linha do log a partir de {text}.")
+            return
+        self._read_window_at_offset(offset, line_start=True)
 
-    def _read_new_lines(self):
-        """Lê as novas linhas adicionadas ao arquivo."""
-        if not self.is_running or not self.file_handle:
-            self._log_debug("Não está rodando ou handle é None, não lendo novas linhas.")
+    def _read_window_at_offset(self, offset, line_start=False):
+        """Lê uma janela a partir da linha que contém o byte `offset` (ou que começa nele, com `line_start`)."""
+        line_index, index_handle = self._index_source()
+        if offset <= line_index.indexed_bytes:
+            self.read_window(line_index.line_for_offset(index_handle, offset))
             return
 
+        # Trecho ainda não indexado: lê direto pelo offset, sem número de linha conhecido
+        self._pending_window_line = None
         try:
-            current_file_size = os.path.getsize(self.log_file_path)
-            self._log_debug(f"Tamanho atual do arquivo: {current_file_size} bytes. Posição anterior: {self.current_position} bytes.")
-
-            if current_file_size < self.current_position:
-                # Isso já é tratado por _handle_file_truncation via polling ou fileChanged
-                self._log_debug(f"Detectado truncamento de arquivo durante read_new_lines (já deve ser tratado pelo polling/watcher).")
-                self.stop_monitoring() # Pode ser um estado inconsistente, melhor parar
-                return
-
-            self.file_handle.seek(self.current_position)
-            new_data = self.file_handle.read()
-            self.current_position = self.file_handle.tell()
-
-            if new_data:
-                lines = new_data.splitlines()
-                self._log_debug(f"Lidas {len(lines)} novas linhas. Nova posição: {self.current_position} bytes.")
-                for line in lines:
-                    if line.strip(): # Adiciona apenas linhas não vazias
-                        self._add_line_to_all_log_and_buffer(line.strip()) # strip() para remover espaços em branco
-
-        except PermissionError as e:
-            error_msg = f"Erro de permissão ao ler novas linhas: {e}. Verifique se o arquivo está sendo usado por outro programa."
-            self.error_occurred.emit(error_msg)
-            self._log_debug(f"ERRO de Permissão: {e}")
-            # Não para o monitoramento imediatamente, pois pode ser um problema temporário
+            index_handle.seek(offset)
+            if not line_start:
+                index_handle.readline() # Descarta a linha parcial
+            raw_lines = []
+            while len(raw_lines) < WINDOW_LINES:
+                line = index_handle.readline()
+                if not line:
+                    break
+                raw_lines.append(line.rstrip(b'\n'))
         except Exception as e:
-            error_msg = f"Erro inesperado ao ler novas linhas: {e}"
-            self.error_occurred.emit(error_msg)
-            self._log_debug(f"ERRO: {e}")
+            self.error_occurred.emit(f"Erro ao ler trecho do log: {e}")
+            return
+        self.file_window.emit(self._decode_raw_lines(raw_lines), -1, -1, line_index.line_count)
+
+    @QtCore.pyqtSlot()
+    def resume_tail(self):
+        """Volta a exibir o final do log (modo seguir) após navegar pelo arquivo."""
+        self._pending_window_line = None
+        self._send_filtered_full_log()
 
 
 class LogViewerDialog(QtWidgets.QDialog):
+    # Pedidos ao LogFileReader: como o worker vive em outra thread, as conexões
+    # são enfileiradas e os slots executam na thread de leitura.
+    log_file_requested = QtCore.pyqtSignal(str)
+    filter_requested = QtCore.pyqtSignal(str, str)
+    window_requested = QtCore.pyqtSignal(int)
+    window_at_percentage_requested = QtCore.pyqtSignal(float)
+    window_at_time_requested = QtCore.pyqtSignal(str)
+    rotated_history_requested = QtCore.pyqtSignal(bool)
+    tail_requested = QtCore.pyqtSignal()
+    text_index_requested = QtCore.pyqtSignal()
+
     def __init__(self, log_directory_path, parent=None):
         super().__init__(parent)
         self.initial_log_directory = log_directory_path
@@ -378,11 +552,20 @@ class LogViewerDialog(QtWidgets.QDialog):
 
         self.auto_scroll_enabled = True
         self.is_user_scrolling = False
+        self._browsing_window = False # True quando exibindo um trecho do arquivo em vez do final
         self._current_font_size = 10
 
         self._search_term = ""
         self._search_case_sensitive = False
-        self._last_found_cursor = None
+        # Ocorrências da busca: seqs das linhas exibidas que contêm o termo (ou números de
+        # linha, no trecho avulso do modo navegação), em ordem, calculadas em segundo plano
+        self._search_matches = array('Q')
+        self._search_matches_are_rows = False
+        self._search_current = -1 # Índice em _search_matches da ocorrência selecionada
+        self._search_generation = 0
+        self._search_job = None
+        self._search_pending_seqs = array('Q') # Linhas anexadas ainda não verificadas
+        self._search_jump_pending = None # Navegação pedida antes da primeira ocorrência (backward)
 
         self._filter_term = ""
         self._filter_mode = "include"
@@ -396,7 +579,7 @@ class LogViewerDialog(QtWidgets.QDialog):
                 font-family: 'Inter', 'Segoe UI', 'Roboto', sans-serif;
                 font-size: 14px;
             }
-            QTextEdit {
+            QTableView#logView {
                 background-color: #3B4252;
                 color: #ECEFF4;
                 border: 1px solid #4C566A;
@@ -405,20 +588,27 @@ class LogViewerDialog(QtWidgets.QDialog):
                 font-family: 'Consolas', 'Courier New', monospace;
                 font-size: 13px;
             }
-            QListWidget {
+            QListWidget, QTreeView {
                 background-color: #3B4252;
                 color: #ECEFF4;
                 border: 1px solid #4C566A;
                 border-radius: 5px;
                 padding: 5px;
             }
-            QListWidget::item {
+            QListWidget::item, QTreeView::item {
                 padding: 3px;
             }
-            QListWidget::item:selected {
+            QListWidget::item:selected, QTreeView::item:selected {
                 background-color: #81A1C1;
                 color: #2E3440;
             }
+            QHeaderView::section {
+                background-color: #434C5E;
+                color: #ECEFF4;
+                border: none;
+                border-right: 1px solid #4C566A;
+                padding: 3px;
+            }
             QPushButton {
                 background-color: #88C0D0;
                 color: #2E3440;
@@ -494,12 +684,41 @@ class LogViewerDialog(QtWidgets.QDialog):
         self.file_filter_input.textChanged.connect(self._filter_log_files)
         left_layout.addWidget(self.file_filter_input)
 
-        self.file_list_widget = QtWidgets.QListWidget()
-        self.file_list_widget.itemClicked.connect(self._on_log_file_selected)
-        left_layout.addWidget(self.file_list_widget)
-
+        # Pastas e arquivos da raiz dos logs. O modelo se mantém ordenado pela coluna clicada
+        # (busca binária, ver LogFileTreeModel); o proxy só filtra pelo nome, e as pastas com
+        # algum arquivo que passa no filtro continuam visíveis
+        self.file_tree_model = LogFileTreeModel(FileStatsService.instance(), self)
+        self.file_tree_proxy = QtCore.QSortFilterProxyModel(self)
+        self.file_tree_proxy.setSourceModel(self.file_tree_model)
+        self.file_tree_proxy.setFilterKeyColumn(COLUMN_NAME)
+        self.file_tree_proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.file_tree_proxy.setRecursiveFilteringEnabled(True)
+        self.file_tree_view = QtWidgets.QTreeView()
+        self.file_tree_view.setModel(self.file_tree_proxy)
+        self.file_tree_view.setUniformRowHeights(True) # Altura fixa: a view só consulta as linhas visíveis
+        self.file_tree_view.setAllColumnsShowFocus(True)
+        header = self.file_tree_view.header()
+        header.setStretchLastSection(False)
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(COLUMN_MTIME, QtCore.Qt.DescendingOrder) # Ordem inicial do modelo
+        header.sortIndicatorChanged.connect(self.file_tree_model.sort)
+        header.setSectionResizeMode(COLUMN_NAME, QtWidgets.QHeaderView.Stretch)
+        for column in range(COLUMN_NAME + 1, self.file_tree_model.columnCount()):
+            header.setSectionResizeMode(column, QtWidgets.QHeaderView.Interactive)
+            header.resizeSection(column, 120 if column == COLUMN_MTIME else 70)
+        self.file_tree_view.clicked.connect(self._on_log_file_selected)
+        left_layout.addWidget(self.file_tree_view)
+
+        self.rotated_history_checkbox = QtWidgets.QCheckBox("Incluir rotacionados (.1, .2, ...)")
+        self.rotated_history_checkbox.setToolTip("A navegação (Ir para linha, % ou hora) percorre também os arquivos\n"
+                                                 "rotacionados do log, como se fossem um único arquivo contínuo")
+        self.rotated_history_checkbox.toggled.connect(self.rotated_history_requested)
+        left_layout.addWidget(self.rotated_history_checkbox)
+
+        # A lista acompanha a pasta sozinha (DirectoryListing); o botão força uma nova varredura
         btn_refresh_files = QtWidgets.QPushButton("Atualizar Lista")
-        btn_refresh_files.clicked.connect(self._load_log_files_from_directory)
+        btn_refresh_files.clicked.connect(lambda: self.directory_listing.refresh())
         left_layout.addWidget(btn_refresh_files)
 
         splitter.addWidget(left_panel_widget)
@@ -514,57 +733,164 @@ class LogViewerDialog(QtWidgets.QDialog):
         search_layout.setObjectName("searchBar")
         self.search_input = QtWidgets.QLineEdit()
         self.search_input.setPlaceholderText("Pesquisar...")
-        self.search_input.textChanged.connect(self._reset_search)
-        self.search_input.returnPressed.connect(lambda: self._find_text(QtGui.QTextDocument.FindNext))
+        self.search_input.textChanged.connect(self._on_search_text_changed)
+        self.search_input.returnPressed.connect(lambda: self._find_text())
         search_layout.addWidget(self.search_input)
 
+        self.search_count_label = QtWidgets.QLabel("")
+        self.search_count_label.setToolTip("Ocorrência selecionada / total de linhas com o termo")
+        search_layout.addWidget(self.search_count_label)
+
         self.search_case_sensitive_checkbox = QtWidgets.QCheckBox("Aa")
         self.search_case_sensitive_checkbox.setToolTip("Sensível a Maiúsculas/Minúsculas")
-        self.search_case_sensitive_checkbox.stateChanged.connect(self._reset_search)
+        self.search_case_sensitive_checkbox.stateChanged.connect(self._on_search_text_changed)
         search_layout.addWidget(self.search_case_sensitive_checkbox)
 
         self.find_prev_button = QtWidgets.QPushButton("▲")
         self.find_prev_button.setToolTip("Encontrar Anterior")
-        self.find_prev_button.clicked.connect(lambda: self._find_text(QtGui.QTextDocument.FindBackward))
+        self.find_prev_button.clicked.connect(lambda: self._find_text(backward=True))
         search_layout.addWidget(self.find_prev_button)
 
         self.find_next_button = QtWidgets.QPushButton("▼")
         self.find_next_button.setToolTip("Encontrar Próximo")
-        self.find_next_button.clicked.connect(lambda: self._find_text(QtGui.QTextDocument.FindNext))
+        self.find_next_button.clicked.connect(lambda: self._find_text())
         search_layout.addWidget(self.find_next_button)
 
+        self.search_all_files_button = QtWidgets.QPushButton("🔎 Todos os arquivos")
+        self.search_all_files_button.setToolTip("Procurar o termo em todos os arquivos da lista, em paralelo")
+        self.search_all_files_button.clicked.connect(self._start_directory_search)
+        search_layout.addWidget(self.search_all_files_button)
+
         right_layout.addLayout(search_layout)
 
         # Barra de Filtro
         filter_layout = QtWidgets.QHBoxLayout()
         filter_layout.setObjectName("filterBar")
         self.filter_input = QtWidgets.QLineEdit()
-        self.filter_input.setPlaceholderText("Filtrar linhas...")
-        self.filter_input.textChanged.connect(self._apply_filter)
+        self.filter_input.setPlaceholderText("Filtrar linhas... (ex.: erro nfe, /regex/, level:error, after:14:00)")
+        self.filter_input.setToolTip(
+            "Termos separados por espaço: todos devem aparecer (use \"aspas\" para frases).\n"
+            "Operadores: OR/OU, NOT/NÃO ou -termo, AND/E, parênteses.\n"
+            "/expressão regular/ (sem diferenciar maiúsculas)\n"
+            "level:error,warn   after:14:00   before:15:30   time:14:00-15:00"
+        )
+        self.filter_input.textChanged.connect(self._on_filter_text_changed)
         filter_layout.addWidget(self.filter_input)
 
         self.filter_mode_combo = QtWidgets.QComboBox()
         self.filter_mode_combo.addItem("Incluir", "include")
         self.filter_mode_combo.addItem("Excluir", "exclude")
-        self.filter_mode_combo.currentIndexChanged.connect(self._apply_filter)
+        self.filter_mode_combo.currentIndexChanged.connect(self._on_filter_text_changed)
         filter_layout.addWidget(self.filter_mode_combo)
 
+        # Debounce da busca: a lista de ocorrências é recalculada quando o usuário para de digitar
+        # (e quando o conteúdo exibido muda, exceto linhas anexadas, verificadas à parte)
+        self._search_debounce_timer = QtCore.QTimer(self)
+        self._search_debounce_timer.setSingleShot(True)
+        self._search_debounce_timer.setInterval(200)
+        self._search_debounce_timer.timeout.connect(self._start_search)
+
+        # Debounce do filtro: só aplica depois que o usuário para de digitar
+        self._filter_debounce_timer = QtCore.QTimer(self)
+        self._filter_debounce_timer.setSingleShot(True)
+        self._filter_debounce_timer.setInterval(200)
+        self._filter_debounce_timer.timeout.connect(self._apply_filter)
+
         right_layout.addLayout(filter_layout)
 
-        self.log_text_edit = QtWidgets.QTextEdit()
-        self.log_text_edit.setReadOnly(True)
-        self.log_text_edit.setLineWrapMode(QtWidgets.QTextEdit.NoWrap)
-        self.log_text_edit.setFontPointSize(self._current_font_size)
-        self.log_text_edit.document().setMaximumBlockCount(20000)
-        right_layout.addWidget(self.log_text_edit)
+        # Lista virtualizada: o modelo guarda só os seqs das linhas e o delegate decodifica
+        # e realça apenas as linhas visíveis, então não há limite de linhas exibidas
+        self.highlighter = LogHighlighter(self)
+        self.log_model = LogLineModel(self)
+        # QTableView de uma coluna com linhas de altura fixa: inserir linhas no fim não
+        # recalcula o layout da lista inteira (no QListView cada inserção custa O(n))
+        self.log_view = QtWidgets.QTableView()
+        self.log_view.setObjectName("logView")
+        self.log_view.setModel(self.log_model)
+        self.log_view.setItemDelegate(LogLineDelegate(self.highlighter, self.log_view))
+        self.log_view.horizontalHeader().hide()
+        self.log_view.verticalHeader().hide()
+        self.log_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.log_view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.log_view.setShowGrid(False)
+        self.log_view.setWordWrap(False)
+        self.log_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.log_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.log_view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.log_view.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAsNeeded)
+        self._apply_font_size()
+        copy_action = QtWidgets.QAction("Copiar", self.log_view)
+        copy_action.setShortcut(QtGui.QKeySequence.Copy)
+        copy_action.setShortcutContext(QtCore.Qt.WidgetShortcut)
+        copy_action.triggered.connect(self._copy_selected_lines)
+        self.log_view.addAction(copy_action)
+        self.log_view.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        self.highlighter.rules_changed.connect(self.log_view.viewport().update)
+        self.log_view.viewport().installEventFilter(self) # Largura da coluna acompanha a da view
+
+        # Resultados da busca em todos os arquivos, abaixo do log (oculto até a primeira busca)
+        self.directory_search = DirectorySearch(self)
+        self.directory_search.hits_found.connect(self._on_directory_search_hits)
+        self.directory_search.progress.connect(self._on_directory_search_progress)
+        self.directory_search.finished.connect(self._on_directory_search_finished)
+        self.directory_search.file_failed.connect(self._on_directory_search_file_failed)
+
+        self.directory_search_panel = QtWidgets.QWidget()
+        directory_search_layout = QtWidgets.QVBoxLayout(self.directory_search_panel)
+        directory_search_layout.setContentsMargins(0, 0, 0, 0)
+        directory_search_header = QtWidgets.QHBoxLayout()
+        self.directory_search_label = QtWidgets.QLabel("")
+        directory_search_header.addWidget(self.directory_search_label, 1)
+        self.directory_search_cancel_button = QtWidgets.QPushButton("Cancelar")
+        self.directory_search_cancel_button.clicked.connect(self.directory_search.cancel)
+        directory_search_header.addWidget(self.directory_search_cancel_button)
+        directory_search_close_button = QtWidgets.QPushButton("Fechar")
+        directory_search_close_button.clicked.connect(self._close_directory_search)
+        directory_search_header.addWidget(directory_search_close_button)
+        directory_search_layout.addLayout(directory_search_header)
+        self.directory_search_results = QtWidgets.QTreeWidget()
+        self.directory_search_results.setHeaderLabels(["Arquivo", "Linha", "Trecho"])
+        self.directory_search_results.setRootIsDecorated(False)
+        self.directory_search_results.setUniformRowHeights(True)
+        self.directory_search_results.itemClicked.connect(self._open_directory_search_hit)
+        directory_search_layout.addWidget(self.directory_search_results)
+        self.directory_search_panel.hide()
+
+        log_splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        log_splitter.addWidget(self.log_view)
+        log_splitter.addWidget(self.directory_search_panel)
+        log_splitter.setSizes([600, 200])
+        right_layout.addWidget(log_splitter)
+
+        status_layout = QtWidgets.QHBoxLayout()
+        self.status_label = QtWidgets.QLabel("")
+        status_layout.addWidget(self.status_label, 1)
+        self.pending_label = QtWidgets.QLabel("")
+        self.pending_label.setToolTip("Linhas recebidas que ainda serão exibidas (a tela não está acompanhando o ritmo do log)")
+        self.pending_label.hide()
+        status_layout.addWidget(self.pending_label)
+        self.memory_label = QtWidgets.QLabel("")
+        self.memory_label.setToolTip("Linhas do log mantidas em memória (as mais antigas são descartadas ao atingir o limite)")
+        status_layout.addWidget(self.memory_label)
+        right_layout.addLayout(status_layout)
 
-        self.highlighter = LogHighlighter(self.log_text_edit.document())
         self._load_custom_highlight_rules()
         self.highlighter.set_custom_rules(self._highlight_rules)
 
 
-        self.log_text_edit.verticalScrollBar().valueChanged.connect(self._on_scroll_bar_moved)
-        self.log_text_edit.verticalScrollBar().rangeChanged.connect(self._on_scroll_bar_range_changed)
+        self.log_view.verticalScrollBar().valueChanged.connect(self._on_scroll_bar_moved)
+        self.log_view.verticalScrollBar().rangeChanged.connect(self._on_scroll_bar_range_changed)
+
+        # Linhas novas são puxadas do feed do leitor no ritmo da tela (um lote por quadro)
+        self._feed_epoch = -1 # Época do feed exibida; outra época substitui todo o conteúdo
+        self._feed_position = 0 # Próxima posição do feed a exibir
+        self._feed_frontier = 0 # Seqs abaixo deste valor já exibidos como o feed os publicou
+        screen = QtGui.QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen and screen.refreshRate() > 0 else DEFAULT_REFRESH_RATE
+        self._append_timer = QtCore.QTimer(self)
+        self._append_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._append_timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self._append_timer.timeout.connect(self._pull_visible_lines)
 
         button_layout = QtWidgets.QHBoxLayout()
 
@@ -593,6 +919,14 @@ class LogViewerDialog(QtWidgets.QDialog):
         # self.always_on_top_checkbox.stateChanged.connect(self._toggle_always_on_top)
         # button_layout.addWidget(self.always_on_top_checkbox)
 
+        self.goto_input = QtWidgets.QLineEdit()
+        self.goto_input.setPlaceholderText("Ir para linha, % ou hora")
+        self.goto_input.setToolTip("Número da linha (ex: 150000), percentual do arquivo (ex: 50%)\n"
+                                   "ou horário (ex: 14:32, 14:32:10, 2025-07-14 14:32, 14/07/2025 14:32)")
+        self.goto_input.setMaximumWidth(160)
+        self.goto_input.returnPressed.connect(self._go_to_location)
+        button_layout.addWidget(self.goto_input)
+
         self.highlight_settings_button = QtWidgets.QPushButton("🎨 Realce") # Texto alterado
         self.highlight_settings_button.clicked.connect(self._open_highlight_settings)
         button_layout.addWidget(self.highlight_settings_button)
@@ -604,186 +938,462 @@ class LogViewerDialog(QtWidgets.QDialog):
         right_layout.addLayout(button_layout)
         splitter.addWidget(right_panel_widget)
 
-        # Definir tamanhos iniciais para os painéis (25% para a lista, 75% para o log)
-        splitter.setSizes([300, 900])
+        # Definir tamanhos iniciais para os painéis (a lista leva as colunas de tamanho e contagens)
+        splitter.setSizes([420, 900])
 
-        self.thread = None
         self.log_reader = None
         self._init_log_reader_worker()
+        # Listagem da pasta em segundo plano: o diálogo abre sem esperar por ela
+        self.directory_listing = DirectoryListing(self)
+        self.directory_listing.files_added.connect(self._on_log_files_added)
+        self.directory_listing.files_changed.connect(self._on_log_files_changed)
+        self.directory_listing.files_removed.connect(self._on_log_files_removed)
+        self.directory_listing.scan_finished.connect(self._on_log_files_scan_finished)
         self._load_log_files_from_directory()
 
         app_logger.info(f"LogViewerDialog inicializado para diretório: {self.initial_log_directory}")
 
 
     def _init_log_reader_worker(self):
-        """Inicializa o worker LogFileReader em uma nova thread."""
-        if self.log_reader:
-            self.log_reader.stop_monitoring()
-            self.log_reader.deleteLater()
-        if self.thread and self.thread.isRunning():
-            self.thread.quit()
-            self.thread.wait(2000)
-            if self.thread.isRunning():
-                self.thread.terminate()
-            self.thread.deleteLater()
-
-        self.thread = QtCore.QThread()
+        """Cria o worker LogFileReader deste visualizador na thread do TailEngine (compartilhada)."""
+        self._stop_log_reader_worker()
+
         self.log_reader = LogFileReader()
-        self.log_reader.moveToThread(self.thread)
+        self.log_model.set_line_store(self.log_reader.line_store)
+        self._feed_epoch = -1
 
-        self.thread.started.connect(self.log_reader.start_monitoring)
-        self.log_reader.filtered_full_log.connect(self._set_current_log_content)
-        self.log_reader.new_log_lines.connect(self.append_log_lines)
+        self.log_reader.lines_published.connect(self._on_lines_published)
         self.log_reader.error_occurred.connect(self.handle_reader_error)
-        self.log_reader.finished.connect(self.thread.quit)
         self.log_reader.file_loaded.connect(self._reset_viewer_for_new_file)
-
-        self.thread.start()
+        self.log_reader.file_window.connect(self._show_file_window)
+        self.log_reader.index_progress.connect(self._on_index_progress)
+        self.log_reader.status_message.connect(self.status_label.setText)
+        self.log_reader.store_usage.connect(self._on_store_usage)
+        # A thread de leitura atende todos os visualizadores; o worker só sai dela em
+        # _stop_log_reader_worker (finished apenas sinaliza que o monitoramento parou).
+        self.log_file_requested.connect(self.log_reader.set_log_file)
+        self.filter_requested.connect(self.log_reader.set_filter)
+        self.window_requested.connect(self.log_reader.read_window)
+        self.window_at_percentage_requested.connect(self.log_reader.read_window_at_percentage)
+        self.window_at_time_requested.connect(self.log_reader.read_window_at_time)
+        self.rotated_history_requested.connect(self.log_reader.set_include_rotated)
+        self.tail_requested.connect(self.log_reader.resume_tail)
+        self.text_index_requested.connect(self.log_reader.request_text_index)
+
+        TailEngine.instance().attach(self.log_reader)
+        if self.rotated_history_checkbox.isChecked():
+            self.rotated_history_requested.emit(True)
+
+    def _stop_log_reader_worker(self):
+        """Para o monitoramento na thread do motor e descarta o worker deste visualizador."""
+        if self.log_reader:
+            TailEngine.instance().detach(self.log_reader)
+        self.log_reader = None
 
 
-    def _load_log_files_from_directory(self):
-        """Carrega a lista de arquivos de log do diretório inicial ou de um diretório escolhido."""
-        self.file_list_widget.clear()
+    def _load_log_files_from_directory(self, open_newest=True):
+        """
+        Passa a listar o diretório inicial ou um diretório escolhido (em segundo plano, ver
+        DirectoryListing). Com `open_newest`, o arquivo mais recente é aberto assim que a
+        listagem chegar; sem, quem chama abre o arquivo que quiser logo em seguida.
+        """
+        self.file_tree_model.clear()
         self.current_log_file_path = None
-        self.log_text_edit.clear()
+        self.log_model.clear()
         self.setWindowTitle(f"WebBatman - Visualizador de Log")
 
         directory_to_scan = self.initial_log_directory
 
         if not os.path.isdir(directory_to_scan):
+            self.directory_listing.cancel()
             self.handle_reader_error(f"Erro: O caminho de logs '{directory_to_scan}' não é um diretório válido.")
             app_logger.error(f"Caminho de log inválido: {directory_to_scan}")
             return
 
-        log_files_info = []
-        try:
-            for filename in os.listdir(directory_to_scan):
-                full_path = os.path.join(directory_to_scan, filename)
-                if os.path.isfile(full_path) and os.access(full_path, os.R_OK):
-                    if filename.lower().endswith(('.log', '.txt', '.out', '.err', '.trace')) or "." not in filename:
-                        try:
-                            mod_time = os.path.getmtime(full_path)
-                            log_files_info.append((filename, full_path, mod_time))
-                        except Exception as e:
-                            app_logger.warning(f"Não foi possível obter data de modificação para '{filename}': {e}")
-                            log_files_info.append((filename, full_path, 0))
-
-            log_files_info.sort(key=lambda x: x[2], reverse=True)
-
-            for filename, full_path, mod_time in log_files_info:
-                item = QtWidgets.QListWidgetItem(filename)
-                item.setData(QtCore.Qt.UserRole, full_path)
-                self.file_list_widget.addItem(item)
-
-            app_logger.info(f"Carregados {len(log_files_info)} arquivos de log do diretório: {directory_to_scan}")
-
-            if log_files_info:
-                self.file_list_widget.setCurrentRow(0)
-                self._on_log_file_selected(self.file_list_widget.item(0))
+        self.status_label.setText(f"Listando arquivos de log em '{directory_to_scan}'...")
+        self.directory_listing.set_directory(directory_to_scan)
+        if open_newest and self.file_tree_model.file_count():
+            self._select_current_file_item() # Listagem em cache: abre já o mais recente
 
-        except Exception as e:
-            self.handle_reader_error(f"Erro ao listar arquivos de log em '{directory_to_scan}': {e}")
-            app_logger.critical(f"Erro ao listar arquivos: {e}", exc_info=True)
+    def _on_log_files_added(self, entries):
+        self.file_tree_model.add_entries(entries)
+        if self.file_filter_input.text():
+            self.file_tree_view.expandAll() # Arquivos novos que passam no filtro ficam à vista
+
+    def _on_log_files_changed(self, entries):
+        self.file_tree_model.update_entries(entries)
+
+    def _on_log_files_removed(self, paths):
+        self.file_tree_model.remove_paths(paths)
+
+    def _on_log_files_scan_finished(self, error):
+        directory = self.directory_listing.directory
+        if error:
+            self.handle_reader_error(f"Erro ao listar arquivos de log em '{directory}': {error}")
+            app_logger.error(f"Erro ao listar arquivos: {error}")
+            return
+        if self.status_label.text().startswith("Listando arquivos de log"):
+            self.status_label.clear()
+        app_logger.info(f"Carregados {self.file_tree_model.file_count()} arquivos de log do diretório: {directory}")
+        self._select_current_file_item()
+
+    def _select_current_file_item(self):
+        """Marca na árvore o arquivo exibido; sem arquivo exibido, abre o mais recente (de qualquer subpasta)."""
+        if self.current_log_file_path is None:
+            entries = self.directory_listing.entries()
+            if not entries:
+                return
+            self._open_log_file(entries[0][1])
+        index = self.file_tree_proxy.mapFromSource(self.file_tree_model.index_for_path(self.current_log_file_path))
+        if index.isValid() and self.file_tree_view.currentIndex() != index:
+            self.file_tree_view.setCurrentIndex(index)
+            self.file_tree_view.scrollTo(index) # Expande as pastas acima dele
 
 
     def _filter_log_files(self, text):
-        search_text = text.lower()
-        for i in range(self.file_list_widget.count()):
-            item = self.file_list_widget.item(i)
-            item_text = item.text().lower()
-            item.setHidden(search_text not in item_text)
+        self.file_tree_proxy.setFilterFixedString(text)
+        if text:
+            self.file_tree_view.expandAll()
 
 
-    def _on_log_file_selected(self, item):
-        if item:
-            selected_file_name = item.text()
-            full_file_path = item.data(QtCore.Qt.UserRole)
-            app_logger.info(f"Arquivo selecionado: {full_file_path}")
+    def _on_log_file_selected(self, index):
+        full_file_path = index.data(LOG_FILE_PATH_ROLE)
+        if full_file_path: # Clique numa pasta só a expande/recolhe
+            self._open_log_file(full_file_path)
 
-            if full_file_path == self.current_log_file_path:
-                app_logger.info(f"Arquivo '{selected_file_name}' já está sendo monitorado. Nenhuma ação necessária.")
-                return
+    def _open_log_file(self, full_file_path):
+        app_logger.info(f"Arquivo selecionado: {full_file_path}")
+        selected_file_name = os.path.basename(full_file_path)
+
+        if full_file_path == self.current_log_file_path:
+            app_logger.info(f"Arquivo '{selected_file_name}' já está sendo monitorado. Nenhuma ação necessária.")
+            return
 
-            self.current_log_file_path = full_file_path
-            self.log_reader.set_log_file(full_file_path)
-            self.setWindowTitle(f"WebBatman - Visualizador de Log: {selected_file_name}")
+        self.current_log_file_path = full_file_path
+        self.log_file_requested.emit(full_file_path)
+        self.setWindowTitle(f"WebBatman - Visualizador de Log: {selected_file_name}")
 
 
     # --- Métodos de Busca ---
-    def _reset_search(self):
-        self._last_found_cursor = None
+    def _on_search_text_changed(self):
         self._search_term = self.search_input.text()
         self._search_case_sensitive = self.search_case_sensitive_checkbox.isChecked()
         self.highlighter.set_search_pattern(self._search_term, self._search_case_sensitive)
-        self.log_text_edit.setTextCursor(QtGui.QTextCursor(self.log_text_edit.document()))
-
-
-    def _find_text(self, options):
-        search_text = self.search_input.text()
-        if not search_text:
-            self.highlighter.set_search_pattern("")
+        self._search_debounce_timer.start()
+
+    def _search_predicate(self):
+        needle = self._search_term
+        if self._search_case_sensitive:
+            return lambda line: needle in line
+        needle = needle.lower()
+        return lambda line: needle in line.lower()
+
+    def _start_search(self):
+        """Recalcula todas as ocorrências do termo nas linhas exibidas."""
+        self._search_debounce_timer.stop()
+        self._search_generation += 1
+        if self._search_job:
+            self._search_job.cancel()
+            self._search_job = None
+        self._search_matches = array('Q')
+        self._search_current = -1
+        self._search_pending_seqs = array('Q')
+        if not self._search_term:
+            self._search_jump_pending = None
+            self._update_search_label()
             return
 
-        flags = options
-        if self.search_case_sensitive_checkbox.isChecked():
-            flags |= QtGui.QTextDocument.FindCaseSensitively
-        else:
-            flags &= ~QtGui.QTextDocument.FindCaseSensitively
+        if self.log_model.is_showing_file_window():
+            # Trecho avulso (no máximo WINDOW_LINES linhas): verifica na hora, por número de linha
+            predicate = self._search_predicate()
+            self._search_matches_are_rows = True
+            self._search_matches = array('Q', (row for row in range(self.log_model.rowCount())
+                                               if predicate(self.log_model.line_text(row))))
+            self._on_search_results_changed()
+            return
 
-        self.highlighter.set_search_pattern(search_text, self.search_case_sensitive_checkbox.isChecked())
+        self._search_matches_are_rows = False
+        seqs = self.log_model.seqs()
+        store = self.log_model.line_store()
+        if self.log_reader and store is not None:
+            self.text_index_requested.emit() # Constrói o índice para as próximas buscas, se ainda não existir
+            ranges = self.log_reader.text_index.candidate_ranges([self._search_term.lower()], store.first_seq, store.next_seq)
+            if ranges is not None:
+                # Só as linhas exibidas nos blocos que podem conter o termo precisam ser verificadas
+                candidates = array('Q')
+                for low, high in ranges:
+                    candidates.extend(seqs[bisect_left(seqs, low):bisect_left(seqs, high)])
+                seqs = candidates
+        self._run_search_job(seqs)
+        self._update_search_label()
+
+    def _run_search_job(self, seqs):
+        store = self.log_model.line_store()
+        if store is None:
+            return
+        end_seq = store.next_seq
+        job = FilterJob(self._search_generation, store, self._search_predicate(), end_seq, seqs, end_seq)
+        job.signals.partial_results.connect(self._on_search_partial_results)
+        job.signals.finished.connect(self._on_search_finished)
+        self._search_job = job
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def _search_new_lines(self, seqs):
+        """Linhas anexadas ao final: só elas são verificadas, depois do job em andamento."""
+        if not self._search_term or self._search_matches_are_rows:
+            return
+        self._search_pending_seqs.extend(seqs)
+        if not self._search_job:
+            pending, self._search_pending_seqs = self._search_pending_seqs, array('Q')
+            self._run_search_job(pending)
 
-        cursor = self.log_text_edit.textCursor()
+    def _on_search_partial_results(self, generation, seqs, scanned_end):
+        if generation != self._search_generation or not seqs:
+            return
+        self._search_matches.extend(seqs) # Os jobs rodam um de cada vez: a lista continua em ordem
+        self._on_search_results_changed()
 
-        start_position = cursor.position()
-        if options == QtGui.QTextDocument.FindBackward:
-            if cursor.hasSelection():
-                start_position = cursor.selectionStart()
-            if start_position == 0 and not cursor.hasSelection():
-                start_position = self.log_text_edit.document().characterCount()
+    def _on_search_finished(self, generation, matches, cancelled):
+        if generation != self._search_generation:
+            return
+        self._search_job = None
+        if self._search_pending_seqs:
+            pending, self._search_pending_seqs = self._search_pending_seqs, array('Q')
+            self._run_search_job(pending)
+        self._on_search_results_changed()
+
+    def _on_search_results_changed(self):
+        if self._search_jump_pending is not None and self._search_matches:
+            backward, self._search_jump_pending = self._search_jump_pending, None
+            self._find_text(backward)
+            return
+        if self._search_jump_pending is not None and not self._search_job:
+            self._search_jump_pending = None
+        self._update_search_label()
+
+    def _trim_evicted_matches(self):
+        """Descarta as ocorrências cujas linhas saíram da memória (e da lista exibida)."""
+        store = self.log_model.line_store()
+        if self._search_matches_are_rows or store is None or not self._search_matches:
+            return
+        count = bisect_left(self._search_matches, store.first_seq)
+        if count:
+            del self._search_matches[:count]
+            self._search_current = max(-1, self._search_current - count)
+            self._update_search_label()
+
+    def _update_search_label(self):
+        if not self._search_term:
+            self.search_count_label.clear()
+            return
+        total = len(self._search_matches)
+        searching = "…" if self._search_job or self._search_debounce_timer.isActive() else ""
+        if not total:
+            self.search_count_label.setText("Buscando…" if searching else "Nenhum resultado")
+        elif self._search_current < 0:
+            self.search_count_label.setText(f"{total} ocorrências{searching}")
         else:
-            if cursor.hasSelection():
-                start_position = cursor.selectionEnd()
-            if start_position >= self.log_text_edit.document().characterCount():
-                start_position = 0
-
-
-        found_cursor = self.log_text_edit.document().find(search_text, start_position, flags)
-
-        if found_cursor.isNull():
-            if options == QtGui.QTextDocument.FindNext:
-                found_cursor = self.log_text_edit.document().find(search_text, 0, flags)
-            else:
-                found_cursor = self.log_text_edit.document().find(search_text, self.log_text_edit.document().characterCount(), flags | QtGui.QTextDocument.FindBackward)
+            self.search_count_label.setText(f"{self._search_current + 1} de {total}{searching}")
 
-            if found_cursor.isNull() or (found_cursor.position() == cursor.position() and not cursor.hasSelection()):
-                QtWidgets.QMessageBox.information(self, "Busca", f"O termo '{search_text}' não foi encontrado.")
-                self.highlighter.set_search_pattern("")
-                return
-            else:
-                QtWidgets.QMessageBox.information(self, "Busca", "Fim do documento. Reiniciando a busca do início.")
+    def _match_row(self, index):
+        match = self._search_matches[index]
+        return match if self._search_matches_are_rows else self.log_model.row_for_seq(match)
 
+    def _find_text(self, backward=False):
+        """Vai para a ocorrência seguinte (ou anterior), dando a volta no fim/início da lista."""
+        if self._search_debounce_timer.isActive():
+            self._start_search() # Enter logo após digitar: não espera o debounce
+        if not self._search_term:
+            return
+        matches = self._search_matches
+        if not matches:
+            if self._search_job:
+                self._search_jump_pending = backward # Vai para a primeira ocorrência assim que encontrada
+            return
 
-        self.log_text_edit.setTextCursor(found_cursor)
-        self._last_found_cursor = found_cursor
+        current_row = self.log_view.currentIndex().row()
+        index = self._search_current
+        if 0 <= index < len(matches) and current_row == self._match_row(index):
+            index += -1 if backward else 1
+        elif current_row >= 0:
+            # A seleção mudou desde a última ocorrência: parte da linha atual
+            key = current_row if self._search_matches_are_rows else self.log_model.seq_at(current_row)
+            index = bisect_left(matches, key) - 1 if backward else bisect_right(matches, key)
+        else:
+            index = len(matches) - 1 if backward else 0
+
+        if index >= len(matches) or index < 0:
+            index = 0 if index >= len(matches) else len(matches) - 1
+            if current_row >= 0:
+                self.status_label.setText("Início da lista: busca continua do fim." if backward
+                                          else "Fim da lista: busca continua do início.")
+        self._search_current = index
+        self._select_row(self._match_row(index))
+        self._update_search_label()
+
+    # --- Busca em todos os arquivos do diretório ---
+    def _start_directory_search(self):
+        term = self.search_input.text()
+        if not term:
+            self.status_label.setText("Digite um termo na pesquisa para procurar em todos os arquivos.")
+            return
+        paths = self.file_tree_model.paths()
+        self.directory_search_results.clear()
+        self.directory_search_panel.show()
+        self.directory_search_cancel_button.setEnabled(True)
+        self.directory_search_label.setText(f"Procurando '{term}' em {len(paths)} arquivos...")
+        app_logger.info(f"Busca em {len(paths)} arquivos de '{self.initial_log_directory}': '{term}'")
+        self.directory_search.start(paths, term, self.search_case_sensitive_checkbox.isChecked())
+
+    def _on_directory_search_hits(self, path, hits):
+        file_name = os.path.basename(path)
+        items = []
+        for line_number, snippet in hits:
+            item = QtWidgets.QTreeWidgetItem([file_name, str(line_number + 1), snippet])
+            item.setData(0, QtCore.Qt.UserRole, path)
+            item.setData(1, QtCore.Qt.UserRole, line_number)
+            items.append(item)
+        self.directory_search_results.addTopLevelItems(items)
+
+    def _on_directory_search_progress(self, files_done, files_total, result_count, mb_per_second):
+        self.directory_search_label.setText(f"{files_done}/{files_total} arquivos · {result_count} resultados · "
+                                            f"{mb_per_second:.1f} MB/s")
+
+    def _on_directory_search_finished(self, cancelled, limit_reached):
+        self.directory_search_cancel_button.setEnabled(False)
+        text = self.directory_search_label.text()
+        if limit_reached:
+            text += f" · limite de {self.directory_search.max_results} resultados atingido"
+        elif cancelled:
+            text += " · cancelada"
+        self.directory_search_label.setText(text)
+
+    def _on_directory_search_file_failed(self, path, error):
+        app_logger.warning(f"Erro ao procurar em '{path}': {error}")
+
+    def _close_directory_search(self):
+        self.directory_search.cancel()
+        self.directory_search_panel.hide()
+
+    def _open_directory_search_hit(self, item):
+        self.open_file_at_line(item.data(0, QtCore.Qt.UserRole), item.data(1, QtCore.Qt.UserRole))
+
+    def open_file_at_line(self, path, line_number):
+        """Abre o arquivo (se não for o atual) e exibe o trecho ao redor da linha (base 0)."""
+        # A linha é relativa ao próprio arquivo: o histórico de rotacionados deslocaria a numeração
+        self.rotated_history_checkbox.setChecked(False)
+        if path != self.current_log_file_path:
+            self._open_log_file(path) # Mesmo que a lista tenha mudado desde a busca
+            self._select_current_file_item()
+        # Os pedidos são enfileirados na thread de leitura: a janela é lida depois da troca de arquivo
+        self.window_requested.emit(line_number)
+
+    def _select_row(self, row, hint=QtWidgets.QAbstractItemView.EnsureVisible):
+        index = self.log_model.index(row, 0)
+        self.log_view.setCurrentIndex(index)
+        self.log_view.scrollTo(index, hint)
+
+    def _copy_selected_lines(self):
+        rows = sorted(index.row() for index in self.log_view.selectionModel().selectedRows())
+        if rows:
+            QtWidgets.QApplication.clipboard().setText("\n".join(self.log_model.line_text(row) for row in rows))
 
     # --- Métodos de Filtro ---
+    def _on_filter_text_changed(self):
+        # Aborta já o filtro em andamento; o novo só é disparado após o debounce
+        if self.log_reader:
+            self.log_reader.cancel_filter_job()
+        self._filter_debounce_timer.start()
+
     def _apply_filter(self):
         self._filter_term = self.filter_input.text()
         self._filter_mode = self.filter_mode_combo.currentData()
 
         if self.log_reader:
-            self.log_reader.set_filter(self._filter_term, self._filter_mode)
+            self.filter_requested.emit(self._filter_term, self._filter_mode)
+
+    # --- Métodos de Navegação pelo Arquivo ---
+    def _go_to_location(self):
+        """Interpreta o campo 'Ir para' (linha, percentual ou horário) e pede o trecho ao leitor."""
+        text = self.goto_input.text().strip().replace(",", ".")
+        if not text or not self.log_reader:
+            return
+        try:
+            if ":" in text:
+                if parse_user_timestamp(text) is None:
+                    raise ValueError(text)
+                self.window_at_time_requested.emit(text)
+            elif text.endswith("%"):
+                self.window_at_percentage_requested.emit(float(text[:-1]))
+            else:
+                self.window_requested.emit(max(0, int(text) - 1))
+        except ValueError:
+            self.status_label.setText(f"Valor inválido para 'Ir para': '{text}'. Use um número de linha, um percentual (ex: 50%) ou um horário (ex: 14:32).")
+
+    def _show_file_window(self, lines, first_line, target_line, total_lines):
+        """Exibe um trecho arbitrário do arquivo, suspendendo o modo seguir."""
+        self._browsing_window = True
+        self.auto_scroll_enabled = False
+        self.auto_scroll_button.setChecked(False)
+
+        self.log_view.verticalScrollBar().valueChanged.disconnect(self._on_scroll_bar_moved)
+        self._append_timer.stop() # As linhas novas ficam no feed e voltam com 'Seguir'
+        self._update_pending_label(0)
+        self.log_model.set_text_lines(lines)
+        self._update_log_column_width()
+        self.log_view.verticalScrollBar().valueChanged.connect(self._on_scroll_bar_moved)
+
+        if first_line >= 0 and lines:
+            self._select_row(min(len(lines) - 1, max(0, target_line - first_line)),
+                             QtWidgets.QAbstractItemView.PositionAtCenter)
+            self.status_label.setText(f"Exibindo linhas {first_line + 1}-{first_line + len(lines)} de {total_lines}. "
+                                      f"Clique em 'Seguir' para voltar ao final do log.")
+        else:
+            if lines:
+                self._select_row(0, QtWidgets.QAbstractItemView.PositionAtTop) # Primeira linha do trecho pedido
+            self.status_label.setText("Exibindo trecho ainda não indexado do arquivo. Clique em 'Seguir' para voltar ao final do log.")
+        if self._search_term:
+            self._start_search()
+
+    def _on_store_usage(self, line_count, used_bytes):
+        self.log_model.drop_evicted()
+        self._trim_evicted_matches()
+        self.memory_label.setText(f"{line_count} linhas em memória ({used_bytes / (1024 * 1024):.1f} MB)")
+
+    def _on_index_progress(self, indexed_lines, percent):
+        if not self._browsing_window:
+            self.status_label.setText(f"Índice: {indexed_lines} linhas ({percent}% do arquivo)")
 
     # --- Métodos de Zoom ---
+    def _apply_font_size(self):
+        # A folha de estilo do diálogo define a fonte; a do próprio widget tem precedência
+        self.log_view.setStyleSheet(f"QTableView#logView {{ font-size: {self._current_font_size}pt; }}")
+        self.log_view.ensurePolished()
+        self.log_view.verticalHeader().setDefaultSectionSize(self.log_view.fontMetrics().height() + 2)
+        self._update_log_column_width()
+
+    def _update_log_column_width(self):
+        """Ajusta a largura da coluna à maior linha conhecida (rolagem horizontal)."""
+        metrics = self.log_view.fontMetrics()
+        chars = min(self.log_model.max_line_length(), MAX_LINE_WIDTH_CHARS)
+        width = max(metrics.horizontalAdvance("M") * chars + 2 * LINE_PADDING, self.log_view.viewport().width())
+        if self.log_view.columnWidth(0) != width:
+            self.log_view.setColumnWidth(0, width)
+
+    def eventFilter(self, watched, event):
+        if watched is self.log_view.viewport() and event.type() == QtCore.QEvent.Resize:
+            self._update_log_column_width()
+        return super().eventFilter(watched, event)
+
     def _zoom_in(self):
         if self._current_font_size < 20:
             self._current_font_size += 1
-            self.log_text_edit.setFontPointSize(self._current_font_size)
+            self._apply_font_size()
 
     def _zoom_out(self):
         if self._current_font_size > 8:
             self._current_font_size -= 1
-            self.log_text_edit.setFontPointSize(self._current_font_size)
+            self._apply_font_size()
 
     # --- REMOVIDO: Métodos de "Always on Top" ---
     # def _toggle_always_on_top(self, state):
@@ -814,11 +1424,14 @@ class LogViewerDialog(QtWidgets.QDialog):
     def _update_highlight_rules(self, new_rules):
         self._highlight_rules = new_rules
         self.highlighter.set_custom_rules(self._highlight_rules)
-        self.highlighter.rehighlight()
 
     def _reset_viewer_for_new_file(self):
         """Reinicia o visualizador quando um novo arquivo é carregado pelo LogFileReader."""
-        self.log_text_edit.clear()
+        self.log_model.clear()
+        self._feed_epoch = -1 # O próximo puxão traz todo o conteúdo do arquivo novo
+        self._append_timer.start()
+        self._browsing_window = False
+        self.status_label.clear()
         self.auto_scroll_enabled = True
         self.auto_scroll_button.setChecked(True)
         self.filter_input.clear()
@@ -827,37 +1440,63 @@ class LogViewerDialog(QtWidgets.QDialog):
         self._filter_mode = "include"
         self.search_input.clear()
         self._search_term = ""
-        self._last_found_cursor = None
         self.highlighter.set_search_pattern("")
-        self.highlighter.rehighlight()
-
-
-    def _set_current_log_content(self, lines):
-        """Define o conteúdo TOTAL do QTextEdit (usado para carga inicial e mudanças de filtro)."""
-        self.log_text_edit.verticalScrollBar().valueChanged.disconnect(self._on_scroll_bar_moved)
-        self.log_text_edit.verticalScrollBar().rangeChanged.disconnect(self._on_scroll_bar_range_changed)
-
-        self.log_text_edit.clear()
-        self.log_text_edit.setText("\n".join(lines))
-
-        self.log_text_edit.verticalScrollBar().valueChanged.connect(self._on_scroll_bar_moved)
-        self.log_text_edit.verticalScrollBar().rangeChanged.connect(self._on_scroll_bar_range_changed)
-
-        self.highlighter.set_search_pattern(self._search_term, self._search_case_sensitive)
-        self.highlighter.rehighlight()
+        self._start_search() # Descarta as ocorrências do arquivo anterior
+
+
+    def _update_log_content(self, seqs, lo=0, hi=None):
+        """
+        Troca as linhas exibidas com seq em [lo, hi) por `seqs` (carga inicial, mudanças de
+        filtro e linhas novas). O modelo aplica só a diferença; fora do modo seguir, a
+        linha do topo da tela continua no topo (ou a seguinte, se saiu do filtro).
+        """
+        anchor_seq = None
+        if not self.auto_scroll_enabled and not self._browsing_window:
+            top_row = self.log_view.rowAt(0)
+            if top_row >= 0:
+                anchor_seq = self.log_model.seq_at(top_row)
+        self._browsing_window = False
+        self.log_view.verticalScrollBar().valueChanged.disconnect(self._on_scroll_bar_moved)
+        self.log_view.verticalScrollBar().rangeChanged.disconnect(self._on_scroll_bar_range_changed)
+
+        # Linhas só acrescentadas ao final: a busca verifica apenas elas; qualquer outra
+        # mudança (filtro, volta da navegação) recalcula a lista de ocorrências
+        replaced_rows = 0
+        appended = not self.log_model.is_showing_file_window()
+        if appended:
+            first_row = self.log_model.row_for_seq(lo)
+            replaced_rows = (self.log_model.rowCount() if hi is None else self.log_model.row_for_seq(hi)) - first_row
+            appended = not replaced_rows and first_row == self.log_model.rowCount()
+        self.log_model.merge_seqs(seqs, lo, hi)
+        self._trim_evicted_matches()
+        if self._search_term:
+            if appended:
+                self._search_new_lines(seqs)
+            elif seqs or replaced_rows:
+                self._search_debounce_timer.start()
+                self._update_search_label()
+        self._update_log_column_width()
+        if anchor_seq is not None:
+            row = min(self.log_model.row_for_seq(anchor_seq), self.log_model.rowCount() - 1)
+            if row >= 0:
+                self.log_view.doItemsLayout() # Atualiza a faixa da rolagem antes de reposicionar
+                self.log_view.scrollTo(self.log_model.index(row, 0), QtWidgets.QAbstractItemView.PositionAtTop)
+
+        self.log_view.verticalScrollBar().valueChanged.connect(self._on_scroll_bar_moved)
+        self.log_view.verticalScrollBar().rangeChanged.connect(self._on_scroll_bar_range_changed)
 
         if self.auto_scroll_enabled:
             self._force_scroll_to_bottom()
 
 
     def _on_scroll_bar_moved(self, value):
-        scrollbar = self.log_text_edit.verticalScrollBar()
-        if scrollbar.maximum() - value > 20:
+        scrollbar = self.log_view.verticalScrollBar()
+        if scrollbar.maximum() - value > 1: # Valores em linhas (rolagem por item)
             if self.auto_scroll_enabled:
                 self.auto_scroll_enabled = False
                 self.auto_scroll_button.setChecked(False)
         else:
-            if not self.auto_scroll_enabled and scrollbar.value() == scrollbar.maximum():
+            if not self.auto_scroll_enabled and not self._browsing_window and scrollbar.value() == scrollbar.maximum():
                 self.auto_scroll_enabled = True
                 self.auto_scroll_button.setChecked(True)
 
@@ -866,31 +1505,62 @@ class LogViewerDialog(QtWidgets.QDialog):
             self._force_scroll_to_bottom()
 
     def _force_scroll_to_bottom(self):
-        self.log_text_edit.verticalScrollBar().setValue(self.log_text_edit.verticalScrollBar().maximum())
+        self.log_view.scrollToBottom()
         self.auto_scroll_enabled = True
         self.auto_scroll_button.setChecked(True)
 
     def _toggle_auto_scroll(self):
         self.auto_scroll_enabled = self.auto_scroll_button.isChecked()
-        if self.auto_scroll_enabled:
+        if self.auto_scroll_enabled and self._browsing_window:
+            # Sai da navegação: o leitor reenvia o final do log
+            self.tail_requested.emit()
+        elif self.auto_scroll_enabled:
             self._force_scroll_to_bottom()
 
-    def append_log_lines(self, lines):
-        """Adiciona múltiplas novas linhas ao QTextEdit como texto puro."""
-        if not lines:
+    def _on_lines_published(self):
+        # O aviso não traz dados: as linhas são puxadas do feed no próximo quadro
+        if not self._append_timer.isActive():
+            self._append_timer.start()
+
+    def _pull_visible_lines(self):
+        """Puxa do feed do leitor o conteúdo substituído ou o próximo lote limitado por quadro."""
+        feed = self.log_reader.visible_feed if self.log_reader else None
+        if feed is None or (self._browsing_window and feed.epoch == self._feed_epoch):
+            # Durante a navegação as linhas novas ficam no feed e voltam com 'Seguir'
+            self._append_timer.stop()
+            self._update_pending_label(0)
             return
 
-        cursor = self.log_text_edit.textCursor()
-        cursor.movePosition(QtGui.QTextCursor.End)
-        cursor.insertText("\n" + "\n".join(lines))
-
-        if self.auto_scroll_enabled:
-            self._force_scroll_to_bottom()
-
-        for line_number in range(cursor.blockNumber(), cursor.blockNumber() - len(lines) -1, -1):
-            block = self.log_text_edit.document().findBlockByNumber(line_number)
-            if block.isValid():
-                self.highlighter.rehighlightBlock(block)
+        epoch, position, seqs, scanned_end = feed.read(self._feed_epoch, self._feed_position, MAX_APPEND_ROWS_PER_FRAME)
+        if epoch != self._feed_epoch:
+            store = feed.line_store
+            if store is not self.log_model.line_store():
+                # Seqs de outro LineStore (troca de arquivo). O store lido só é o da época
+                # recebida se nenhum reset aconteceu desde a leitura; senão tenta no próximo quadro
+                if feed.epoch != epoch:
+                    return
+                self.log_model.set_line_store(store)
+            # Conteúdo substituído (ex.: filtro novo): o antigo continua na tela acima do
+            # ponto já varrido e vai sendo trocado pelo novo conforme a varredura avança
+            self._feed_epoch = epoch
+            self._feed_frontier = 0
+        if seqs or scanned_end != self._feed_frontier:
+            self._update_log_content(seqs, self._feed_frontier, scanned_end)
+        self._feed_position = position + len(seqs)
+        if scanned_end is not None:
+            self._feed_frontier = scanned_end
+        elif seqs:
+            self._feed_frontier = seqs[-1] + 1
+
+        pending = feed.end_position() - self._feed_position
+        if not pending:
+            self._append_timer.stop()
+        self._update_pending_label(pending)
+
+    def _update_pending_label(self, pending):
+        if pending:
+            self.pending_label.setText(f"{pending} linhas pendentes")
+        self.pending_label.setVisible(bool(pending))
 
 
     # REMOVIDO: _copy_selected_text
@@ -910,7 +1580,7 @@ class LogViewerDialog(QtWidgets.QDialog):
         file_dialog = QtWidgets.QFileDialog(self)
         file_dialog.setWindowTitle("Selecionar Novo Arquivo de Log")
         file_dialog.setDirectory(initial_dir)
-        file_dialog.setNameFilter("Arquivos de Log (*.log *.txt *.out *.err *.trace);;Todos os Arquivos (*.*)")
+        file_dialog.setNameFilter("Arquivos de Log (*.log *.txt *.out *.err *.trace *.gz *.zip);;Todos os Arquivos (*.*)")
         file_dialog.setFileMode(QtWidgets.QFileDialog.ExistingFile)
 
         if file_dialog.exec_():
@@ -918,19 +1588,17 @@ class LogViewerDialog(QtWidgets.QDialog):
             if selected_files:
                 new_log_path = selected_files[0]
                 if self.log_reader:
-                    self.log_reader.set_log_file(new_log_path)
                     new_dir = os.path.dirname(new_log_path)
                     if new_dir != self.initial_log_directory:
                         self.initial_log_directory = new_dir
-                        self._load_log_files_from_directory()
-                        for i in range(self.file_list_widget.count()):
-                            item = self.file_list_widget.item(i)
-                            if item.data(QtCore.Qt.UserRole) == new_log_path:
-                                self.file_list_widget.setCurrentItem(item)
-                                break
+                        # Sem abrir o mais recente: o arquivo escolhido é aberto logo abaixo
+                        self._load_log_files_from_directory(open_newest=False)
+                    self._open_log_file(new_log_path)
+                    # O item do arquivo é marcado quando a listagem da pasta chegar a ele
+                    self._select_current_file_item()
                 else:
                     self._init_log_reader_worker()
-                    self.log_reader.set_log_file(new_log_path)
+                    self.log_file_requested.emit(new_log_path)
                 app_logger.info(f"Usuário escolheu um novo log: {new_log_path}") # Mover esta linha para cá
 
 
@@ -939,11 +1607,9 @@ class LogViewerDialog(QtWidgets.QDialog):
         app_logger.error(f"Erro do LogFileReader: {message}")
 
     def closeEvent(self, event):
-        if self.log_reader:
-            self.log_reader.stop_monitoring()
-        if self.thread and self.thread.isRunning():
-            self.thread.quit()
-            self.thread.wait(2000)
-            if self.thread.isRunning():
-                self.thread.terminate()
+        if self._search_job:
+            self._search_job.cancel()
+        self.directory_search.cancel()
+        self.directory_listing.cancel()
+        self._stop_log_reader_worker()
         super().closeEvent(event)
\ No newline at end of file
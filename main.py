@@ -2,6 +2,7 @@ import sys
 import json
 import os
 import ctypes
+import multiprocessing
 import psutil
 import subprocess
 import time
@@ -16,6 +17,7 @@ from datetime import datetime
 # Assumo que log_viewer.py e app_logger.py estão no mesmo diretório
 try:
     from log_viewer import LogViewerDialog
+    from fleet_search_dialog import FleetSearchDialog
     from app_logger import app_logger, StderrRedirector
 except ImportError as e:
     print(f"Erro ao importar módulos de log: {e}. Certifique-se de que 'log_viewer.py' e 'app_logger.py' estão no mesmo diretório.")
@@ -1278,6 +1280,12 @@ class MainWindow(QtWidgets.QMainWindow):
         open_logs_folder_action.triggered.connect(self.abrir_pasta_logs_app)
         tools_menu.addAction(open_logs_folder_action)
 
+        fleet_search_action = QtWidgets.QAction("Buscar nos Logs de Todos os Serviços", self)
+        fleet_search_action.setShortcut("Ctrl+Shift+F")
+        fleet_search_action.setStatusTip("Procura um termo (chave de NF, id de transação...) nos logs de todos os serviços")
+        fleet_search_action.triggered.connect(self.abrir_busca_geral_logs)
+        tools_menu.addAction(fleet_search_action)
+
         # Menu Ajuda
         help_menu = menubar.addMenu("&Ajuda")
         about_action = QtWidgets.QAction("Sobre", self)
@@ -1372,6 +1380,12 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Erro", "Não foi possível abrir a pasta de logs da aplicação.")
             self.exibir_status_na_barra("Erro ao abrir pasta de logs da aplicação.", False)
 
+    def abrir_busca_geral_logs(self):
+        """Abre a busca nos logs de todos os serviços cadastrados."""
+        self.fleet_search_dialog = FleetSearchDialog(self.servicos, self)
+        self.fleet_search_dialog.show() # Não bloqueia a janela principal
+        self.exibir_status_na_barra("Busca nos logs de todos os serviços aberta.", True)
+
     def show_about_dialog(self):
         """Exibe o diálogo 'Sobre'."""
         about_text = f"""
@@ -1492,4 +1506,5 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Workers da busca geral (ProcessPoolExecutor) no executável empacotado
     main()
\ No newline at end of file
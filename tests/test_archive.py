@@ -0,0 +1,89 @@
+import gzip
+import random
+import zipfile
+
+import pytest
+
+import log_archive
+from log_archive import CompressedLogFile
+from log_index_cache import IndexCache
+
+
+@pytest.fixture
+def small_checkpoints(monkeypatch):
+    """Checkpoints a cada 64 KB, para que um arquivo pequeno já tenha vários."""
+    monkeypatch.setattr(log_archive, "CHECKPOINT_INTERVAL", 64 * 1024)
+    monkeypatch.setattr(log_archive, "INFLATE_OUTPUT_BYTES", 16 * 1024)
+    monkeypatch.setattr(log_archive, "_shared_indexes", log_archive.OrderedDict())
+
+
+def make_content(lines=20000):
+    rng = random.Random(22)
+    return b"".join(f"2025-07-14 10:{i // 600 % 60:02d}:{i // 10 % 60:02d} INFO evento {rng.random()}\n".encode()
+                    for i in range(lines))
+
+
+def write_multi_member_gz(path, content):
+    """Dois membros gzip concatenados: o ISIZE do final só descreve o segundo."""
+    middle = len(content) // 2
+    path.write_bytes(gzip.compress(content[:middle]) + gzip.compress(content[middle:]))
+
+
+def test_seek_and_read_through_checkpoints(tmp_path, small_checkpoints):
+    content = make_content()
+    path = tmp_path / "Batman.log.gz"
+    write_multi_member_gz(path, content)
+    rng = random.Random(1)
+    with CompressedLogFile(str(path)) as file_obj:
+        assert file_obj.read() == content
+        assert len(file_obj._index.offsets) > 10
+        for _ in range(200):
+            offset = rng.randrange(len(content))
+            size = rng.randrange(1, 100000)
+            file_obj.seek(offset)
+            assert file_obj.read(size) == content[offset:offset + size]
+            assert file_obj.tell() == min(offset + size, len(content))
+        file_obj.seek(-10, 2)
+        assert file_obj.read() == content[-10:]
+        file_obj.seek(len(content) // 2 - 5)
+        assert file_obj.readline() == content[len(content) // 2 - 5:content.index(b"\n", len(content) // 2 - 5) + 1]
+
+
+def test_zip_member_is_read_like_a_plain_file(tmp_path, small_checkpoints):
+    content = make_content(5000)
+    path = tmp_path / "Batman.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Batman.log", content)
+    with CompressedLogFile(str(path)) as file_obj:
+        assert file_obj.stat().st_size_exact and file_obj.stat().st_size == len(content)
+        file_obj.seek(123456)
+        assert file_obj.read(1000) == content[123456:124456]
+
+
+def test_multi_member_size_estimate_is_replaced_by_inflated_size(tmp_path, small_checkpoints):
+    content = make_content()
+    path = tmp_path / "Batman.log.gz"
+    write_multi_member_gz(path, content)
+    with CompressedLogFile(str(path)) as file_obj:
+        stat = file_obj.stat()
+        assert not stat.st_size_exact and stat.st_size != len(content) # ISIZE só do último membro
+        assert file_obj.exact_size() == len(content)
+        assert file_obj.stat().st_size_exact
+
+
+def test_index_cache_keeps_inflated_size_across_sessions(tmp_path, small_checkpoints, monkeypatch):
+    content = make_content()
+    path = tmp_path / "Batman.log.gz"
+    write_multi_member_gz(path, content)
+    cache = IndexCache(directory=str(tmp_path / "cache"))
+    with CompressedLogFile(str(path)) as file_obj:
+        file_obj.read()
+        assert cache.save(str(path), file_obj, len(content), {})
+
+    # Nova sessão: sem os checkpoints em memória, o cache não pode exigir descomprimir tudo
+    monkeypatch.setattr(log_archive, "_shared_indexes", log_archive.OrderedDict())
+    with CompressedLogFile(str(path)) as file_obj:
+        meta, _ = cache.load(str(path), file_obj)
+        assert meta["indexed_bytes"] == len(content)
+        assert file_obj._index.furthest == 0 # Nada descomprimido
+        assert file_obj.stat().st_size_exact and file_obj.stat().st_size == len(content)
@@ -0,0 +1,28 @@
+import io
+
+from log_encoding import SNIFF_BYTES, decode_line, sniff_encoding
+
+
+class SizedBytesIO(io.BytesIO):
+    """BytesIO com stat(), como os fluxos virtuais aceitos por file_size_of."""
+
+    def stat(self):
+        return type("Stat", (), {"st_size": len(self.getvalue())})()
+
+
+def test_ascii_file_is_utf8():
+    assert sniff_encoding(SizedBytesIO(b"INFO tudo certo\n" * 10)) == 'utf-8'
+
+
+def test_cp1252_file_is_cp1252():
+    assert sniff_encoding(SizedBytesIO("ERRO na emissão da nota\n".encode('cp1252') * 10)) == 'cp1252'
+
+
+def test_valid_utf8_head_with_stray_byte_in_tail_is_utf8():
+    head = "INFO ação concluída\n".encode('utf-8')
+    filler = b"INFO ok\n" * (2 * SNIFF_BYTES // 8)
+    tail = b"INFO byte solto \xe7\n" + b"INFO ok\n" * 10
+    data = head + filler + tail
+    assert sniff_encoding(SizedBytesIO(data)) == 'utf-8'
+    assert decode_line(head.rstrip(b"\n"), 'utf-8') == "INFO ação concluída"
+    assert decode_line(b"byte solto \xe7", 'utf-8') == "byte solto ç"
@@ -0,0 +1,64 @@
+import json
+import os
+
+from log_highlighter import DEFAULT_LEVEL_PATTERNS, HighlightMatcher
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resolve(matcher, text):
+    """Payload de cada caractere: o último span que o cobre prevalece (como no delegate)."""
+    chars = [None] * len(text)
+    for start, length, payload in matcher.spans(text):
+        chars[start:start + length] = [payload] * length
+    return chars
+
+
+def test_later_rule_inside_earlier_match_overrides_it():
+    matcher = HighlightMatcher()
+    matcher.set_rules([(r"NFe \d+", False, "nfe"), (r"\d+", False, "numero")])
+    text = "NFe 123 ok"
+    assert resolve(matcher, text) == ["nfe"] * 4 + ["numero"] * 3 + [None] * 3
+
+
+def test_earlier_rule_inside_later_match_is_covered():
+    matcher = HighlightMatcher()
+    matcher.set_rules([(r"\bERRO\b", False, "erro"), (r"processo .* falhou", False, "falha")])
+    text = "processo ERRO falhou"
+    assert resolve(matcher, text) == ["falha"] * len(text)
+
+
+def test_level_words_keep_rule_priority():
+    matcher = HighlightMatcher()
+    matcher.set_rules([(pattern, False, level) for level, pattern in DEFAULT_LEVEL_PATTERNS]
+                      + [(r"\b(ERRO)\b", True, "custom")])
+    text = "ERRO erro INFO"
+    assert resolve(matcher, text) == ["custom"] * 4 + [None] + ["error"] * 4 + [None] + ["info"] * 4
+
+
+def test_search_highlight_is_applied_last():
+    matcher = HighlightMatcher()
+    matcher.set_rules([(r"\d+", False, "numero")])
+    matcher.set_search("23", payload="busca")
+    assert resolve(matcher, "x 1234") == [None, None, "numero", "busca", "busca", "numero"]
+
+
+def test_shipped_rules_use_single_pass():
+    with open(os.path.join(REPO_ROOT, "highlight_rules.json"), encoding="utf-8") as f:
+        rules = json.load(f)
+    matcher = HighlightMatcher()
+    matcher.set_rules([(rule["pattern"], rule["case_sensitive"], rule["pattern"]) for rule in rules])
+    assert matcher.single_pass
+    text = "[ERRO] Critical: INFO debug aviso"
+    assert resolve(matcher, text) == ([None] + ["ERRO"] * 4 + [None] * 2 + ["CRITICAL"] * 8 + [None] * 2
+                                      + ["INFO"] * 4 + [None] + ["DEBUG"] * 5 + [None] + ["AVISO"] * 5)
+
+
+def test_literal_rules_that_can_overlap_are_applied_separately():
+    matcher = HighlightMatcher()
+    matcher.set_rules([("ERRO", False, "erro"), ("ROR", False, "ror")]) # 'ERRO' termina com o começo de 'ROR'
+    assert not matcher.single_pass
+    assert resolve(matcher, "ERROR") == ["erro"] * 2 + ["ror"] * 3
+    matcher.set_rules([("ERRO", False, "erro"), ("ERROR", False, "error")]) # Uma dentro da outra
+    assert not matcher.single_pass
+    assert resolve(matcher, "ERROR") == ["error"] * 5
@@ -0,0 +1,103 @@
+import pytest
+
+from log_query import QuerySyntaxError, compile_query, literal_query
+
+LINES = [
+    "2025-07-14 14:00:01 INFO nfe autorizada",
+    "2025-07-14 14:10:00 ERRO falha ao conectar no SEFAZ",
+    "2025-07-14 14:20:00 WARN timeout na consulta da NFe 123",
+    "    at Batman.Conectar() (continuação da exceção anterior)",
+    "2025-07-14 15:05:00 DEBUG cte rejeitada",
+]
+
+
+def matching(text):
+    query = compile_query(text)
+    return [index for index, line in enumerate(LINES) if query.matches(line)]
+
+
+def test_empty_filter_compiles_to_none():
+    assert compile_query("") is None
+    assert compile_query("   ") is None
+
+
+def test_terms_without_operator_are_combined_with_and():
+    assert matching("nfe autorizada") == [0]
+    assert matching("NFE") == [0, 2]
+
+
+def test_and_binds_tighter_than_or():
+    assert matching("erro sefaz OR cte") == [1, 4]
+    assert matching("erro (sefaz OR cte)") == [1]
+    assert matching("timeout OU rejeitada E cte") == [2, 4]
+
+
+def test_not_and_minus_prefix():
+    assert matching("nfe NOT timeout") == [0]
+    assert matching("nfe -timeout") == [0]
+    assert matching("NÃO 2025") == [3]
+
+
+def test_quoted_phrase_and_escaped_quote():
+    assert matching('"falha ao conectar"') == [1]
+    assert matching('"ao falha"') == []
+    assert compile_query(r'"disse \"oi\""').matches('ele disse "oi"')
+
+
+def test_regex_term():
+    assert matching(r"/NFe \d+/") == [2]
+    assert matching(r"/^\s+at /") == [3]
+
+
+def test_level_terms():
+    assert matching("level:error") == [1]
+    assert matching("nivel:warn,debug") == [2, 4]
+
+
+def test_time_terms_skip_lines_without_timestamp():
+    assert matching("after:14:10") == [1, 2, 4]
+    assert matching("before:14:10") == [0, 1]
+    assert matching("time:14:05-14:30") == [1, 2]
+    assert matching("hora:2025-07-14T14:05-15:00") == [1, 2]
+
+
+def test_required_literals_feed_the_prefilter():
+    assert compile_query("nfe autorizada").required_literals == {"nfe", "autorizada"}
+    assert compile_query("nfe (autorizada OR rejeitada)").required_literals == {"nfe"}
+    assert compile_query("nfe -timeout").required_literals == {"nfe"}
+    assert compile_query("/nfe/").required_literals == set()
+
+
+def test_refinement_of_literal_conjunction():
+    assert compile_query("nfe autorizada").is_refinement_of(compile_query("nfe"))
+    assert not compile_query("nfe").is_refinement_of(compile_query("nfe autorizada"))
+    assert not compile_query("nfe").is_refinement_of(compile_query("/nfe/"))
+
+
+def test_negated_query_accepts_the_other_lines():
+    query = compile_query("level:error OR cte").negated()
+    assert [index for index, line in enumerate(LINES) if query.matches(line)] == [0, 2, 3]
+
+
+def test_unclosed_quote_is_a_literal_word():
+    assert compile_query('"sem fim').matches('valor "sem fim')
+
+
+def test_literal_query_ignores_operators():
+    assert literal_query("a OR (b").matches("x a or (b y")
+
+
+@pytest.mark.parametrize("text, message", [
+    ("(erro", "Parêntese '(' sem fechamento correspondente."),
+    ("erro)", "Parêntese ')' sem abertura correspondente."),
+    ("erro OR", "Filtro incompleto: falta um termo após o operador."),
+    ("NOT", "Filtro incompleto: falta um termo após o operador."),
+    ("/[a-/", "Expressão regular inválida /[a-/"),
+    ("level:fatal", "Nível desconhecido: 'fatal'. Use error, warn, info ou debug."),
+    ("after:25:00", "Horário inválido: '25:00'. Use HH:MM, HH:MM:SS ou AAAA-MM-DDTHH:MM."),
+    ("time:14:00", "Intervalo de hora inválido: '14:00'. Use, por exemplo, time:14:00-15:00."),
+])
+def test_malformed_filters_raise_with_message(text, message):
+    with pytest.raises(QuerySyntaxError) as error:
+        compile_query(text)
+    assert str(error.value).startswith(message)
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+from PyQt5 import QtCore
+
+import log_tail_engine
+from log_index_cache import IndexCache
+from log_tail_engine import TailEngine, TailedFile
+from log_viewer import LogFileReader
+
+
+class _Requests(QtCore.QObject):
+    """Lado da UI: pede o arquivo ao worker por sinal, como o LogViewerDialog."""
+    log_file_requested = QtCore.pyqtSignal(str)
+
+
+@pytest.fixture
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def _wait(app, condition, timeout=5.0):
+    deadline = QtCore.QDeadlineTimer(int(timeout * 1000))
+    while not condition() and not deadline.hasExpired():
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def test_reader_reads_and_publishes_on_the_engine_thread(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_tail_engine, "IndexCache", lambda: IndexCache(str(tmp_path / "index_cache")))
+    calls = [] # (função, thread do Python, QThread atual)
+
+    def record(name, function):
+        def wrapper(self, *args, **kwargs):
+            calls.append((name, threading.get_ident(), QtCore.QThread.currentThread()))
+            return function(self, *args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(TailedFile, "open", record("open", TailedFile.open))
+    monkeypatch.setattr(TailedFile, "poll", record("poll", TailedFile.poll))
+    monkeypatch.setattr(LogFileReader, "_publish", record("publish", LogFileReader._publish))
+
+    log_path = tmp_path / "servico.log"
+    log_path.write_text("linha inicial\n")
+    engine = TailEngine()
+    reader = LogFileReader(engine=engine)
+    requests = _Requests()
+    requests.log_file_requested.connect(reader.set_log_file)
+    engine.attach(reader)
+    try:
+        requests.log_file_requested.emit(str(log_path))
+        assert _wait(app, lambda: any(name == "open" for name, _, _ in calls))
+        with open(log_path, "a") as f:
+            f.write("linha nova 1\nlinha nova 2\n")
+        assert _wait(app, lambda: any(name == "publish" for name, _, _ in calls))
+        assert _wait(app, lambda: any(name == "poll" for name, _, _ in calls))
+    finally:
+        engine.detach(reader)
+
+    main_ident = threading.get_ident()
+    assert {name for name, _, _ in calls} >= {"open", "poll", "publish"}
+    for name, ident, qthread in calls:
+        assert ident != main_ident, f"{name} rodou na thread principal"
+        assert qthread != app.thread(), f"{name} rodou na QThread principal"
+    assert not engine._thread.isRunning()
@@ -0,0 +1,35 @@
+import io
+import random
+
+from log_search import iter_file_matches
+
+
+def reference_hits(data, needle):
+    return [number for number, line in enumerate(data.split(b"\n")) if needle in line.lower()]
+
+
+def test_hits_match_a_line_by_line_scan():
+    rng = random.Random(16)
+    words = [b"ok", b"nfe", b"NFe", b"lote", b"x" * 40]
+    data = b"\n".join(b" ".join(rng.choice(words) for _ in range(rng.randrange(1, 8))) for _ in range(3000))
+    hits = list(iter_file_matches(io.BytesIO(data), b"nfe", read_size=997))
+    assert [number for number, _ in hits] == reference_hits(data, b"nfe")
+    lines = data.split(b"\n")
+    assert all(line == lines[number] for number, line in hits)
+
+
+def test_line_without_newline_is_scanned_in_bounded_pieces():
+    giant = b"a" * 5000 + b"NFE" + b"a" * 5000 + b"nfe" + b"a" * 5000 + b"nf" # Uma linha só, sem '\n'
+    data = giant + b"e\nok\nnfe no fim"
+    hits = list(iter_file_matches(io.BytesIO(data), b"nfe", read_size=1000, max_carry=2000))
+    assert [number for number, _ in hits] == [0, 2]
+    assert len(hits[0][1]) <= 2000 + 1000 # Só o trecho em que o termo apareceu
+    assert b"NFE" in hits[0][1]
+    assert hits[1][1] == b"nfe no fim"
+
+
+def test_occurrence_split_between_pieces_is_found():
+    for offset in range(1990, 2010):
+        data = b"a" * offset + b"nfe" + b"a" * 3000 + b"\nfim"
+        hits = list(iter_file_matches(io.BytesIO(data), b"nfe", read_size=1000, max_carry=1500))
+        assert [number for number, _ in hits] == [0], offset
@@ -0,0 +1,71 @@
+from datetime import date, datetime, time, timedelta
+import io
+
+from log_io import TIME_PROBE_BYTES, find_time_offset
+from log_timestamps import parse_user_timestamp
+
+START = datetime(2025, 7, 14, 8, 0, 0)
+
+
+def build_log(count=20000, step=timedelta(seconds=2)):
+    """Log de teste com um stack trace (linhas sem timestamp) a cada 50 entradas."""
+    data = bytearray()
+    offsets = [] # (offset, datetime) de cada linha com timestamp
+    for index in range(count):
+        stamp = START + index * step
+        offsets.append((len(data), stamp))
+        data += f"{stamp:%Y-%m-%d %H:%M:%S},000 INFO entrada {index}\n".encode()
+        if index % 50 == 0:
+            data += b"    at Batman.Processar()\n    at Batman.Main()\n"
+    assert len(data) > 10 * TIME_PROBE_BYTES # A busca binária precisa de várias sondagens
+    return bytes(data), offsets
+
+
+def expected_offset(offsets, size, reference):
+    return next((offset for offset, stamp in offsets if stamp >= reference), size)
+
+
+def test_time_before_first_line_returns_start():
+    data, _ = build_log()
+    assert find_time_offset(io.BytesIO(data), parse_user_timestamp("2025-07-14 07:00")) == 0
+
+
+def test_time_after_last_line_returns_file_size():
+    data, _ = build_log()
+    assert find_time_offset(io.BytesIO(data), parse_user_timestamp("2025-07-15 00:00")) == len(data)
+
+
+def test_time_between_two_lines_returns_the_later_one():
+    data, offsets = build_log()
+    for reference in (START + timedelta(seconds=1), START + timedelta(hours=5, seconds=3),
+                      START + timedelta(hours=11, seconds=4)):
+        user_reference = parse_user_timestamp(f"{reference:%Y-%m-%d %H:%M:%S}")
+        assert find_time_offset(io.BytesIO(data), user_reference) == expected_offset(offsets, len(data), reference)
+
+
+def test_exact_time_returns_that_line():
+    data, offsets = build_log()
+    offset, stamp = offsets[12345]
+    assert find_time_offset(io.BytesIO(data), parse_user_timestamp(f"{stamp:%Y-%m-%d %H:%M:%S}")) == offset
+
+
+def test_lines_without_timestamp_are_skipped():
+    data, offsets = build_log()
+    # Logo após a entrada 100 vem um stack trace: a busca para na entrada 101, não nele
+    offset, stamp = offsets[101]
+    reference = offsets[100][1] + timedelta(seconds=1)
+    assert data[offsets[100][0]:offset].count(b"\n") == 3
+    assert find_time_offset(io.BytesIO(data), (reference.date(), reference.time())) == offset
+
+
+def test_file_without_timestamps_returns_file_size():
+    data = b"    at Batman.Main()\n" * 10000
+    assert find_time_offset(io.BytesIO(data), (date(2025, 7, 14), time(8, 0))) == len(data)
+
+
+def test_time_without_date_uses_the_last_day_of_the_file():
+    data, offsets = build_log(count=60000) # 08:00 do dia 14 até 17:19:58 do dia 15
+    reference = datetime(2025, 7, 15, 9, 0)
+    assert offsets[-1][1].date() == reference.date()
+    assert find_time_offset(io.BytesIO(data), parse_user_timestamp("09:00")) == \
+        expected_offset(offsets, len(data), reference)
@@ -0,0 +1,56 @@
+from log_line_store import LineStore
+from log_trigram_index import TrigramIndex, _literal_trigrams, _text_trigrams
+
+BLOCK_LINES = 4
+LINES = [
+    # Bloco 0: a frase inteira numa linha
+    "INFO NFe autorizada", "INFO ok", "INFO ok", "INFO ok",
+    # Bloco 1: os dois literais, em linhas diferentes
+    "INFO nfe recebida", "INFO ok", "INFO lote autorizada", "INFO ok",
+    # Bloco 2: só um dos literais
+    "INFO nfe rejeitada", "INFO ok", "INFO ok", "INFO ok",
+    # Bloco 3: sem nenhum
+    "INFO ok", "INFO ok", "INFO ok", "INFO ok",
+    # Bloco final incompleto: ainda não indexado
+    "INFO ok",
+]
+
+
+def build_index():
+    store = LineStore()
+    for line in LINES:
+        store.append_text(line)
+    index = TrigramIndex(block_lines=BLOCK_LINES)
+    while index.extend(store):
+        pass
+    return store, index
+
+
+def test_candidates_are_blocks_with_every_trigram_plus_unindexed_tail():
+    store, index = build_index()
+    literals = ["nfe", "autorizada"]
+    ranges = index.candidate_ranges(literals, 0, store.next_seq)
+    assert ranges == [(0, 8), (16, 17)]
+    wanted = set().union(*(_literal_trigrams(literal) for literal in literals))
+    for block in range(index.indexed_end // BLOCK_LINES):
+        text = "\n".join(LINES[block * BLOCK_LINES:(block + 1) * BLOCK_LINES]).lower()
+        in_ranges = any(low <= block * BLOCK_LINES < high for low, high in ranges)
+        assert in_ranges == (wanted <= _text_trigrams(text))
+
+
+def test_candidates_are_clipped_to_the_requested_range():
+    store, index = build_index()
+    assert index.candidate_ranges(["nfe"], 2, 10) == [(2, 10)]
+    assert index.candidate_ranges(["rejeitada"], 0, 12) == [(8, 12)]
+
+
+def test_missing_trigram_leaves_only_unindexed_lines():
+    store, index = build_index()
+    assert index.candidate_ranges(["cancelada"], 0, store.next_seq) == [(16, 17)]
+
+
+def test_short_literals_do_not_prune():
+    store, index = build_index()
+    assert index.candidate_ranges(["ok", "nf"], 0, store.next_seq) is None
+    # Um literal longo basta para usar o índice
+    assert index.candidate_ranges(["ok", "rejeitada"], 0, store.next_seq) == [(8, 12), (16, 17)]